@@ -0,0 +1,2 @@
+# -*- coding: utf-8 -*-
+"""bulk tools for game record archives"""
@@ -0,0 +1,156 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Convert record collections into CSA or the compact binary form
+
+The main process reads the files through archive.reader and only splits them into games; chunks
+of games are parsed and written in a process pool, and the results are appended to the output in
+the order of the input. Games which cannot be read are reported and skipped.
+"""
+
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from core.binary_record import MAGIC, BinaryRecord
+from core.kif import KIF_SUFFIXES, KifFormatError, KifRecord, kif_encoding, split_games as split_kif_games
+from core.record import Record, open_record
+from archive.reader import RECORD_SUFFIXES, iter_files
+
+CSA, BINARY = 'csa', 'bin'
+OUTPUT_FORMATS = (CSA, BINARY)
+INPUT_SUFFIXES = RECORD_SUFFIXES + KIF_SUFFIXES
+DEFAULT_CHUNK_GAMES = 64
+
+
+class ConversionError(namedtuple('ConversionError', 'path index reason')):
+    """Game which could not be converted; index is the number of the game in the file."""
+
+    def __str__(self):
+        return '{}#{}: {}'.format(self.path, self.index, self.reason)
+
+
+class ConversionStats(namedtuple('ConversionStats', 'files games errors elapsed')):
+    @property
+    def games_per_second(self):
+        return self.games / self.elapsed if self.elapsed else float('inf')
+
+    def __str__(self):
+        return '{} games from {} files, {} errors in {:.2f}s: {:.0f} games/sec'.format(
+            self.games, self.files, len(self.errors), self.elapsed, self.games_per_second)
+
+
+def read_file(path):
+    """@return list of tuple (game_information, initial_state, history) in the CSA, KIF, KI2 or binary file"""
+    with open_record(path, 'rb') as f:
+        if f.read(len(MAGIC)) == MAGIC:
+            f.seek(0)
+            return BinaryRecord.read(f)
+    encoding = kif_encoding(path)
+    with open_record(path, encoding=encoding or 'utf-8') as f:
+        return KifRecord.read(f) if encoding else Record.read(f)
+
+
+def _split_csa_games(lines):
+    buf = []
+    for line in lines:
+        if line.rstrip('\r\n') == '/':
+            yield buf
+            buf = []
+        else:
+            buf.append(line)
+    if any(x.strip() for x in buf):
+        yield buf
+
+
+def write_game(fmt, record):
+    """@return bytes of the game in the output format"""
+    if fmt == BINARY:
+        return BinaryRecord.write(*record)
+    return ('\n'.join(Record.write(*record)) + '\n/\n').encode('utf-8')
+
+
+def convert_chunk(fmt, path, kif, games):
+    """
+    @param kif True if the games are in KIF or KI2, False if in CSA
+    @param games list of tuple (index, lines)
+    @return tuple of (converted bytes, number of games converted, list of ConversionError)
+    """
+    buf, errors = [], []
+    for index, lines in games:
+        try:
+            record = KifRecord.read_game(lines) if kif else Record.read(lines)[0]
+            buf.append(write_game(fmt, record))
+        except (KifFormatError, AssertionError, KeyError, ValueError, IndexError) as e:
+            errors.append(ConversionError(path, index, str(e) or repr(e)))
+    return b''.join(buf), len(buf), errors
+
+
+def _chunks(paths, chunk_games, on_file):
+    for path, raw_lines in iter_files(paths, suffixes=INPUT_SUFFIXES):
+        on_file(path)
+        encoding = kif_encoding(path)
+        lines = (line.decode(encoding or 'utf-8', 'replace') for line in raw_lines)
+        games = split_kif_games(lines) if encoding else _split_csa_games(lines)
+        buf = []
+        for index, game in enumerate(games):
+            buf.append((index, game))
+            if len(buf) == chunk_games:
+                yield path, bool(encoding), buf
+                buf = []
+        if buf:
+            yield path, bool(encoding), buf
+
+
+def convert_files(paths, out_path, fmt=CSA, jobs=None, chunk_games=DEFAULT_CHUNK_GAMES, on_error=None):
+    """
+    @param paths files and directories of CSA, KIF and KI2 files, optionally compressed
+    @param fmt CSA or BINARY
+    @param jobs number of worker processes (default: number of CPUs), 1 to run in this process
+    @param on_error function called with each ConversionError, in the order of the files
+    @return ConversionStats
+    """
+    if fmt not in OUTPUT_FORMATS:
+        raise ValueError('unknown format: {}'.format(fmt))
+    start = time.time()
+    files, games, errors = 0, 0, []
+
+    def count_file(_):
+        nonlocal files
+        files += 1
+
+    with open(out_path, 'wb') as out:
+        if fmt == BINARY:
+            out.write(MAGIC)
+
+        def collect(result):
+            nonlocal games
+            out.write(result[0])
+            games += result[1]
+            for e in result[2]:
+                errors.append(e)
+                if on_error:
+                    on_error(e)
+
+        jobs = jobs or os.cpu_count() or 1
+        if jobs == 1:
+            for path, kif, chunk in _chunks(paths, chunk_games, count_file):
+                collect(convert_chunk(fmt, path, kif, chunk))
+        else:
+            with ProcessPoolExecutor(jobs) as executor:
+                # keep a bounded number of chunks in flight so that large collections are not read at once
+                window = 4 * jobs
+                pending = deque()
+                for path, kif, chunk in _chunks(paths, chunk_games, count_file):
+                    pending.append(executor.submit(convert_chunk, fmt, path, kif, chunk))
+                    if len(pending) >= window:
+                        collect(pending.popleft().result())
+                while pending:
+                    collect(pending.popleft().result())
+
+    return ConversionStats(files, games, errors, time.time() - start)
+
+
+if __name__ == '__main__':
+    pass
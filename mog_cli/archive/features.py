@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Export positions as NumPy feature planes for machine learning
+
+Each chunk is written as separate .npy files which can be opened with numpy.load(path, mmap_mode='r').
+  <prefix>.<chunk>.planes.npy  uint8 [N, 28, 81]  one-hot of (turn, piece type) x square
+  <prefix>.<chunk>.hands.npy   uint8 [N, 14]      hand counts of (turn, hand piece type)
+  <prefix>.<chunk>.side.npy    uint8 [N]          0: BLACK to move, 1: WHITE to move
+  <prefix>.<chunk>.moves.npy   int32 [N]          move target index (see move_index)
+  <prefix>.<chunk>.results.npy int8  [N]          1: side to move won, -1: lost, 0: draw or unknown
+
+Positions are kept as 81-byte piece codes while a chunk is filled, and expanded to
+one-hot planes with a single vectorized comparison when the chunk is flushed.
+"""
+
+import numpy as np
+
+from core import *
+from core.game import Game, winner_of
+from core.movegen import SQUARES
+from archive.reader import iter_records
+
+# piece codes: 0 is empty, 1..14 are BLACK pieces and 15..28 are WHITE pieces in PIECE_TYPES order
+PIECE_CODES = {t + pt: 1 + i + len(PIECE_TYPES) * TURNS.index(t) for t in TURNS for i, pt in enumerate(PIECE_TYPES)}
+NUM_PLANES = 2 * len(PIECE_TYPES)
+HAND_INDEX = {t + pt: i + len(HAND_PIECE_TYPES) * TURNS.index(t)
+              for t in TURNS for i, pt in enumerate(HAND_PIECE_TYPES)}
+NUM_HANDS = 2 * len(HAND_PIECE_TYPES)
+SQUARE_INDEX = {sq: i for i, sq in enumerate(SQUARES)}
+
+# move index = (from * 81 + to) * 2 + promotion, where drops use from = 81 + index of HAND_PIECE_TYPES
+NUM_MOVES = (len(SQUARES) + len(HAND_PIECE_TYPES)) * len(SQUARES) * 2
+
+DEFAULT_CHUNK_SIZE = 1 << 16
+
+_PLANE_CODES = np.arange(1, NUM_PLANES + 1, dtype=np.uint8)[None, :, None]
+
+
+def encode_board(state, out):
+    """Write piece codes of the state into a writable buffer of 81 bytes."""
+    out[:] = bytes(len(SQUARES))
+    for pos, piece in state.board.items():
+        out[SQUARE_INDEX[pos]] = PIECE_CODES[piece]
+
+
+def encode_hand(state, out):
+    """Write hand counts of the state into a writable buffer of 14 bytes."""
+    out[:] = bytes(NUM_HANDS)
+    for piece, n in state.hand.items():
+        if n:
+            out[HAND_INDEX[piece]] = n
+
+
+def move_index(state, mv):
+    """@return move target index of the normal move made from the state"""
+    if mv.move_from == POS_HAND:
+        src = len(SQUARES) + HAND_PIECE_TYPES.index(mv.piece_type)
+        promotion = 0
+    else:
+        src = SQUARE_INDEX[mv.move_from]
+        promotion = int(state.board[mv.move_from][1:] != mv.piece_type)
+    return (src * len(SQUARES) + SQUARE_INDEX[mv.move_to]) * 2 + promotion
+
+
+def to_planes(codes):
+    """Expand piece codes [N, 81] to one-hot planes [N, 28, 81]."""
+    return (np.asarray(codes)[:, None, :] == _PLANE_CODES).astype(np.uint8)
+
+
+class FeatureWriter:
+    """Fill preallocated chunk arrays and write them to .npy files when full."""
+
+    def __init__(self, prefix, chunk_size=DEFAULT_CHUNK_SIZE):
+        self.prefix = prefix
+        self.chunk_size = chunk_size
+        self.codes = np.zeros((chunk_size, len(SQUARES)), dtype=np.uint8)
+        self.hands = np.zeros((chunk_size, NUM_HANDS), dtype=np.uint8)
+        self.side = np.zeros(chunk_size, dtype=np.uint8)
+        self.moves = np.zeros(chunk_size, dtype=np.int32)
+        self.results = np.zeros(chunk_size, dtype=np.int8)
+        self.size = 0
+        self.chunks = 0
+        self.positions = 0
+        self.files = []
+
+    def add(self, state, mv, winner):
+        """Add the position before the normal move."""
+        i = self.size
+        encode_board(state, memoryview(self.codes[i]))
+        encode_hand(state, memoryview(self.hands[i]))
+        self.side[i] = TURNS.index(state.to_move)
+        self.moves[i] = move_index(state, mv)
+        self.results[i] = 0 if winner is None else (1 if winner == state.to_move else -1)
+
+        self.size += 1
+        if self.size == self.chunk_size:
+            self.flush()
+
+    def flush(self):
+        if not self.size:
+            return
+        n = self.size
+        arrays = [
+            ('planes', to_planes(self.codes[:n])),
+            ('hands', self.hands[:n]),
+            ('side', self.side[:n]),
+            ('moves', self.moves[:n]),
+            ('results', self.results[:n]),
+        ]
+        for name, a in arrays:
+            path = '{}.{:05d}.{}.npy'.format(self.prefix, self.chunks, name)
+            np.save(path, a)
+            self.files.append(path)
+        self.positions += n
+        self.chunks += 1
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+
+def export_games(records, prefix, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Replay games and write every position followed by a normal move.
+    @param records iterator of tuple (game_information, initial_state, history) as Record.iter_read
+    @return tuple of (number of games, number of positions, list of written files)
+    """
+    games = 0
+    with FeatureWriter(prefix, chunk_size) as writer:
+        for info, state, history in records:
+            normal_moves = sum(1 for mv in history if not mv.is_special)
+            winner = winner_of(history, state.to_move if normal_moves % 2 == 0 else FLIP_TURN[state.to_move])
+
+            replay = Game.from_record(info, state)
+            for mv in history:
+                if not mv.is_special:
+                    writer.add(replay.state, mv, winner)
+                replay.move(mv)
+            games += 1
+    return games, writer.positions, writer.files
+
+
+def export_files(paths, prefix, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Stream record files (.csa, .csa.gz, .csa.xz) and directories of them and export them."""
+    return export_games((r for _, r in iter_records(paths)), prefix, chunk_size)
+
+
+if __name__ == '__main__':
+    pass
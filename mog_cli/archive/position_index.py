@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Persistent index of the positions in game archives
+
+Every position of every game (ply 0 is the initial position) is recorded as a posting
+  hash (64 bits) | game number (32 bits) | ply (16 bits)
+packed big-endian into 14 bytes, so that the byte order of postings is their numeric order.
+
+Index file:
+  header    magic, number of postings, number of games
+  postings  sorted, 14 bytes each
+  games     one line per game number: '<byte offset>\t<path of the CSA file>'
+
+A lookup is a binary search over the memory-mapped postings. Indexes are merged by a
+streaming merge of their postings, renumbering the games of each input.
+"""
+
+import heapq
+import mmap
+import os
+import struct
+import tempfile
+
+from core import *
+from core.game import Game
+from core.record import Record, open_record
+from core.zobrist import hash_of
+from archive.reader import DEFAULT_WORKERS, iter_files
+
+MAGIC = b'MOGPIX01'
+_HEADER = struct.Struct('>8sQQ')
+
+POSTING_SIZE = 14
+HASH_SIZE = 8
+_GAME_SHIFT = 16
+_PLY_MASK = (1 << _GAME_SHIFT) - 1
+_GAME_MASK = (1 << 32) - 1
+
+DEFAULT_RUN_SIZE = 1 << 20  # postings held in memory before they are spilled to a sorted run
+
+
+class IndexFormatError(Exception):
+    pass
+
+
+def posting(h, game, ply):
+    return (h << 48) | (game << _GAME_SHIFT) | min(ply, _PLY_MASK)
+
+
+def iter_games(lines):
+    """
+    Stream the lines of a record file through Record.iter_read.
+    @param lines iterator of lines as bytes, e.g. from archive.reader.iter_files
+    @return iterator of tuple (byte offset of the game, (game_information, initial_state, history))
+    """
+    pos = [0]
+
+    def text():
+        for raw in lines:
+            pos[0] += len(raw)
+            yield raw.decode('utf-8')
+
+    start = 0
+    for record in Record.iter_read(text()):
+        yield start, record
+        start = pos[0]  # the game has been yielded at its '/' line
+
+
+def read_game(path, offset):
+    """@return tuple (game_information, initial_state, history) of the game at the byte offset (after decompression)"""
+    with open_record(path, 'rb') as f:
+        f.seek(offset)
+        return next(Record.iter_read(raw.decode('utf-8') for raw in f))
+
+
+def game_postings(game_number, init_state, history):
+    """Replay the game. @return list of postings of every position"""
+    game = Game.from_record({}, init_state)
+    ret = [posting(game.hash, game_number, 0)]
+    for mv in history:
+        if mv.is_special:
+            break
+        game.move(mv)
+        ret.append(posting(game.hash, game_number, len(game.history)))
+    return ret
+
+
+def _write_postings(f, postings):
+    f.write(b''.join(p.to_bytes(POSTING_SIZE, 'big') for p in postings))
+
+
+def _read_postings(f, count, shift=0):
+    """@return iterator of postings read from the file object, game numbers increased by shift"""
+    delta = shift << _GAME_SHIFT
+    remaining = count
+    while remaining:
+        n = min(remaining, 1 << 14)
+        data = f.read(n * POSTING_SIZE)
+        if len(data) != n * POSTING_SIZE:
+            raise IndexFormatError('truncated index')
+        for i in range(0, len(data), POSTING_SIZE):
+            yield int.from_bytes(data[i:i + POSTING_SIZE], 'big') + delta
+        remaining -= n
+
+
+def _write_index(path, count, postings, games):
+    """Write the index atomically. @param count number of postings in the iterator"""
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_HEADER.pack(MAGIC, count, len(games)))
+        written = 0
+        buf = []
+        for p in postings:
+            buf.append(p)
+            if len(buf) == 1 << 14:
+                _write_postings(f, buf)
+                written += len(buf)
+                buf = []
+        _write_postings(f, buf)
+        written += len(buf)
+        assert written == count
+        f.write(''.join('{}\t{}\n'.format(offset, p) for p, offset in games).encode('utf-8'))
+    os.replace(tmp, path)
+
+
+def _read_header(f):
+    data = f.read(_HEADER.size)
+    if len(data) != _HEADER.size:
+        raise IndexFormatError('truncated header')
+    magic, count, num_games = _HEADER.unpack(data)
+    if magic != MAGIC:
+        raise IndexFormatError('not a position index')
+    return count, num_games
+
+
+def _read_games(f, count):
+    f.seek(_HEADER.size + count * POSTING_SIZE)
+    ret = []
+    for line in f.read().decode('utf-8').splitlines():
+        offset, _, path = line.partition('\t')
+        ret.append((path, int(offset)))
+    return ret
+
+
+class IndexWriter:
+    """
+    Build an index file from CSA files.
+    Postings are sorted in runs of run_size, spilled to temporary files and merged on close().
+
+    @param path index file to write
+    """
+
+    def __init__(self, path, run_size=DEFAULT_RUN_SIZE):
+        self.path = path
+        self.run_size = run_size
+        self.games = []  # (path, offset) by game number
+        self.postings = []
+        self.runs = []  # (temporary file, number of postings)
+
+    def add_files(self, paths, workers=DEFAULT_WORKERS):
+        """
+        @param paths record files (.csa, .csa.gz, .csa.xz) and directories of them
+        @return number of games
+        """
+        n = 0
+        for path, lines in iter_files(paths, workers):
+            for offset, (info, init_state, history) in iter_games(lines):
+                self.add_game(path, offset, init_state, history)
+                n += 1
+        return n
+
+    def add_game(self, path, offset, init_state, history):
+        if len(self.games) > _GAME_MASK:
+            raise IndexFormatError('too many games')
+        self.postings.extend(game_postings(len(self.games), init_state, history))
+        self.games.append((os.path.abspath(path), offset))
+        if len(self.postings) >= self.run_size:
+            self.__spill()
+
+    def __spill(self):
+        self.postings.sort()
+        f = tempfile.TemporaryFile()
+        _write_postings(f, self.postings)
+        f.seek(0)
+        self.runs.append((f, len(self.postings)))
+        self.postings = []
+
+    def close(self):
+        """Merge the runs and write the index. @return number of postings"""
+        self.postings.sort()
+        try:
+            count = len(self.postings) + sum(n for _, n in self.runs)
+            sources = [_read_postings(f, n) for f, n in self.runs] + [iter(self.postings)]
+            _write_index(self.path, count, heapq.merge(*sources), self.games)
+        finally:
+            for f, _ in self.runs:
+                f.close()
+            self.runs = []
+            self.postings = []
+        return count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+
+
+def merge(out_path, in_paths):
+    """
+    Merge index files into one; out_path may be one of in_paths.
+    @return number of postings
+    """
+    files = [open(p, 'rb') for p in in_paths]
+    try:
+        headers = [_read_header(f) for f in files]
+        games = []
+        sources = []
+        for f, (count, num_games) in zip(files, headers):
+            shift = len(games)
+            games.extend(_read_games(f, count))
+            f.seek(_HEADER.size)
+            sources.append(_read_postings(f, count, shift))
+        total = sum(count for count, _ in headers)
+        _write_index(out_path, total, heapq.merge(*sources), games)
+    finally:
+        for f in files:
+            f.close()
+    return total
+
+
+def build(index_path, csa_paths, run_size=DEFAULT_RUN_SIZE):
+    """
+    Index the CSA files. If the index exists, the new games are merged into it.
+    @return tuple of (number of games added, number of postings in the index)
+    """
+    exists = os.path.exists(index_path)
+    w = IndexWriter(index_path + '.new' if exists else index_path, run_size)
+    w.add_files(csa_paths)
+    count = w.close()
+
+    if exists:
+        try:
+            count = merge(index_path, [index_path, w.path])
+        finally:
+            os.remove(w.path)
+    return len(w.games), count
+
+
+class PositionIndex:
+    """
+    Read-only view of an index file.
+
+    @param path index file
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.count, num_games = _read_header(self.file)
+            self.games = _read_games(self.file, self.count)
+            if len(self.games) != num_games:
+                raise IndexFormatError('broken game table')
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except Exception:
+            self.file.close()
+            raise
+
+    def close(self):
+        self.map.close()
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __key(self, i):
+        offset = _HEADER.size + i * POSTING_SIZE
+        return self.map[offset:offset + HASH_SIZE]
+
+    def find_hash(self, h):
+        """@return list of tuple (path, byte offset of the game, ply) of the positions with the hash"""
+        key = h.to_bytes(HASH_SIZE, 'big')
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.__key(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+
+        ret = []
+        while lo < self.count and self.__key(lo) == key:
+            offset = _HEADER.size + lo * POSTING_SIZE
+            p = int.from_bytes(self.map[offset:offset + POSTING_SIZE], 'big')
+            ret.append(self.games[(p >> _GAME_SHIFT) & _GAME_MASK] + (p & _PLY_MASK,))
+            lo += 1
+        return ret
+
+    def find(self, state):
+        """@return list of tuple (path, byte offset of the game, ply) of the games which reached the state"""
+        return self.find_hash(hash_of(state))
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Read record archives with decompression ahead of parsing
+
+Files and directories of .csa, .csa.gz and .csa.xz files are read in order. Each file is read
+and decompressed by its own thread into a bounded queue of blocks, up to `workers` files ahead
+of the file being parsed; zlib and lzma release the GIL, so decompression overlaps with parsing.
+"""
+
+import os
+import queue
+import threading
+
+from core.record import Record, open_record
+
+RECORD_SUFFIXES = ('.csa', '.csa.gz', '.csa.xz')
+
+DEFAULT_WORKERS = 4
+BLOCK_SIZE = 1 << 16
+MAX_BLOCKS = 16  # blocks buffered per file
+
+
+def record_files(paths, suffixes=RECORD_SUFFIXES):
+    """@return list of the files, with directories replaced by the files with the suffixes in them, sorted"""
+    ret = []
+    for path in paths:
+        if not os.path.isdir(path):
+            ret.append(path)
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs.sort()
+            ret.extend(os.path.join(root, f) for f in sorted(files) if f.endswith(suffixes))
+    return ret
+
+
+class _Prefetch(threading.Thread):
+    """Thread which reads one file into a bounded queue of blocks; an empty block marks the end."""
+
+    def __init__(self, path):
+        super().__init__(daemon=True)
+        self.path = path
+        self.queue = queue.Queue(MAX_BLOCKS)
+        self.cancelled = False
+        self.start()
+
+    def run(self):
+        try:
+            with open_record(self.path, 'rb') as f:
+                while not self.cancelled:
+                    block = f.read(BLOCK_SIZE)
+                    self.queue.put(block)
+                    if not block:
+                        break
+        except Exception as e:
+            self.queue.put(e)
+
+    def lines(self):
+        """@return iterator of the lines as bytes, with line feeds"""
+        rest = b''
+        while True:
+            block = self.queue.get()
+            if isinstance(block, Exception):
+                raise block
+            if not block:
+                break
+            *lines, rest = (rest + block).split(b'\n')
+            for line in lines:
+                yield line + b'\n'
+        if rest:
+            yield rest
+
+    def cancel(self):
+        """Stop the thread, which may be blocked on the full queue."""
+        self.cancelled = True
+        # free the queue; the thread puts at most one more block before it sees the flag
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
+        self.join()
+
+
+def iter_files(paths, workers=DEFAULT_WORKERS, suffixes=RECORD_SUFFIXES):
+    """
+    @param paths files and directories
+    @param suffixes suffixes of the files read from the directories
+    @return iterator of tuple (path, iterator of lines as bytes); each iterator is valid until the next file
+    """
+    files = record_files(paths, suffixes)
+    running = []
+    try:
+        for i, path in enumerate(files):
+            while len(running) < workers and i + len(running) < len(files):
+                running.append(_Prefetch(files[i + len(running)]))
+            current = running.pop(0)
+            try:
+                yield path, current.lines()
+            finally:
+                current.cancel()
+    finally:
+        for t in running:
+            t.cancel()
+
+
+def iter_text(lines, encoding='utf-8'):
+    return (line.decode(encoding) for line in lines)
+
+
+def iter_records(paths, workers=DEFAULT_WORKERS):
+    """@return iterator of tuple (path, (game_information, initial_state, history)) as Record.iter_read"""
+    for path, lines in iter_files(paths, workers):
+        for record in Record.iter_read(iter_text(lines)):
+            yield path, record
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+SQLite store of finished games
+
+One row per game with the players, Game_ID, start time, result, opening and length,
+indexed for queries, and the CSA record itself so that a game can be loaded without the
+original file. Archives are ingested in batches, each batch in one transaction.
+"""
+
+import sqlite3
+
+from core import *
+from core.game import winner_of
+from core.record import Record
+from archive.reader import DEFAULT_WORKERS, iter_files, iter_text
+
+DEFAULT_BATCH_SIZE = 1000
+
+# results
+BLACK_WIN, WHITE_WIN, DRAW = BLACK, WHITE, 'draw'
+
+# special moves and server reasons which end the game in a draw, when the result is not given
+_DRAW_SPECIALS = {'%SENNICHITE', '%HIKIWAKE', '%JISHOGI', '%MAX_MOVES', '#SENNICHITE', '#MAX_MOVES'}
+
+_SCHEMA = [
+    '''CREATE TABLE IF NOT EXISTS games (
+        id INTEGER PRIMARY KEY,
+        game_id TEXT,
+        black TEXT,
+        white TEXT,
+        start_time TEXT,
+        event TEXT,
+        opening TEXT,
+        result TEXT,
+        reason TEXT,
+        plies INTEGER,
+        source TEXT,
+        record TEXT
+    )''',
+    'CREATE INDEX IF NOT EXISTS games_black ON games (black)',
+    'CREATE INDEX IF NOT EXISTS games_white ON games (white)',
+    'CREATE INDEX IF NOT EXISTS games_game_id ON games (game_id)',
+    'CREATE INDEX IF NOT EXISTS games_start_time ON games (start_time)',
+    'CREATE INDEX IF NOT EXISTS games_result ON games (result)',
+]
+
+_COLUMNS = ('game_id', 'black', 'white', 'start_time', 'event', 'opening', 'result', 'reason', 'plies', 'source',
+            'record')
+_INSERT = 'INSERT INTO games ({}) VALUES ({})'.format(', '.join(_COLUMNS), ', '.join('?' * len(_COLUMNS)))
+
+# columns printed by query results
+SUMMARY_COLUMNS = ('id', 'game_id', 'black', 'white', 'start_time', 'result', 'reason', 'plies', 'opening')
+
+
+def event_of(game_id):
+    """@return the game name of a shogi-server Game_ID, '<event>+<black>+<white>+<time>', or the Game_ID itself"""
+    parts = game_id.split('+') if game_id else []
+    return '+'.join(parts[:-3]) if len(parts) >= 4 else game_id
+
+
+def row_of(info, init_state, history, source=None, game_id=None, result=None):
+    """
+    @param game_id Game_ID; records from the server keep it in $EVENT, which is taken by default
+    @param result BLACK_WIN, WHITE_WIN or DRAW if known, e.g. from the server; otherwise decided by the special moves
+    @return tuple of the column values of the game in the order of _COLUMNS
+    """
+    plies = sum(1 for mv in history if not mv.is_special)
+    specials = [mv.move_str for mv in history if mv.is_special]
+    if result is None and specials:
+        result = winner_of(history, init_state.to_move if plies % 2 == 0 else FLIP_TURN[init_state.to_move])
+        if result is None and specials[-1] in _DRAW_SPECIALS:
+            result = DRAW
+    game_id = info.get('Event') if game_id is None else game_id
+    record = '\n'.join(Record.write(info, init_state, history))
+    return (game_id, info.get('Name+'), info.get('Name-'), info.get('Start_Time'), event_of(info.get('Event')),
+            info.get('Opening'), result, specials[-1] if specials else None, plies, source, record)
+
+
+class GameStore:
+    """
+    @param path database file, or ':memory:'
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            for sql in _SCHEMA:
+                self.conn.execute(sql)
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def add_game(self, game, source=None, result=None):
+        """
+        Ingest a finished Game.
+        @param result '#WIN', '#LOSE' or '#DRAW' from the server, seen from the turn of the game
+        @return row id
+        """
+        s = game.condition['Game_Summary']
+        info = {'Name+': s['Name+'], 'Name-': s['Name-'], 'Event': game.id,
+                'Start_Time': s.get('Start_Time') or game.start_time}
+        winner = {'#WIN': game.my_turn, '#LOSE': FLIP_TURN[game.my_turn], '#DRAW': DRAW}.get(result)
+        row = row_of(info, game.init_state, game.history, source, game.id, winner)
+        with self.conn:
+            return self.conn.execute(_INSERT, row).lastrowid
+
+    def add_records(self, records, source=None, batch_size=DEFAULT_BATCH_SIZE):
+        """
+        Ingest games in batched transactions.
+        @param records iterator of tuple (game_information, initial_state, history) as Record.iter_read
+        @return number of games
+        """
+        count = 0
+        batch = []
+        for info, init_state, history in records:
+            batch.append(row_of(info, init_state, history, source))
+            if len(batch) == batch_size:
+                count += self.__insert(batch)
+                batch = []
+        return count + self.__insert(batch)
+
+    def add_files(self, paths, batch_size=DEFAULT_BATCH_SIZE, workers=DEFAULT_WORKERS):
+        """
+        Stream record files (.csa, .csa.gz, .csa.xz) and directories of them through Record.iter_read
+        and ingest them. @return number of games
+        """
+        count = 0
+        for path, lines in iter_files(paths, workers):
+            count += self.add_records(Record.iter_read(iter_text(lines)), path, batch_size)
+        return count
+
+    def __insert(self, rows):
+        if rows:
+            with self.conn:
+                self.conn.executemany(_INSERT, rows)
+        return len(rows)
+
+    def query(self, player=None, black=None, white=None, game_id=None, result=None, opening=None, since=None,
+              until=None, min_plies=None, max_plies=None, limit=None):
+        """
+        Find games. Dates are compared as the CSA format, e.g. '2016/01/31'.
+        @param player name of either side
+        @param result BLACK_WIN, WHITE_WIN or DRAW
+        @return list of tuple in the order of SUMMARY_COLUMNS, newest first
+        """
+        where, params = [], []
+
+        def cond(sql, *values):
+            where.append(sql)
+            params.extend(values)
+
+        if player is not None:
+            cond('(black = ? OR white = ?)', player, player)
+        for column, value in (('black', black), ('white', white), ('game_id', game_id), ('result', result),
+                              ('opening', opening)):
+            if value is not None:
+                cond('{} = ?'.format(column), value)
+        if since is not None:
+            cond('start_time >= ?', since)
+        if until is not None:
+            cond('start_time < ?', until)
+        if min_plies is not None:
+            cond('plies >= ?', min_plies)
+        if max_plies is not None:
+            cond('plies <= ?', max_plies)
+
+        sql = 'SELECT {} FROM games{} ORDER BY start_time DESC, id DESC{}'.format(
+            ', '.join(SUMMARY_COLUMNS), ' WHERE ' + ' AND '.join(where) if where else '',
+            '' if limit is None else ' LIMIT {:d}'.format(limit))
+        return self.conn.execute(sql, params).fetchall()
+
+    def record(self, row_id):
+        """@return tuple (game_information, initial_state, history) of the stored game, or None"""
+        row = self.conn.execute('SELECT record FROM games WHERE id = ?', (row_id,)).fetchone()
+        return Record.read(row[0].splitlines())[0] if row else None
+
+    def count(self):
+        return self.conn.execute('SELECT COUNT(*) FROM games').fetchone()[0]
+
+
+if __name__ == '__main__':
+    pass
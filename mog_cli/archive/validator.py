@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Check game archives against the rules
+
+The main process only splits the CSA files into games at the '/' lines; chunks of games are
+parsed and replayed through Game.move(check=True) in a process pool. The first illegal ply of
+each game is reported, where ply 0 is the initial position (piece counts, nifu, ...).
+"""
+
+import os
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+from core import *
+from core.game import Game, IllegalMoveError
+from core.movegen import check_position
+from core.record import Record
+from archive.reader import iter_files
+
+DEFAULT_CHUNK_GAMES = 64
+
+
+class Violation(namedtuple('Violation', 'path index offset ply reason')):
+    """First illegal ply of a game; index is the number of the game in the file, offset its byte offset."""
+
+    def __str__(self):
+        return '{}#{} (offset {}): ply {}: {}'.format(self.path, self.index, self.offset, self.ply, self.reason)
+
+
+class ValidationStats(namedtuple('ValidationStats', 'games plies violations elapsed')):
+    @property
+    def games_per_second(self):
+        return self.games / self.elapsed if self.elapsed else float('inf')
+
+    def __str__(self):
+        return '{} games, {} plies, {} illegal games in {:.2f}s: {:.0f} games/sec, {:.0f} plies/sec'.format(
+            self.games, self.plies, len(self.violations), self.elapsed, self.games_per_second,
+            self.plies / self.elapsed if self.elapsed else float('inf'))
+
+
+def validate_game(init_state, history):
+    """
+    Replay the game with every rule checked.
+    @return tuple of (number of normal moves played, (ply, reason) of the first illegal ply or None)
+    """
+    reason = check_position(init_state)
+    if reason:
+        return 0, (0, reason)
+
+    game = Game.from_record({}, init_state)
+    plies = 0
+    for mv in history:
+        try:
+            game.move(mv, check=True)
+        except IllegalMoveError as e:
+            return plies, (plies + 1, str(e))
+        if not mv.is_special:
+            plies += 1
+    return plies, None
+
+
+def split_games(raw_lines):
+    """
+    Split a record file into games without parsing them.
+    @param raw_lines iterator of lines as bytes, e.g. from archive.reader.iter_files
+    @return iterator of tuple (byte offset of the game, list of lines)
+    """
+    offset, pos, lines = 0, 0, []
+    for raw in raw_lines:
+        pos += len(raw)
+        line = raw.decode('utf-8', 'replace')
+        if line.rstrip('\r\n') == '/':
+            yield offset, lines
+            offset, lines = pos, []
+        else:
+            lines.append(line)
+    if any(x.strip() for x in lines):
+        yield offset, lines
+
+
+def validate_chunk(path, games):
+    """
+    @param games list of tuple (index, offset, lines)
+    @return tuple of (number of games, number of plies, list of Violation)
+    """
+    plies = 0
+    violations = []
+    for index, offset, lines in games:
+        try:
+            _, init_state, history = Record.read(lines)[0]
+            n, error = validate_game(init_state, history)
+        except (AssertionError, KeyError, ValueError, IndexError) as e:
+            n, error = 0, (0, 'broken record: {!r}'.format(e))
+        plies += n
+        if error:
+            violations.append(Violation(path, index, offset, *error))
+    return len(games), plies, violations
+
+
+def _chunks(paths, chunk_games):
+    for path, raw_lines in iter_files(paths):
+        buf = []
+        for index, (offset, lines) in enumerate(split_games(raw_lines)):
+            buf.append((index, offset, lines))
+            if len(buf) == chunk_games:
+                yield path, buf
+                buf = []
+        if buf:
+            yield path, buf
+
+
+def validate_files(paths, jobs=None, chunk_games=DEFAULT_CHUNK_GAMES, on_violation=None):
+    """
+    @param jobs number of worker processes (default: number of CPUs), 1 to run in this process
+    @param on_violation function called with each Violation, in the order of the files
+    @return ValidationStats
+    """
+    start = time.time()
+    games, plies, violations = 0, 0, []
+
+    def collect(result):
+        nonlocal games, plies
+        games += result[0]
+        plies += result[1]
+        for v in result[2]:
+            violations.append(v)
+            if on_violation:
+                on_violation(v)
+
+    jobs = jobs or os.cpu_count() or 1
+    if jobs == 1:
+        for path, chunk in _chunks(paths, chunk_games):
+            collect(validate_chunk(path, chunk))
+    else:
+        with ProcessPoolExecutor(jobs) as executor:
+            # keep a bounded number of chunks in flight so that large archives are not read at once
+            window = 4 * jobs
+            pending = deque()
+            for path, chunk in _chunks(paths, chunk_games):
+                pending.append(executor.submit(validate_chunk, path, chunk))
+                if len(pending) >= window:
+                    collect(pending.popleft().result())
+            while pending:
+                collect(pending.popleft().result())
+
+    return ValidationStats(games, plies, violations, time.time() - start)
+
+
+if __name__ == '__main__':
+    pass
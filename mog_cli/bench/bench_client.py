@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of CsaClient over a replayed session
+
+Builds a wire log of random games on one login, serves it with network.replay at the given
+speed, and drives CsaClient through the games. Reports the lines per second through the client
+and the milliseconds per move.
+
+usage: python bench/bench_client.py [-n GAMES] [--moves N] [--speed N|max]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+from core import *
+from engine.player import RandomPlayer
+from engine.standalone import SelfPlay
+from network.capture import RECEIVED, SENT, WireEvent
+from network.csa_client import CsaClient, GAME_TO_MOVE
+from network.replay import ReplayServer
+
+SUMMARY = [
+    'BEGIN Game_Summary', 'Protocol_Version:1.1', 'Game_ID:{}', 'Name+:bench', 'Name-:peer', 'Your_Turn:+',
+    'To_Move:+', 'BEGIN Time', 'Time_Unit:1sec', 'Total_Time:600', 'Byoyomi:10', 'END Time',
+    'BEGIN Position', 'PI', '+', 'END Position', 'END Game_Summary',
+]
+
+
+def session(games, max_moves, distinct=10):
+    """@return tuple of (list of WireEvent, list of histories); the client plays BLACK in every game"""
+    played = []
+    SelfPlay(RandomPlayer(0), RandomPlayer(1), max_moves=max_moves).run(min(games, distinct),
+                                                                         lambda i, game: played.append(game))
+    lines = [(SENT, 'LOGIN bench pass'), (RECEIVED, 'LOGIN:bench OK')]
+    histories = []
+    for i in range(games):
+        history = [mv.move_str for mv in played[i % len(played)].history if not mv.is_special]
+        histories.append(history)
+        lines += [(RECEIVED, x.format('g{}'.format(i))) for x in SUMMARY]
+        lines += [(SENT, 'AGREE g{}'.format(i)), (RECEIVED, 'START:g{}'.format(i))]
+        for m in history:
+            if m[0] == BLACK:
+                lines += [(SENT, m), (RECEIVED, '{},T1'.format(m))]
+            else:
+                lines.append((RECEIVED, '{},T1'.format(m)))
+        if len(history) % 2:
+            lines += [(RECEIVED, '%TORYO,T1'), (RECEIVED, '#RESIGN'), (RECEIVED, '#WIN')]
+        else:
+            lines += [(SENT, '%TORYO'), (RECEIVED, '%TORYO,T1'), (RECEIVED, '#RESIGN'), (RECEIVED, '#LOSE')]
+    # one millisecond per line, for the replays which are not at the maximum speed
+    return [WireEvent(i / 1000, d, x) for i, (d, x) in enumerate(lines)], histories
+
+
+def drive(port, histories):
+    """Play the games of the session; @return seconds per move"""
+    per_move = []
+    with CsaClient('127.0.0.1', port) as c:
+        c.login('bench', 'pass')
+        for history in histories:
+            cond = c.get_game_condition()[0]
+            c.agree(cond)
+            c.get_agreement(cond)
+            for m in history:
+                start = time.perf_counter()
+                if c.state == GAME_TO_MOVE:
+                    c.move(m)
+                else:
+                    c.get_move()
+                per_move.append(time.perf_counter() - start)
+            if c.state == GAME_TO_MOVE:
+                c.resign()
+            else:
+                c.get_move()
+    return per_move
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CsaClient benchmark over a replayed session')
+    parser.add_argument('-n', dest='games', type=int, default=50, help='number of games (default: 50)')
+    parser.add_argument('--moves', type=int, default=120, help='maximum number of moves of a game (default: 120)')
+    parser.add_argument('--speed', default='max', help='speed of the replay, e.g. 1, 10 or max (default: max)')
+    args = parser.parse_args()
+
+    events, histories = session(args.games, args.moves)
+    server = ReplayServer(events, None if args.speed == 'max' else float(args.speed))
+    server.start()
+    start = time.perf_counter()
+    per_move = sorted(drive(server.port, histories))
+    elapsed = time.perf_counter() - start
+    server.close()
+
+    print('{} games, {} lines, {} moves in {:.2f}s: {:.0f} lines/sec'.format(
+        len(histories), len(events), len(per_move), elapsed, len(events) / elapsed))
+    print('ms per move: median {:.3f}, 99th percentile {:.3f}, max {:.3f}'.format(
+        1000 * per_move[len(per_move) // 2], 1000 * per_move[len(per_move) * 99 // 100], 1000 * per_move[-1]))
+    if server.mismatches:
+        print('{} mismatches, e.g. {}'.format(len(server.mismatches), server.mismatches[0]))
+
+
+if __name__ == '__main__':
+    main()
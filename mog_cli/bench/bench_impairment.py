@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of CsaClient over impaired links
+
+Serves the session of bench_client.py with network.replay as the server, puts network.proxy
+in front of it with each profile, and drives CsaClient through the games. Reports the round trip
+of the moves sent (from move() to its confirmation) and whether the games were played correctly.
+
+usage: python bench/bench_impairment.py [-n GAMES] [--moves N] [--profile NAME ...] [--seed N]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+from bench_client import session
+from network.csa_client import CsaClient, GAME_TO_MOVE
+from network.proxy import PROFILES, ImpairmentProxy
+from network.replay import ReplayServer
+
+
+def drive(port, histories):
+    """Play the games of the session; @return tuple of (seconds of each move sent, number of errors)"""
+    round_trips, errors = [], 0
+    with CsaClient('127.0.0.1', port) as c:
+        c.login('bench', 'pass')
+        for history in histories:
+            cond = c.get_game_condition()[0]
+            c.agree(cond)
+            c.get_agreement(cond)
+            for m in history:
+                if c.state == GAME_TO_MOVE:
+                    start = time.perf_counter()
+                    ret = c.move(m)
+                    round_trips.append(time.perf_counter() - start)
+                else:
+                    ret = c.get_move()
+                errors += ret[0] != m
+            ret = c.resign() if c.state == GAME_TO_MOVE else c.get_move()
+            errors += ret[2] != '#RESIGN'
+    return round_trips, errors
+
+
+def percentile(xs, p):
+    return xs[min(len(xs) - 1, len(xs) * p // 100)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='CsaClient benchmark over impaired links')
+    parser.add_argument('-n', dest='games', type=int, default=2, help='number of games (default: 2)')
+    parser.add_argument('--moves', type=int, default=60, help='maximum number of moves of a game (default: 60)')
+    parser.add_argument('--profile', nargs='+', default=['none', 'lan', 'broadband', 'mobile', 'congested'],
+                        choices=sorted(PROFILES), help='profiles to run (default: all)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed of the proxy (default: 0)')
+    args = parser.parse_args()
+
+    events, histories = session(args.games, args.moves)
+    print('{} games, {} lines'.format(len(histories), len(events)))
+    print('{:10s} {:>8s} {:>8s} {:>8s} {:>8s} {:>8s} {:>9s} {:>7s}'.format(
+        'profile', 'min', 'median', '90%', '99%', 'max', 'segments', 'errors'))
+    for name in args.profile:
+        server = ReplayServer(events, None)
+        server.start()
+        proxy = ImpairmentProxy('127.0.0.1', server.port, name, seed=args.seed)
+        proxy.start()
+        try:
+            round_trips, errors = drive(proxy.port, histories)
+        finally:
+            server.finished.wait(5)
+            proxy.close()
+            server.close()
+        xs = sorted(round_trips)
+        ms = [1000 * x for x in (xs[0], percentile(xs, 50), percentile(xs, 90), percentile(xs, 99), xs[-1])]
+        print('{:10s} {:8.2f} {:8.2f} {:8.2f} {:8.2f} {:8.2f} {:9d} {:7d}'.format(
+            name, *ms, sum(link.segments for link in proxy.links), errors + len(server.mismatches)))
+    print('round trip of the moves sent in ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of the classification of server lines
+
+Classifies a mix of lines as a game brings them (move confirmations mostly, then the special
+moves and the game end) with network.csa_client.classify, and with the regular expressions
+which CsaClient used before for reference; every other move line is taken as the confirmation
+of a move sent, for which the former client compiled a pattern. Reports lines per second of each.
+
+usage: python bench/bench_protocol.py [-n LINES] [--repeat N]
+"""
+
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+from network.csa_client import classify
+
+MIX = ['+7776FU,T12', '-3334FU,T3', '+8822UM,T0', '-0055KA,T41', '+2726FU', 'START:g1',
+       '%TORYO,T3', '%KACHI', '#RESIGN', '#WIN', '#TIME_UP', '#LOSE']
+WEIGHTS = [40, 40, 5, 5, 1, 1, 1, 1, 1, 1, 1, 1]
+
+PAT_MOVE_CONFIRM = re.compile(r'^([/+-]\d{2}[1-9]{2}[A-Z]{2}),T(\d+)$')
+PAT_SPECIAL_CONFIRM = re.compile(r'^(%[A-Z]+)(?:,T(\d+))?$')
+GAME_END = [('#SENNICHITE', '#DRAW'), ('#OUTE_SENNICHITE', '#LOSE'), ('#ILLEGAL_MOVE', '#WIN'),
+            ('#TIME_UP', '#WIN'), ('#RESIGN', '#WIN'), ('#JISHOGI', '#LOSE')]
+
+
+def legacy(item):
+    """Work of the former CsaClient on a line; own is True for the confirmation of the move it sent."""
+    line, own = item
+    if own:
+        # move() compiled the confirmation of each move
+        m = re.compile(r'^{},T(\d+)$'.format(line[:7].replace('+', r'\+'))).match(line)
+        return line[:7], int(m.group(1)) if m else None
+    if PAT_MOVE_CONFIRM.match(line):
+        command, t = PAT_MOVE_CONFIRM.match(line).groups()
+        return command, int(t)
+    if PAT_SPECIAL_CONFIRM.match(line):
+        command, t = PAT_SPECIAL_CONFIRM.match(line).groups()
+        return command, None if t is None else int(t)
+    return (line, '#WIN') in GAME_END
+
+
+def lines(n):
+    base = [x for x, w in zip(MIX, WEIGHTS) for _ in range(w)]
+    return (base * (n // len(base) + 1))[:n]
+
+
+def measure(f, xs, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for x in xs:
+            f(x)
+        best = min(best, time.perf_counter() - start)
+    return len(xs) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description='benchmark of the classification of server lines')
+    parser.add_argument('-n', dest='lines', type=int, default=100000, help='number of lines (default: 100000)')
+    parser.add_argument('--repeat', type=int, default=5, help='number of runs, the best is taken (default: 5)')
+    args = parser.parse_args()
+
+    xs = lines(args.lines)
+    items = [(x, i % 2 == 0) for i, x in enumerate(xs)]
+    for name, f, inputs in [('classify', classify, xs), ('regex chain', legacy, items)]:
+        print('{:12s}: {:.0f} lines/sec'.format(name, measure(f, inputs, args.repeat)))
+
+
+if __name__ == '__main__':
+    main()
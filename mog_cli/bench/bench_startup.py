@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of startup time
+
+Runs mog_cli.py as short-lived processes and reports wall-clock time per invocation,
+plus the import time of the shell module measured by 'python -X importtime'.
+
+usage: python bench/bench_startup.py [-n RUNS]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+
+BASE_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+MAIN = os.path.join(BASE_DIR, 'mog_cli.py')
+
+SCENARIOS = [
+    ('python (no-op)', [sys.executable, '-c', 'pass'], None),
+    ('mog_cli --help', [sys.executable, MAIN, '--help'], None),
+    ('mog_cli --batch (exit)', [sys.executable, MAIN, '--batch'], 'exit\n'),
+    ('mog_cli --batch (help)', [sys.executable, MAIN, '--batch'], 'help\n'),
+]
+
+
+def measure(cmd, stdin, runs):
+    ret = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(cmd, input=stdin, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                       universal_newlines=True, cwd=BASE_DIR, check=True)
+        ret.append(time.perf_counter() - start)
+    return ret
+
+
+def import_time(module):
+    """@return cumulative import time of the module in microseconds"""
+    res = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import {}'.format(module)],
+                         stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, universal_newlines=True, cwd=BASE_DIR,
+                         check=True)
+    for line in res.stderr.splitlines():
+        fields = [x.strip() for x in line.split('|')]
+        if len(fields) == 3 and fields[2] == module:
+            return int(fields[1])
+    return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='startup benchmark of mog_cli')
+    parser.add_argument('-n', dest='runs', type=int, default=20, help='number of runs per scenario')
+    args = parser.parse_args()
+
+    print('{:28s} {:>10s} {:>10s}'.format('scenario', 'mean(ms)', 'min(ms)'))
+    for name, cmd, stdin in SCENARIOS:
+        xs = measure(cmd, stdin, args.runs)
+        print('{:28s} {:10.1f} {:10.1f}'.format(name, 1000 * sum(xs) / len(xs), 1000 * min(xs)))
+
+    for module in ['shell', 'command', 'network.csa_client']:
+        print('import {:21s} {:10.1f}'.format(module, import_time(module) / 1000.0))
+
+
+if __name__ == '__main__':
+    main()
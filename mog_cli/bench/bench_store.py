@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark of game store ingestion
+
+Generates random games (or reads the given CSA files), ingests them into a fresh
+SQLite file, and reports games per second for ingestion and milliseconds per query.
+
+usage: python bench/bench_store.py [-n GAMES] [<path> ...]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')))
+
+from core.record import Record
+from engine.player import RandomPlayer
+from engine.standalone import SelfPlay
+from archive.store import GameStore
+
+
+def random_records(games, max_moves, distinct=20):
+    """Play a few random games and repeat them under other names and dates."""
+    played = []
+    SelfPlay(RandomPlayer(0), RandomPlayer(1), max_moves=max_moves).run(min(games, distinct),
+                                                                         lambda i, game: played.append(game))
+    players = ['player{}'.format(i) for i in range(20)]
+    ret = []
+    for i in range(games):
+        game = played[i % len(played)]
+        info = {'Name+': players[i % 20], 'Name-': players[(i * 7 + 1) % 20], 'Event': 'game-{}'.format(i),
+                'Start_Time': '2016/01/{:02d} 10:00:00'.format(i % 28 + 1)}
+        ret.append((info, game.init_state, game.history))
+    return ret
+
+
+def main():
+    parser = argparse.ArgumentParser(description='ingestion benchmark of the game store')
+    parser.add_argument('-n', dest='games', type=int, default=2000, help='number of random games')
+    parser.add_argument('--moves', type=int, default=120, help='maximum number of moves of random games')
+    parser.add_argument('paths', nargs='*', help='CSA files to ingest instead of random games')
+    args = parser.parse_args()
+
+    if args.paths:
+        records = [r for path in args.paths for r in Record.read(open(path))]
+    else:
+        records = random_records(args.games, args.moves)
+
+    with tempfile.TemporaryDirectory() as d:
+        with GameStore(os.path.join(d, 'games.db')) as store:
+            start = time.perf_counter()
+            n = store.add_records(iter(records))
+            elapsed = time.perf_counter() - start
+            print('ingested {} games in {:.2f}s: {:.0f} games/sec'.format(n, elapsed, n / elapsed))
+
+            for name, kwargs in [('player', {'player': 'player3'}), ('result', {'result': '+', 'limit': 100}),
+                                 ('date', {'since': '2016/01/10', 'until': '2016/01/11'})]:
+                start = time.perf_counter()
+                rows = store.query(**kwargs)
+                print('query by {:8s} {:5d} rows in {:.2f}ms'.format(name, len(rows),
+                                                                    1000 * (time.perf_counter() - start)))
+
+
+if __name__ == '__main__':
+    main()
@@ -1,11 +1,82 @@
+"""
+Shell commands
+
+Command modules are imported on first use, so that the shell starts without loading
+the network client or the engines. Aliases are registered here and must match alias()
+of each command class.
+"""
+
+import importlib
+
 from command.base_command import Command
-from command.exit_command import ExitCommand
-from command.help_command import HelpCommand
-from command.login_command import LoginCommand
-from command.history_command import HistoryCommand
-from command.move_command import MoveCommand
-from command.resign_command import ResignCommand
-from command.win_command import WinCommand
-from command.info_command import InfoCommand
-
-# TODO: communicate with mogami engine
+
+# {class name: (module name, aliases)}
+COMMANDS = {
+    'ExitCommand': ('command.exit_command', ['EXIT', 'QUIT', 'Q']),
+    'HelpCommand': ('command.help_command', ['HELP', '?', 'H']),
+    'LoginCommand': ('command.login_command', ['LOGIN']),
+    'HistoryCommand': ('command.history_command', ['HISTORY']),
+    'MoveCommand': ('command.move_command', ['MOVE', 'M']),
+    'ResignCommand': ('command.resign_command', ['RESIGN']),
+    'WinCommand': ('command.win_command', ['WIN']),
+    'InfoCommand': ('command.info_command', ['INFO', 'I']),
+    'TsumeCommand': ('command.tsume_command', ['TSUME', 'MATE']),
+    'ExportCommand': ('command.export_command', ['EXPORT']),
+    'EvalCommand': ('command.eval_command', ['EVAL']),
+    'EngineCommand': ('command.engine_command', ['ENGINE']),
+    'GoCommand': ('command.go_command', ['GO']),
+    'NewCommand': ('command.new_command', ['NEW']),
+    'LoadCommand': ('command.load_command', ['LOAD']),
+    'SelfPlayCommand': ('command.selfplay_command', ['SELFPLAY']),
+    'BoardCommand': ('command.board_command', ['BOARD', 'B']),
+    'ReplayCommand': ('command.replay_command', ['REPLAY', 'R']),
+    'MonitorCommand': ('command.monitor_command', ['MONITOR', 'MON']),
+    'TournamentCommand': ('command.tournament_command', ['TOURNAMENT']),
+    'RecoverCommand': ('command.recover_command', ['RECOVER']),
+    'IngestCommand': ('command.ingest_command', ['INGEST']),
+    'GamesCommand': ('command.games_command', ['GAMES']),
+    'PositionCommand': ('command.position_command', ['POSITION', 'POS']),
+    'ValidateCommand': ('command.validate_command', ['VALIDATE']),
+    'ConvertCommand': ('command.convert_command', ['CONVERT']),
+}
+
+
+def __getattr__(name):
+    """Import command classes lazily, e.g. command.MoveCommand or 'from command import MoveCommand'."""
+    if name not in COMMANDS:
+        raise AttributeError('module {} has no attribute {}'.format(__name__, name))
+    cls = getattr(importlib.import_module(COMMANDS[name][0]), name)
+    globals()[name] = cls
+    return cls
+
+
+class LazyCommand(Command):
+    """Proxy of the command which imports the command module when it is run for the first time."""
+
+    def __init__(self, class_name):
+        super().__init__()
+        self.class_name = class_name
+        self.instance = None
+
+    def resolve(self):
+        if self.instance is None:
+            self.instance = __getattr__(self.class_name)()
+        return self.instance
+
+    @property
+    def __doc__(self):
+        return self.resolve().__doc__
+
+    def alias(self):
+        return COMMANDS[self.class_name][1]
+
+    def help(self):
+        return self.resolve().help()
+
+    def run(self, *args):
+        return self.resolve().run(*args)
+
+
+def lazy(*class_names):
+    """@return list of LazyCommand"""
+    return [LazyCommand(name) for name in class_names]
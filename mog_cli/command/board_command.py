@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to print the current position."""
+
+from command.base_command import Command
+import shell
+
+
+class BoardCommand(Command):
+    """Print the current position"""
+
+    def alias(self):
+        return ['BOARD', 'B']
+
+    def help(self):
+        return '\n'.join([
+            'BOARD [CSA]',
+            '',
+            'Print the current position in the compact view, or in CSA format.',
+        ])
+
+    def run(self, *args):
+        if len(args) > 1 or (args and args[0].upper() != 'CSA'):
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+
+        def f(sh):
+            if not sh.game:
+                return 'no game'
+            return str(sh.game.state) if args else sh.game.state.compact_str()
+
+        return lambda sh: sh.output.write(f(sh) + '\n')
@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to convert record collections."""
+
+from command.base_command import Command
+import shell
+
+
+class ConvertCommand(Command):
+    """Convert KIF, KI2 and CSA files into CSA or the binary form"""
+
+    def alias(self):
+        return ['CONVERT']
+
+    def help(self):
+        return '\n'.join([
+            'CONVERT [format=csa|bin] [jobs=<n>] <output> <path> [<path> ...]',
+            '',
+            'Read every game in the record files and write them into one file in CSA (default) or in the',
+            'compact binary form, in the order of the input, with <n> processes (default: number of CPUs).',
+            'Each <path> may be a .csa, .kif, .kifu, .ki2 or .ki2u file, optionally compressed (.gz, .xz),',
+            'or a directory of them. KIF and KI2 files are read in Shift_JIS, .kifu and .ki2u in UTF-8.',
+            'Games which cannot be read are reported and skipped.',
+        ])
+
+    def run(self, *args):
+        options = {'format': 'csa', 'jobs': None}
+        paths = []
+        for arg in args:
+            key, sep, value = arg.partition('=')
+            if sep and key in options and value:
+                options[key] = value
+            else:
+                paths.append(arg)
+        jobs = options['jobs']
+        if len(paths) < 2 or options['format'] not in ('csa', 'bin') or \
+                (jobs is not None and not (jobs.isdigit() and int(jobs) > 0)):
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+
+        def f(sh):
+            from archive.convert import convert_files
+
+            stats = convert_files(paths[1:], paths[0], options['format'], int(jobs) if jobs else None,
+                                  on_error=lambda e: sh.output.write('{}\n'.format(e)))
+            sh.output.write('{}\n'.format(stats))
+
+        return f
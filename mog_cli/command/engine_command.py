@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to start or stop the external engine."""
+
+from command.base_command import Command
+import shell
+
+
+class EngineCommand(Command):
+    """Start or stop USI engine"""
+
+    def alias(self):
+        return ['ENGINE']
+
+    def help(self):
+        return '\n'.join([
+            'ENGINE <command line>',
+            'ENGINE BUILTIN [random|greedy]',
+            'ENGINE STOP',
+            'ENGINE',
+            '',
+            'Start the USI engine as a background process, use a built-in player (default: greedy),',
+            'stop it, or print the current engine.',
+            'The engine keeps running between moves and ponders while waiting for the opponent.',
+        ])
+
+    def run(self, *args):
+        def f(sh):
+            from engine.usi import UsiEngine, UsiPlayer
+
+            if not args:
+                sh.output.write('{}\n'.format(sh.engine or 'no engine'))
+                return
+
+            if sh.engine:
+                sh.engine.close()
+                sh.engine = None
+
+            if len(args) == 1 and args[0].upper() == 'STOP':
+                sh.sys_message('engine stopped')
+                return
+
+            if args[0].upper() == 'BUILTIN':
+                from engine.player import BUILTIN_PLAYERS
+
+                name = args[1].lower() if len(args) > 1 else 'greedy'
+                if name not in BUILTIN_PLAYERS or len(args) > 2:
+                    raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+                sh.engine = BUILTIN_PLAYERS[name]()
+                sh.sys_message('engine started: {}'.format(sh.engine))
+                return
+
+            sh.engine = UsiPlayer(UsiEngine(list(args)))
+            sh.sys_message('engine started: {}'.format(sh.engine))
+
+        return f
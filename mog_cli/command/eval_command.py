@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to evaluate positions statically."""
+
+import time
+from command.base_command import Command
+import shell
+
+
+class EvalCommand(Command):
+    """Evaluate positions"""
+
+    def alias(self):
+        return ['EVAL']
+
+    def help(self):
+        return '\n'.join([
+            'EVAL [<path> ...]',
+            '',
+            'Print the static evaluation of the current position from the side to move,',
+            'or evaluate every position in the CSA files at once and report the throughput.',
+            'Each <path> may be a .csa, .csa.gz or .csa.xz file, or a directory of them.',
+        ])
+
+    def run(self, *paths):
+        def f(sh):
+            # numpy is only needed by this command
+            from engine import evaluation
+
+            if not paths:
+                if not sh.game:
+                    raise shell.CommandFailedError('no game')
+                sh.output.write('{}\n'.format(evaluation.evaluate(sh.game.state)))
+                return
+
+            from archive.reader import iter_records
+
+            codes, hands, side = evaluation.encode_records(r for _, r in iter_records(paths))
+            start = time.time()
+            scores = evaluation.evaluate_batch(codes, hands, side)
+            elapsed = time.time() - start
+            sh.output.write('evaluated {} positions in {:.3f}s ({:.0f} positions/sec), mean score {:.1f}\n'.format(
+                len(scores), elapsed, len(scores) / elapsed if elapsed else float('inf'),
+                float(scores.mean()) if len(scores) else 0.0))
+
+        return f
@@ -12,6 +12,11 @@ class ExitCommand(Command):
     def alias(self):
         return ['EXIT', 'QUIT', 'Q']
 
-    def run(self, *args):
-        # ignore args
-        raise shell.ShellExit
+    def help(self):
+        return 'EXIT [<status>]\n\nExit the shell with the status code (default: 0 or the status of the last failure).'
+
+    def run(self, status=None, *args):
+        # ignore the rest of args
+        if status is not None and not status.isdigit():
+            raise shell.CommandArgumentsError('Invalid status: {}'.format(status))
+        raise shell.ShellExit(None if status is None else int(status))
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to export positions of game records as feature planes."""
+
+from command.base_command import Command
+import shell
+
+
+class ExportCommand(Command):
+    """Export positions for machine learning"""
+
+    def alias(self):
+        return ['EXPORT']
+
+    def help(self):
+        return '\n'.join([
+            'EXPORT <output_prefix> <path> [<path> ...]',
+            '',
+            'Replay every game in the CSA files and write feature planes, hand counts,',
+            'side to move, move targets and results to chunked .npy files.',
+            'Each <path> may be a .csa, .csa.gz or .csa.xz file, or a directory of them.',
+        ])
+
+    def run(self, *args):
+        if len(args) < 2:
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+        prefix, paths = args[0], args[1:]
+
+        def f(sh):
+            # numpy is only needed by this command
+            from archive.features import export_files
+
+            games, positions, files = export_files(paths, prefix)
+            sh.output.write('exported {} positions from {} games into {} files\n'.format(positions, games, len(files)))
+
+        return f
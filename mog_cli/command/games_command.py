@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to query the game store."""
+
+from command.base_command import Command
+from core.game import Game
+import shell
+
+
+class GamesCommand(Command):
+    """Find games in the game store"""
+
+    # {option: (keyword argument of GameStore.query, converter)}
+    OPTIONS = {
+        'player': ('player', str),
+        'black': ('black', str),
+        'white': ('white', str),
+        'id': ('game_id', str),
+        'result': ('result', str),
+        'opening': ('opening', str),
+        'since': ('since', str),
+        'until': ('until', str),
+        'min': ('min_plies', int),
+        'max': ('max_plies', int),
+        'limit': ('limit', int),
+    }
+
+    def alias(self):
+        return ['GAMES']
+
+    def help(self):
+        return '\n'.join([
+            'GAMES [<option>=<value> ...]',
+            'GAMES LOAD <row id>',
+            '',
+            'Print the games in the game store (see --store and INGEST) which match all the options,',
+            'newest first, or open a stored game in standalone mode.',
+            'options: player, black, white, id (Game_ID), result (+, - or draw), opening,',
+            '         since, until (e.g. 2016/01/31), min, max (number of moves), limit (default: 20)',
+        ])
+
+    def parse_options(self, args):
+        ret = {'limit': 20}
+        for arg in args:
+            key, _, value = arg.partition('=')
+            if key not in self.OPTIONS or not value:
+                raise shell.CommandArgumentsError('invalid option: {}'.format(arg))
+            name, conv = self.OPTIONS[key]
+            try:
+                ret[name] = conv(value)
+            except ValueError:
+                raise shell.CommandArgumentsError('invalid option: {}'.format(arg))
+        return ret
+
+    def run(self, *args):
+        if args and args[0].upper() == 'LOAD':
+            if len(args) != 2 or not args[1].isdigit():
+                raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+            return lambda sh: self.load(sh, int(args[1]))
+
+        options = self.parse_options(args)
+
+        def f(sh):
+            from archive.store import SUMMARY_COLUMNS
+
+            rows = sh.game_store().query(**options)
+            for row in rows:
+                sh.output.write('{}\n'.format(' '.join('{}={}'.format(k, v) for k, v in zip(SUMMARY_COLUMNS, row))))
+            sh.output.write('{} games\n'.format(len(rows)))
+
+        return f
+
+    @staticmethod
+    def load(sh, row_id):
+        record = sh.game_store().record(row_id)
+        if record is None:
+            raise shell.CommandFailedError('no such game: {}'.format(row_id))
+        sh.game = Game.from_record(*record)
+        sh.set_mode(shell.MODE_STANDALONE)
+        sh.sys_message('loaded {} moves of {}'.format(len(sh.game.history), sh.game.id))
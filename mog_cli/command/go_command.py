@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to let the engine play."""
+
+from command.base_command import Command
+from command import MoveCommand
+from core import Move
+import shell
+
+
+class GoCommand(Command):
+    """Let the engine think and play the move"""
+
+    def alias(self):
+        return ['GO']
+
+    def help(self):
+        return '\n'.join([
+            'GO [AUTO]',
+            '',
+            'Play the best move of the engine and wait for the opponent.',
+            'With AUTO, keep playing until the game ends.',
+            'A declaration of win (%KACHI) which the impasse rule does not allow is not sent; the engine is asked',
+            'again without declarations, and if it still declares, the first move which does not lose by',
+            'perpetual check is played.',
+        ])
+
+    def run(self, *args):
+        if len(args) > 1 or (args and args[0].upper() != 'AUTO'):
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+        auto = bool(args)
+
+        def f(sh):
+            if not sh.engine:
+                raise shell.CommandFailedError('no engine')
+
+            if sh.mode == shell.MODE_STANDALONE:
+                while MoveCommand.local_engine_move(sh) and auto:
+                    pass
+                return
+
+            while True:
+                mv = MoveCommand.engine_move(sh)
+                if mv == '%TORYO':
+                    MoveCommand.move_common(sh, sh.csa_client.resign)
+                    return
+                if mv == '%KACHI':
+                    MoveCommand.move_common(sh, sh.csa_client.declare_win)
+                    return
+                if not (MoveCommand.move(sh, Move(mv)) and MoveCommand.wait_move(sh)) or not auto:
+                    return
+
+        return f
@@ -37,7 +37,7 @@ class HelpCommand(Command):
             else:
                 buf.append('{} - {}'.format(c.name(), c.__doc__))
                 buf.append('')
-                buf.append('{}'.format(c.help()))
+                buf.extend(c.help().splitlines())
                 buf.append('\n')
             shell.output.write('\n'.join(('  ' + x if x else '' for x in buf)))
 
@@ -12,10 +12,26 @@ class HistoryCommand(Command):
     def alias(self):
         return ['HISTORY']
 
+    def help(self):
+        return '\n'.join([
+            'HISTORY',
+            'HISTORY <from> [<to>]',
+            'HISTORY TAIL <n>',
+            '',
+            'Print all moves, the moves numbered from <from> to <to> (inclusive), or the last <n> moves.',
+        ])
+
     def run(self, *args):
-        # Print all history of the current game.
+        if not all(a.isdigit() for a in args[1 if args and args[0].upper() == 'TAIL' else 0:]):
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
 
-        if args:
+        if not args:
+            bounds = lambda n: (0, n)
+        elif args[0].upper() == 'TAIL' and len(args) == 2:
+            bounds = lambda n: (max(0, n - int(args[1])), n)
+        elif args[0].isdigit() and len(args) <= 2:
+            bounds = lambda n: (int(args[0]), int(args[1]) + 1 if len(args) == 2 else n)
+        else:
             raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
 
         def f(sh):
@@ -23,6 +39,7 @@ class HistoryCommand(Command):
                 return 'no game'
             if not sh.game.history:
                 return 'no history'
-            return '\n'.join('{:03d}: {}'.format(t[0], t[1]) for t in enumerate(sh.game.history))
+            lines = sh.game.history_range(*bounds(len(sh.game.history)))
+            return '\n'.join(lines) if lines else 'no moves in range'
 
         return lambda sh: sh.output.write(f(sh) + '\n')
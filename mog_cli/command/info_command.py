@@ -6,6 +6,8 @@ from command.base_command import Command
 
 
 class InfoCommand(Command):
+    """Print game information"""
+
     def alias(self):
         return ['INFO', 'I']
 
@@ -0,0 +1,36 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to ingest game records into the game store."""
+
+import time
+
+from command.base_command import Command
+import shell
+
+
+class IngestCommand(Command):
+    """Ingest CSA files into the game store"""
+
+    def alias(self):
+        return ['INGEST']
+
+    def help(self):
+        return '\n'.join([
+            'INGEST <path> [<path> ...]',
+            '',
+            'Add every game in the CSA files to the game store (see --store), for queries by GAMES.',
+            'Each <path> may be a .csa, .csa.gz or .csa.xz file, or a directory of them.',
+        ])
+
+    def run(self, *args):
+        if not args:
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+
+        def f(sh):
+            start = time.time()
+            n = sh.game_store().add_files(args)
+            elapsed = time.time() - start
+            sh.output.write('ingested {} games in {:.2f}s ({:.0f} games/sec)\n'.format(
+                n, elapsed, n / elapsed if elapsed else 0))
+
+        return f
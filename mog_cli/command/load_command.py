@@ -1,17 +1,50 @@
 #!/usr/bin/env python3
 # -*- coding: utf-8 -*-
-"""description"""
+"""Command to load a game record for local play."""
 
 from command.base_command import Command
 import shell
 
 
 class LoadCommand(Command):
+    """Load a game record and play it locally"""
+
     def alias(self):
         return ['LOAD']
 
-    def run(self, *args):
-        # TODO
-        def f(shell):
-            raise NotImplementedError
+    def help(self):
+        return '\n'.join([
+            'LOAD <path> [<index>]',
+            '',
+            'Load the game (default: the first one) from the record file and continue it in standalone mode.',
+            'The file may be in CSA, KIF (.kif, .kifu), KI2 (.ki2, .ki2u) or the binary form of CONVERT.',
+        ])
+
+    def run(self, path=None, index='0', *args):
+        if path is None or args or not index.isdigit():
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format((path, index) + args))
+
+        def f(sh):
+            from archive.convert import read_file
+            from core.binary_record import BinaryFormatError
+            from core.kif import KifFormatError
+            from engine import standalone
+
+            try:
+                records = read_file(path)
+            except (KifFormatError, BinaryFormatError) as e:
+                raise shell.CommandFailedError('{}: {}'.format(path, e))
+            if int(index) >= len(records):
+                raise shell.CommandFailedError('no such game: {}'.format(index))
+            info, init_state, history = records[int(index)]
+
+            game = standalone.new_game(init_state, info.get('Name+', ''), info.get('Name-', ''))
+            for mv in history:
+                game.move(mv)
+            game.my_turn = game.state.to_move
+
+            sh.game = game
+            sh.set_mode(shell.MODE_STANDALONE)
+            sh.sys_message('loaded {} moves from {}'.format(len(history), path))
+
         return f
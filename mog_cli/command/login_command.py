@@ -3,7 +3,7 @@
 """Login command"""
 
 import re
-from network.csa_client import CsaClient, DEFAULT_PORT
+from network.csa_client import CONNECTED, DEFAULT_PORT
 import shell
 from core import Move, Game
 import command
@@ -23,75 +23,90 @@ class LoginCommand(command.Command):
     def alias(self):
         return ['LOGIN']
 
-    def _parse_args(self, sh, host_port=None, username=None, password=None, *args):
-        if args:
-            raise shell.CommandArgumentsError
-
-        if host_port is None:
-            host = sh.default_host
-            port = sh.default_port or DEFAULT_PORT
-            if host is None:
-                # prompt
-
-                raise NotImplementedError
-
-            # host = interactive_input('hostname', DEFAULT_HOST, IS_NOT_EMPTY)
-            # port = int(interactive_input('port', DEFAULT_PORT, IS_DIGIT))
-        else:
-            m = self.PAT_HOST_PORT.match(host_port)
-            if not m:
-                raise shell.CommandArgumentsError('hostname[:port]: {}'.format(host_port))
-            port = DEFAULT_PORT if m.group(2) is None else int(m.group(2))
-            host = m.group(1)
-
-        username = username or sh.default_user
-        password = password or sh.default_pass
-
-        # check requirements
-        if None in [host, port, username, password]:
-            raise shell.CommandArgumentsError
-
-        if not self.PAT_USERNAME.match(username):
-            raise shell.CommandArgumentsError('invalid username: {}'.format(username))
-        if not self.PAT_PASSWORD.match(password):
-            raise shell.CommandArgumentsError('invalid password: {}'.format(password))
-
-        return host, port, username, password
-
     def run(self, *args):
         def f(sh):
-            host, port, username, password = self._parse_args(sh, *args)
-            c = CsaClient(host, port)
-            ret_login = c.login(username, password)
-            if not ret_login[0]:
-                raise shell.CommandFailedError('failed to login')
-
-            sh.sys_message('waiting for peer...')
-            game_cond = c.get_game_condition()[0]
-            game = Game(game_cond)
-
-            # print game condition
-            sh.output.write('{}\n'.format(game))
-            ret = input('agree to this game? [Y/n]: ')
-
-            if ret == '' or ret.upper() == 'Y':
-                c.agree(game_cond)
-                sh.sys_message('waiting for agreement...')
-                ret_agree = c.get_agreement(game_cond)
-                if not ret_agree[0]:
-                    sh.sys_message('game was rejected by peer.')
-                    return
-
-                sh.sys_message('game started: {}'.format(game.id))
-
-                sh.game = game
-                sh.csa_client = c
-                sh.set_mode(shell.MODE_NETWORK)
-
-                if not game.is_my_turn():
-                    command.MoveCommand.wait_move(sh)
-            else:
-                c.reject(game_cond)
-                sh.csa_client = None
-
-        return f
\ No newline at end of file
+            host, port, username, password = parse_login_args(sh, *args)
+
+            # the connection of the last game is still logged in when it is taken from the pool
+            c = sh.connection_pool().acquire(host, port, username)
+            if c.state == CONNECTED:
+                ret_login = c.login(username, password)
+                if not ret_login[0]:
+                    sh.pool.release(c)
+                    raise shell.CommandFailedError('failed to login')
+
+            LoginCommand.start_game(sh, c)
+
+        return f
+
+    @staticmethod
+    def start_game(sh, c):
+        """Wait for the next game on the logged-in client, then start it if agreed."""
+        sh.sys_message('waiting for peer...')
+        game_cond = c.get_game_condition()[0]
+        game = Game(game_cond)
+
+        # print game condition
+        sh.output.write('{}\n'.format(game))
+        if sh.confirm('agree to this game?'):
+            c.agree(game_cond)
+            sh.sys_message('waiting for agreement...')
+            ret_agree = c.get_agreement(game_cond)
+            if not ret_agree[0]:
+                sh.sys_message('game was rejected by peer.')
+                sh.pool.release(c)
+                return
+
+            sh.sys_message('game started: {}'.format(game.id))
+
+            sh.game = game
+            sh.csa_client = c
+            sh.start_autosave(game)
+            sh.set_mode(shell.MODE_NETWORK)
+
+            if not game.is_my_turn():
+                command.MoveCommand.wait_move(sh)
+        else:
+            c.reject(game_cond)
+            sh.pool.release(c)
+            sh.csa_client = None
+
+
+def parse_login_args(sh, host_port=None, username=None, password=None, *args):
+    """
+    Arguments of LOGIN, shared by the commands which log in to the server.
+    @return tuple of (host, port, username, password), filled with the defaults of the shell
+    """
+    if args:
+        raise shell.CommandArgumentsError
+
+    if host_port is None:
+        host = sh.default_host
+        port = sh.default_port or DEFAULT_PORT
+        if host is None:
+            # prompt
+
+            raise NotImplementedError
+
+        # host = interactive_input('hostname', DEFAULT_HOST, IS_NOT_EMPTY)
+        # port = int(interactive_input('port', DEFAULT_PORT, IS_DIGIT))
+    else:
+        m = LoginCommand.PAT_HOST_PORT.match(host_port)
+        if not m:
+            raise shell.CommandArgumentsError('hostname[:port]: {}'.format(host_port))
+        port = DEFAULT_PORT if m.group(2) is None else int(m.group(2))
+        host = m.group(1)
+
+    username = username or sh.default_user
+    password = password or sh.default_pass
+
+    # check requirements
+    if None in [host, port, username, password]:
+        raise shell.CommandArgumentsError
+
+    if not LoginCommand.PAT_USERNAME.match(username):
+        raise shell.CommandArgumentsError('invalid username: {}'.format(username))
+    if not LoginCommand.PAT_PASSWORD.match(password):
+        raise shell.CommandArgumentsError('invalid password: {}'.format(password))
+
+    return host, port, username, password
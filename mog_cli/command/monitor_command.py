@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to watch server games."""
+
+import time
+
+from command.base_command import Command
+from command.login_command import parse_login_args
+import shell
+
+
+class MonitorCommand(Command):
+    """Watch games on the server"""
+
+    def alias(self):
+        return ['MONITOR', 'MON']
+
+    def help(self):
+        return '\n'.join([
+            'MONITOR [<host>[:<port>] [<username> <password>]]  (not in monitor mode)',
+            'MONITOR',
+            'MONITOR LIST',
+            'MONITOR WATCH <game_id>...|ALL',
+            'MONITOR UNWATCH <game_id>...',
+            'MONITOR SHOW <game_id>',
+            'MONITOR LIVE [<seconds>]',
+            'MONITOR CLOSE',
+            '',
+            'Connect to the server in monitor mode, and watch many games over the connection.',
+            'Without arguments, print the summary of the watched games.',
+            'LIVE prints the rows of the games which change, until the time passes (default: until interrupted).',
+        ])
+
+    def run(self, *args):
+        def f(sh):
+            if sh.mode != shell.MODE_MONITOR:
+                self.connect(sh, *args)
+                return
+            self.receive(sh)
+
+            sub = args[0].upper() if args else ''
+            params = args[1:]
+            if sub == '' and not params:
+                sh.output.write('\n'.join(sh.monitor.table()) + '\n')
+            elif sub == 'LIST' and not params:
+                sh.output.write('\n'.join(self.game_list(sh)) + '\n')
+            elif sub == 'WATCH' and params:
+                ids = self.game_list(sh) if [x.upper() for x in params] == ['ALL'] else params
+                sh.sys_message('watching {} games'.format(len(sh.monitor.watch(*ids))))
+            elif sub == 'UNWATCH' and params:
+                sh.sys_message('stopped watching {} games'.format(len(sh.monitor.unwatch(*params))))
+            elif sub == 'SHOW' and len(params) == 1:
+                self.show(sh, params[0])
+            elif sub == 'LIVE' and len(params) <= 1 and all(x.isdigit() for x in params):
+                self.live(sh, int(params[0]) if params else None)
+            elif sub == 'CLOSE' and not params:
+                sh.monitor.close()
+                sh.monitor = None
+                sh.set_mode(shell.MODE_INIT)
+            else:
+                raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+
+        return f
+
+    def connect(self, sh, *args):
+        from network.monitor import MonitorClient
+
+        host, port, username, password = parse_login_args(sh, *args)
+        c = MonitorClient(host, port)
+        if not c.login(username, password)[0]:
+            c.close()
+            raise shell.CommandFailedError('failed to login')
+        sh.monitor = c
+        sh.set_mode(shell.MODE_MONITOR)
+        sh.sys_message('monitor mode: {}:{}'.format(host, port))
+
+    @staticmethod
+    def receive(sh, timeout=0):
+        """@return list of changed game IDs"""
+        return sh.monitor.poll(timeout)
+
+    @staticmethod
+    def game_list(sh, timeout=10):
+        sh.monitor.request_list()
+        deadline = time.time() + timeout
+        while sh.monitor.game_list is None:
+            if time.time() > deadline:
+                raise shell.CommandFailedError('no reply to the game list')
+            sh.monitor.poll(max(0, deadline - time.time()))
+        return sh.monitor.game_list
+
+    @staticmethod
+    def show(sh, game_id):
+        g = sh.monitor.games.get(game_id)
+        if g is None:
+            raise shell.CommandFailedError('not watching: {}'.format(game_id))
+        if g.game is None:
+            sh.output.write('waiting for the record\n')
+            return
+        sh.output.write('{}\n{}\n'.format(g.game.state.compact_str(), '\n'.join(g.game.history_range(-4))))
+
+    @classmethod
+    def live(cls, sh, seconds):
+        deadline = None if seconds is None else time.time() + seconds
+        sh.output.write('\n'.join(sh.monitor.table()) + '\n')
+        try:
+            while deadline is None or time.time() < deadline:
+                timeout = 1.0 if deadline is None else max(0, min(1.0, deadline - time.time()))
+                changed = cls.receive(sh, timeout)
+                if changed:
+                    sh.output.write('\n'.join(sh.monitor.table(changed)[1:]) + '\n')
+                    sh.output.flush()
+        except KeyboardInterrupt:
+            pass
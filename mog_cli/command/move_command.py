@@ -3,9 +3,9 @@
 """description"""
 
 import functools
-import network.csa_client
 from command.base_command import Command
 import shell
+import command
 from core import Move
 
 
@@ -20,7 +20,14 @@ class MoveCommand(Command):
             raise shell.CommandArgumentsError('Invalid number of arguments: {}'.format(args))
 
         def f(sh):
-            s = args[0]
+            s = args[0].upper()
+
+            if sh.mode == shell.MODE_STANDALONE:
+                if not s.startswith(('+', '-', '%')):
+                    s = sh.game.state.to_move + s
+                MoveCommand.local_move(sh, s) and sh.engine and MoveCommand.local_engine_move(sh)
+                return
+
             if not s.startswith(sh.game.my_turn):
                 s = sh.game.my_turn + s
 
@@ -28,6 +35,49 @@ class MoveCommand(Command):
 
         return f
 
+    @staticmethod
+    def local_move(sh, move_str):
+        """
+        Check and play the move in the local game (MODE_STANDALONE).
+        @return True if the game continues
+        """
+        from engine import standalone
+
+        n = len(sh.game.history)
+        try:
+            end = standalone.play_move(sh.game, move_str)
+        except standalone.IllegalMoveError as e:
+            raise shell.CommandFailedError('illegal move: {}'.format(e))
+
+        for m in sh.game.history[n:]:
+            sh.sys_message('move: {}'.format(m))
+        if end is None:
+            return True
+
+        result = sh.game.result()
+        sh.store_game(sh.game, result)
+        sh.game_end_banner(result)
+        if sh.engine:
+            sh.engine.game_over(result)
+        return False
+
+    @staticmethod
+    def local_engine_move(sh):
+        """Let the engine play the side to move in the local game. @return True if the game continues"""
+        mv = MoveCommand.engine_move(sh)
+        return MoveCommand.local_move(sh, mv)
+
+    @staticmethod
+    def engine_move(sh):
+        """@return move of the engine, with a declaration of win checked by the impasse rule"""
+        from engine.player import checked_move
+
+        mv, reason = checked_move(sh.engine, sh.game)
+        if reason:
+            sh.sys_message('engine declared win, but {}'.format(reason))
+        sh.sys_message('engine: {}'.format(mv))
+        return mv
+
     @staticmethod
     def move_common(sh, func):
         """inner function for move/wait_move"""
@@ -37,21 +87,30 @@ class MoveCommand(Command):
 
         mv, tm, reason, result = func()
 
+        # the game may end right after a normal move, which is played only if the server confirmed it
+        played = mv is not None and not mv.startswith('%') and tm is not None
+        if played:
+            f(Move(mv, tm))
+
         # special move
         if reason is not None:
-            f(Move(reason, tm))
+            f(Move(reason) if played else Move(reason, tm))
+            sh.stop_autosave(sh.game)
+            sh.store_game(sh.game, result)
             sh.game_end_banner(result)
+            if sh.engine:
+                sh.engine.game_over(result)
 
-            try:
-                sh.csa_client.logout()
-            except (ConnectionResetError, network.csa_client.ClosedConnectionError):
-                pass  # ignore this
-
+            # stay logged in for the next game on this connection
+            c, sh.csa_client = sh.csa_client, None
             sh.set_mode(shell.MODE_INIT)
+            if result == '#DRAW' and sh.game.condition['Game_Summary'].get('Rematch_On_Draw') == 'YES':
+                sh.sys_message('rematch on draw')
+                command.LoginCommand.start_game(sh, c)
+            else:
+                sh.pool.release(c)
             return False
 
-        # normal move
-        f(Move(mv, tm))
         return True
 
 
@@ -63,5 +122,8 @@ class MoveCommand(Command):
     @staticmethod
     def wait_move(sh):
         sh.sys_message("waiting for peer's move...")
+        if sh.engine:
+            # use the opponent's time for searching the expected reply
+            sh.engine.start_ponder(sh.game)
         return MoveCommand.move_common(sh, sh.csa_client.get_move)
 
@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to start a local game."""
+
+from command.base_command import Command
+from core import BLACK, TURNS
+import shell
+import command
+
+
+class NewCommand(Command):
+    """Start a new local game"""
+
+    def alias(self):
+        return ['NEW']
+
+    def help(self):
+        return '\n'.join([
+            'NEW [+|-]',
+            '',
+            'Start a game from the initial position in standalone mode, playing the given turn (default: +).',
+            'If an engine is set, it replies to your moves.',
+        ])
+
+    def run(self, turn=BLACK, *args):
+        if args or turn not in TURNS:
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format((turn,) + args))
+
+        def f(sh):
+            from engine import standalone
+
+            sh.game = standalone.new_game(my_turn=turn)
+            sh.set_mode(shell.MODE_STANDALONE)
+            sh.sys_message('new game started')
+            if sh.engine and not sh.game.is_my_turn():
+                command.MoveCommand.local_engine_move(sh)
+
+        return f
+
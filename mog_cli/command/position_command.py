@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to search positions in game archives."""
+
+import time
+
+from command.base_command import Command
+from core.record import Record, open_record
+import shell
+
+
+class PositionCommand(Command):
+    """Find the games which reached a position"""
+
+    def alias(self):
+        return ['POSITION', 'POS']
+
+    def help(self):
+        return '\n'.join([
+            'POSITION BUILD <index> <path> [<path> ...]',
+            'POSITION FIND <index> [<path>]',
+            '',
+            'BUILD indexes every position of the games in the CSA files; an existing index is merged with them.',
+            'FIND prints the games in the index which reached the initial position of the CSA file <path>.',
+            'Without <path>, the position is read as CSA lines (P1..P9, P+, P-, and + or -) up to an empty line.',
+            'Each <path> may be a .csa, .csa.gz or .csa.xz file, or a directory of them.',
+        ])
+
+    def run(self, *args):
+        sub = args[0].upper() if args else None
+        if sub == 'BUILD' and len(args) >= 3:
+            return lambda sh: self.build(sh, args[1], args[2:])
+        if sub == 'FIND' and len(args) in (2, 3):
+            return lambda sh: self.find(sh, args[1], args[2] if len(args) == 3 else None)
+        raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+
+    @staticmethod
+    def build(sh, index_path, paths):
+        from archive import position_index
+
+        start = time.time()
+        games, postings = position_index.build(index_path, paths)
+        sh.output.write('indexed {} games in {:.2f}s, {} positions in the index\n'.format(
+            games, time.time() - start, postings))
+
+    @staticmethod
+    def read_position(sh):
+        """@return list of lines up to an empty line"""
+        lines = []
+        while True:
+            if not sh.batch:
+                sh.output.write('position> ')
+                sh.output.flush()
+            line = sh.input.readline()
+            if not line.strip():
+                return lines
+            lines.append(line.rstrip('\r\n'))
+
+    @classmethod
+    def find(cls, sh, index_path, path):
+        from archive.position_index import PositionIndex, IndexFormatError
+
+        if path is None:
+            lines = cls.read_position(sh)
+        else:
+            with open_record(path) as fp:
+                lines = fp.readlines()
+        state = Record.read(lines)[0][1]
+        if not state.board:
+            raise shell.CommandFailedError('no position')
+
+        try:
+            with PositionIndex(index_path) as index:
+                start = time.time()
+                matches = index.find(state)
+                elapsed = time.time() - start
+        except IndexFormatError as e:
+            raise shell.CommandFailedError('{}: {}'.format(index_path, e))
+
+        for game_path, offset, ply in matches:
+            sh.output.write('{} offset={} ply={}\n'.format(game_path, offset, ply))
+        sh.output.write('{} matches in {:.2f}ms\n'.format(len(matches), elapsed * 1000))
@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to recover a game from its autosave file."""
+
+from command.base_command import Command
+import shell
+
+
+class RecoverCommand(Command):
+    """Recover the game from the autosave file"""
+
+    def alias(self):
+        return ['RECOVER']
+
+    def help(self):
+        return '\n'.join([
+            'RECOVER <path>',
+            '',
+            'Rebuild the game saved by --autosave, even if the file was cut off by a crash,',
+            'and open it in standalone mode.',
+        ])
+
+    def run(self, path=None, *args):
+        if path is None or args:
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format((path,) + args))
+
+        def f(sh):
+            from core.autosave import recover
+
+            sh.game = recover(path)
+            sh.set_mode(shell.MODE_STANDALONE)
+            sh.sys_message('recovered {} moves of {}'.format(len(sh.game.history), sh.game.id))
+
+        return f
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to step through the moves of the current game."""
+
+import time
+
+from command.base_command import Command
+import shell
+
+
+class ReplayCommand(Command):
+    """Step through the moves of the game"""
+
+    def alias(self):
+        return ['REPLAY', 'R']
+
+    def help(self):
+        return '\n'.join([
+            'REPLAY',
+            'REPLAY NEXT|PREV [<n>]',
+            'REPLAY START|END',
+            'REPLAY GOTO <ply>',
+            'REPLAY PLAY [<plies per second>]',
+            '',
+            'Move the replay cursor and print the position. The game itself is not changed.',
+            'PLAY steps forward to the end at the given rate (default: 1); interrupt to stop.',
+        ])
+
+    def run(self, *args):
+        sub = args[0].upper() if args else ''
+        nums = args[1:]
+        # only the playback rate may be a decimal; the counts and the ply are integers
+        is_number = (lambda x: x.replace('.', '', 1).isdigit()) if sub == 'PLAY' else str.isdigit
+        if len(nums) > 1 or not all(is_number(x) for x in nums):
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+        if sub == 'GOTO' and not nums or sub in ('', 'START', 'END') and nums:
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+
+        actions = {
+            '': lambda r: r.ply,
+            'NEXT': lambda r: r.forward(int(nums[0]) if nums else 1),
+            'PREV': lambda r: r.backward(int(nums[0]) if nums else 1),
+            'START': lambda r: r.jump(0),
+            'END': lambda r: r.jump(len(r)),
+            'GOTO': lambda r: r.jump(int(nums[0])),
+        }
+        if sub not in actions and sub != 'PLAY':
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+
+        def f(sh):
+            from core.replay import Replay
+
+            if not sh.game:
+                raise shell.CommandFailedError('no game')
+            if sh.replay is None or sh.replay.game is not sh.game:
+                sh.replay = Replay(sh.game)
+            replay = sh.replay
+
+            if sub != 'PLAY':
+                actions[sub](replay)
+                self.print_position(sh, replay)
+                return
+
+            interval = 1.0 / float(nums[0]) if nums and float(nums[0]) > 0 else 1.0
+            self.print_position(sh, replay)
+            try:
+                while replay.ply < len(replay):
+                    time.sleep(interval)
+                    replay.forward()
+                    self.print_position(sh, replay)
+            except KeyboardInterrupt:
+                sh.sys_message('replay stopped')
+
+        return f
+
+    @staticmethod
+    def print_position(sh, replay):
+        mv = replay.last_move()
+        sh.output.write('[{:03d}/{:03d}] {}\n{}\n'.format(
+            replay.ply, len(replay), mv if mv else 'start', replay.state.compact_str()))
+        sh.output.flush()
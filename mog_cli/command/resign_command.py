@@ -3,6 +3,7 @@
 """Resign command"""
 
 from command import Command, MoveCommand
+import shell
 
 
 class ResignCommand(Command):
@@ -12,4 +13,9 @@ class ResignCommand(Command):
         return ['RESIGN']
 
     def run(self, *args):
-        return lambda sh: MoveCommand.move_common(sh, sh.csa_client.resign)
+        def f(sh):
+            if sh.mode == shell.MODE_STANDALONE:
+                MoveCommand.local_move(sh, '%TORYO')
+            else:
+                MoveCommand.move_common(sh, sh.csa_client.resign)
+        return f
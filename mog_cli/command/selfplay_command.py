@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to play games between engines locally."""
+
+from command.base_command import Command
+from core.record import Record
+import shell
+
+
+class SelfPlayCommand(Command):
+    """Play local games back to back"""
+
+    def alias(self):
+        return ['SELFPLAY']
+
+    def help(self):
+        return '\n'.join([
+            'SELFPLAY <games> [<black> <white> [<output_path>]]',
+            '',
+            'Play games between two players from the initial position and report games/minute.',
+            'Players are built-in players (random, greedy) or engine (the current ENGINE); default: random.',
+            'Game records are appended to <output_path> in CSA format.',
+        ])
+
+    def run(self, games=None, black='random', white='random', output_path=None, *args):
+        if games is None or not games.isdigit() or args:
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format((games, black, white) + args))
+
+        def player(sh, name):
+            from engine.player import BUILTIN_PLAYERS
+
+            if name.lower() == 'engine':
+                if not sh.engine:
+                    raise shell.CommandFailedError('no engine')
+                return sh.engine
+            if name.lower() not in BUILTIN_PLAYERS:
+                raise shell.CommandArgumentsError('unknown player: {}'.format(name))
+            return BUILTIN_PLAYERS[name.lower()]()
+
+        def f(sh):
+            from engine.standalone import SelfPlay
+
+            out = open(output_path, 'a') if output_path else None
+
+            def callback(i, game):
+                if out:
+                    out.write('\n'.join(Record.write(
+                        {'Name+': black, 'Name-': white, 'Event': 'selfplay-{}'.format(i + 1)},
+                        game.init_state, game.history)) + '\n/\n')
+
+            try:
+                stats = SelfPlay(player(sh, black), player(sh, white)).run(int(games), callback)
+            finally:
+                if out:
+                    out.close()
+            sh.output.write('{}\n'.format(stats))
+
+        return f
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to play server games back to back."""
+
+from command.base_command import Command
+from command.login_command import parse_login_args
+import shell
+
+
+class TournamentCommand(Command):
+    """Play games on the server back to back with the engine"""
+
+    def alias(self):
+        return ['TOURNAMENT']
+
+    def help(self):
+        return '\n'.join([
+            'TOURNAMENT [<host>[:<port>] [<username> <password>]] [<option>=<value>...]',
+            '',
+            'Log in, then agree to the games which pass the filters and play them with the engine (see ENGINE),',
+            'until the number of games are played or interrupted.',
+            'A lost connection is replaced with a new one, waiting longer after each failure in a row.',
+            'options:',
+            '  games=<n>               number of games to play (default: unlimited)',
+            '  opponents=<name>,...    play only against these players',
+            '  exclude=<name>,...      never play against these players',
+            '  time=<min>-<max>        total time in seconds, either may be omitted, e.g. time=600-',
+            '  byoyomi=<min>-<max>     byoyomi in seconds',
+        ])
+
+    @staticmethod
+    def parse_range(value):
+        lo, sep, hi = value.partition('-')
+        if not sep or not all(x.isdigit() for x in (lo, hi) if x):
+            raise shell.CommandArgumentsError('invalid range: {}'.format(value))
+        return int(lo) if lo else None, int(hi) if hi else None
+
+    def parse_options(self, options):
+        ret = {'games': None, 'opponents': None, 'exclude': (), 'time': (None, None), 'byoyomi': (None, None)}
+        for opt in options:
+            key, _, value = opt.partition('=')
+            if key not in ret or not value:
+                raise shell.CommandArgumentsError('invalid option: {}'.format(opt))
+            if key == 'games':
+                if not value.isdigit():
+                    raise shell.CommandArgumentsError('invalid option: {}'.format(opt))
+                ret[key] = int(value)
+            elif key in ('opponents', 'exclude'):
+                ret[key] = value.split(',')
+            else:
+                ret[key] = self.parse_range(value)
+        return ret
+
+    def run(self, *args):
+        positional = [a for a in args if '=' not in a]
+        options = self.parse_options(a for a in args if '=' in a)
+
+        def f(sh):
+            from network.tournament import Tournament, AgreementPolicy, LoginError
+
+            if not sh.engine:
+                raise shell.CommandFailedError('no engine')
+            host, port, username, password = parse_login_args(sh, *positional)
+
+            policy = AgreementPolicy(options['opponents'], options['exclude'], options['time'], options['byoyomi'])
+            t = Tournament(host, port, username, password, sh.engine, policy, sh.connection_pool(), sh.start_autosave)
+
+            def on_game(game, record):
+                sh.game = game
+                sh.store_game(game, record.result)
+                sh.sys_message(str(record))
+                sh.output.flush()
+
+            def on_reject(cond, reason):
+                sh.sys_message('rejected {}: {}'.format(cond['Game_Summary']['Game_ID'], reason))
+
+            def on_error(e, delay):
+                sh.sys_message('connection lost: {}, reconnecting in {:.0f}s'.format(str(e) or type(e).__name__, delay))
+                sh.output.flush()
+
+            sh.sys_message('tournament started: {}@{}:{}'.format(username, host, port))
+            try:
+                t.run(options['games'], on_game, on_reject, on_error)
+            except LoginError:
+                raise shell.CommandFailedError('failed to login')
+            except KeyboardInterrupt:
+                sh.sys_message('tournament stopped')
+            finally:
+                sh.sys_message(str(t.stats))
+
+        return f
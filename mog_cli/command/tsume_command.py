@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to solve tsume (checkmate) problems."""
+
+from command.base_command import Command
+from core.record import Record, open_record
+from engine import tsume
+import shell
+
+
+class TsumeCommand(Command):
+    """Search forced mate"""
+
+    DEFAULT_MAX_NODES = 100000
+
+    def alias(self):
+        return ['TSUME', 'MATE']
+
+    def help(self):
+        return '\n'.join([
+            'TSUME [<path>] [<max_nodes> [<time_limit_sec>]]',
+            '',
+            'Search forced mate for the side to move in the current game,',
+            'or in every position of the CSA file <path>.',
+        ])
+
+    def run(self, *args):
+        args = list(args)
+        path = args.pop(0) if args and not args[0].isdigit() else None
+        if len(args) > 2 or not all(a.isdigit() for a in args):
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+        max_nodes = int(args[0]) if args else self.DEFAULT_MAX_NODES
+        time_limit = int(args[1]) if len(args) > 1 else None
+
+        def f(sh):
+            if path is None:
+                if not sh.game:
+                    raise shell.CommandFailedError('no game')
+                states = [sh.game.state]
+            else:
+                with open_record(path) as fp:
+                    states = [r[1] for r in Record.read(fp)]
+
+            for state in states:
+                sh.output.write(self.format_result(tsume.solve(state, max_nodes, time_limit)) + '\n')
+
+        return f
+
+    @staticmethod
+    def format_result(result):
+        if result.status == tsume.MATE:
+            head = 'mate in {}: {}'.format(len(result.moves), ' '.join(m.move_str for m in result.moves))
+        elif result.status == tsume.NO_MATE:
+            head = 'no mate'
+        else:
+            head = 'unknown (search limit exceeded)'
+        return '{} [nodes={}, time={:.3f}s]'.format(head, result.nodes, result.elapsed)
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Command to check game archives against the rules."""
+
+from command.base_command import Command
+import shell
+
+
+class ValidateCommand(Command):
+    """Find illegal moves in CSA files"""
+
+    def alias(self):
+        return ['VALIDATE']
+
+    def help(self):
+        return '\n'.join([
+            'VALIDATE [jobs=<n>] [report=<path>] <path> [<path> ...]',
+            '',
+            'Replay every game in the CSA files with all the rules checked (nifu, drops and moves to the last ranks,',
+            'moving into check, uchifuzume, piece counts) in <n> processes (default: number of CPUs).',
+            'The first illegal ply of each game is printed, or written to the report file, with a summary.',
+            'Each <path> may be a .csa, .csa.gz or .csa.xz file, or a directory of them.',
+        ])
+
+    def run(self, *args):
+        options = {'jobs': None, 'report': None}
+        paths = []
+        for arg in args:
+            key, sep, value = arg.partition('=')
+            if sep and key in options and value:
+                options[key] = value
+            else:
+                paths.append(arg)
+        jobs = options['jobs']
+        if not paths or (jobs is not None and not (jobs.isdigit() and int(jobs) > 0)):
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+
+        def f(sh):
+            from archive.validator import validate_files
+
+            out = open(options['report'], 'w') if options['report'] else sh.output
+            try:
+                stats = validate_files(paths, int(jobs) if jobs else None,
+                                       on_violation=lambda v: out.write('{}\n'.format(v)))
+                out.write('{}\n'.format(stats))
+            finally:
+                if out is not sh.output:
+                    out.close()
+            if out is not sh.output:
+                sh.output.write('{}\n'.format(stats))
+
+        return f
@@ -3,6 +3,8 @@
 """Win command"""
 
 from command import Command, MoveCommand
+from core.jishogi import declaration_error
+import shell
 
 
 class WinCommand(Command):
@@ -11,5 +13,25 @@ class WinCommand(Command):
     def alias(self):
         return ['WIN']
 
+    def help(self):
+        return '\n'.join([
+            'WIN [FORCE]',
+            '',
+            'Declare win by the impasse rule (%KACHI). A wrong declaration loses the game, so it is refused',
+            'unless the position meets the rule (king and 10 pieces in the zone, points, no check), or FORCE is given.',
+            'A refused declaration sends nothing.',
+            'GO checks the engine\'s declarations the same way and plays a move instead.',
+        ])
+
     def run(self, *args):
-        return lambda sh: MoveCommand.move_common(sh, sh.csa_client.declare_win)
+        if len(args) > 1 or (args and args[0].upper() != 'FORCE'):
+            raise shell.CommandArgumentsError('Invalid arguments: {}'.format(args))
+        force = bool(args)
+
+        def f(sh):
+            reason = declaration_error(sh.game.state)
+            if reason and not force:
+                raise shell.CommandFailedError('cannot declare win: {}'.format(reason))
+            MoveCommand.move_common(sh, sh.csa_client.declare_win)
+
+        return f
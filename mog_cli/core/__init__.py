@@ -27,6 +27,9 @@ PIECE_TYPES = [
 ]
 HAND_PIECE_TYPES = [PAWN, LANCE, KNIGHT, SILVER, GOLD, BISHOP, ROOK]
 
+# number of pieces of each unpromoted type in a game
+PIECE_COUNTS = {KING: 2, PAWN: 18, LANCE: 4, KNIGHT: 4, SILVER: 4, GOLD: 4, BISHOP: 2, ROOK: 2}
+
 _PROMO = {PAWN: PPAWN, LANCE: PLANCE, KNIGHT: PKNIGHT, SILVER: PSILVER, BISHOP: PBISHOP, ROOK: PROOK}
 _PROMO_INV = {v: k for k, v in _PROMO.items()}
 UPPER_PIECE_TYPE = lambda p: _PROMO.get(p, p)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Crash-safe game records
+
+AutoSaver appends every move of a game to a CSA file as it is played. The move loop only
+puts lines into a queue; a background thread writes them, and calls fsync at most once per
+sync interval, so a crash loses at most the moves of the last interval.
+recover() rebuilds the Game from such a file, ignoring a line cut off by the crash. The game end
+reasons of the server are saved as special moves (core.record.move_lines), so a finished game is
+recovered as finished.
+"""
+
+import os
+import queue
+import threading
+import time
+
+from core import *
+from core.record import Record, move_lines
+
+DEFAULT_SYNC_INTERVAL = 1.0
+
+# comment line which keeps the turn of this client, e.g. "'Your_Turn:+"
+_YOUR_TURN = "'Your_Turn:"
+
+
+class AutoSaver:
+    """
+    Background writer of one game record.
+
+    @param path CSA file, which is truncated
+    @param sync_interval seconds between fsync calls; 0 to sync after every write
+    """
+
+    def __init__(self, path, sync_interval=DEFAULT_SYNC_INTERVAL):
+        self.path = path
+        self.sync_interval = sync_interval
+        self.queue = queue.Queue()
+        self.error = None  # exception raised in the writer thread
+        self.file = open(path, 'w')
+        self.thread = threading.Thread(target=self.__write_loop, daemon=True)
+        self.thread.start()
+
+    def __write_loop(self):
+        last_sync = time.time()
+        dirty = False
+        while True:
+            timeout = None if not dirty else max(0, last_sync + self.sync_interval - time.time())
+            try:
+                lines = self.queue.get(timeout=timeout)
+            except queue.Empty:
+                lines = []
+
+            try:
+                # take everything queued so far, and write it at once
+                batch = [] if lines is None else list(lines)
+                closing = lines is None
+                while not closing:
+                    try:
+                        more = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if more is None:
+                        closing = True
+                    else:
+                        batch.extend(more)
+
+                if batch:
+                    self.file.write(''.join(x + '\n' for x in batch))
+                    self.file.flush()
+                    dirty = True
+                if dirty and (closing or time.time() - last_sync >= self.sync_interval):
+                    os.fsync(self.file.fileno())
+                    last_sync = time.time()
+                    dirty = False
+            except OSError as e:
+                self.error = e
+                closing = True
+
+            if closing:
+                self.file.close()
+                return
+
+    def start(self, game):
+        """Write the header and the moves already played."""
+        s = game.condition['Game_Summary']
+        info = {'Version': '2.2', 'Name+': s['Name+'], 'Name-': s['Name-'], 'Event': game.id}
+        lines = Record.write(info, game.init_state, game.history)
+        self.queue.put(lines[:1] + [_YOUR_TURN + game.my_turn] + lines[1:])
+
+    def append(self, mv):
+        """Queue the move; never blocks."""
+        self.queue.put(move_lines(mv))
+
+    def close(self):
+        """Write the rest and sync. Blocks until done."""
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+
+def attach(game, path, sync_interval=DEFAULT_SYNC_INTERVAL):
+    """Start saving the game to the path. @return AutoSaver, also set to game.autosave"""
+    saver = AutoSaver(path, sync_interval)
+    saver.start(game)
+    game.autosave = saver
+    return saver
+
+
+def recover(path):
+    """
+    Rebuild the game from a file written by AutoSaver, possibly cut off in the middle of a line.
+    @return Game
+    """
+    with open(path) as f:
+        text = f.read()
+    lines = text.splitlines()
+    if lines and not text.endswith('\n'):
+        lines.pop()  # incomplete line
+
+    my_turn, reason = BLACK, None
+    for line in lines:
+        if line.startswith(_YOUR_TURN):
+            my_turn = line[len(_YOUR_TURN):]
+        elif line.startswith("'#"):
+            reason = line[1:]  # game end without a special move
+    info, init_state, history = Record.read(lines)[0]
+    if reason and not (history and history[-1].is_special):
+        history.append(Move(reason))
+    return Game.from_record(info, init_state, history, my_turn)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Compact binary form of game records
+
+A file is MAGIC followed by the games; each game is prefixed by its length so that readers can skip it.
+Game body:
+  flags (1 byte: 1 = hirate initial state, 2 = elapsed times follow the moves)
+  game information as UTF-8 'key\\tvalue\\n' lines, prefixed by the length (2 bytes)
+  initial state, unless hirate: side to move (0: BLACK, 1: WHITE), number of pieces on the board,
+    the pieces as (square, index in PIECE_TYPES; +128 for WHITE), and the counts of HAND_PIECE_TYPES
+    in the hands of BLACK and WHITE
+  number of moves (2 bytes), then the moves:
+    normal : from (hand: 0, else file * 10 + rank; +128 for WHITE), to, index in PIECE_TYPES
+    special: 0xff, length (1 byte), ASCII text
+  elapsed times (2 bytes each, 0xffff for none), if flagged
+"""
+
+import struct
+
+from core import *
+
+MAGIC = b'MOGREC01'
+
+_FLAG_HIRATE = 1
+_FLAG_TIMES = 2
+_SPECIAL = 0xff
+_WHITE_BIT = 0x80
+_NO_TIME = 0xffff
+
+_PIECE_INDEX = {pt: i for i, pt in enumerate(PIECE_TYPES)}
+_U16 = struct.Struct('>H')
+_U32 = struct.Struct('>I')
+
+
+class BinaryFormatError(Exception):
+    pass
+
+
+def _hirate():
+    state = State()
+    state.set_hirate()
+    return state
+
+
+_HIRATE = _hirate()
+
+
+def _pack_move(mv):
+    if mv.is_special:
+        text = mv.move_str.encode('ascii')
+        return bytes([_SPECIAL, len(text)]) + text
+    flag = _WHITE_BIT if mv.turn == WHITE else 0
+    return bytes([int(mv.move_from) | flag, int(mv.move_to), _PIECE_INDEX[mv.piece_type]])
+
+
+def _pack_state(state):
+    buf = [1 if state.to_move == WHITE else 0, len(state.board)]
+    for pos, piece in state.board.items():
+        buf += [int(pos) | (_WHITE_BIT if piece[0] == WHITE else 0), _PIECE_INDEX[piece[1:]]]
+    buf += [state.hand.get(t + pt, 0) for t in TURNS for pt in HAND_PIECE_TYPES]
+    return bytes(buf)
+
+
+def _unpack_state(buf, pos):
+    """@return tuple of (State, next position)"""
+    state = State(WHITE if buf[pos] else BLACK)
+    n = buf[pos + 1]
+    pos += 2
+    for _ in range(n):
+        b = buf[pos]
+        turn = WHITE if b & _WHITE_BIT else BLACK
+        state.set_board('{:02d}'.format(b & ~_WHITE_BIT), turn + PIECE_TYPES[buf[pos + 1]])
+        pos += 2
+    for t in TURNS:
+        for pt in HAND_PIECE_TYPES:
+            for _ in range(buf[pos]):
+                state.set_hand(t + pt)
+            pos += 1
+    return state, pos
+
+
+def _text(buf, pos):
+    """@return tuple of (UTF-8 text prefixed by the length, next position)"""
+    n = _U16.unpack_from(buf, pos)[0]
+    return buf[pos + 2:pos + 2 + n].decode('utf-8'), pos + 2 + n
+
+
+class BinaryRecord:
+    @staticmethod
+    def write(info, init_state, history):
+        """
+        @param info game information as Record.read returns
+        @return bytes of one game, with the length prefix
+        """
+        times = any(mv.elapsed_time is not None for mv in history)
+        hirate = init_state == _HIRATE
+        info_text = ''.join('{}\t{}\n'.format(k, v) for k, v in info.items()).encode('utf-8')
+
+        buf = [bytes([(_FLAG_HIRATE if hirate else 0) | (_FLAG_TIMES if times else 0)]),
+               _U16.pack(len(info_text)), info_text]
+        if not hirate:
+            buf.append(_pack_state(init_state))
+        buf.append(_U16.pack(len(history)))
+        buf.extend(_pack_move(mv) for mv in history)
+        if times:
+            buf.extend(_U16.pack(_NO_TIME if mv.elapsed_time is None else min(mv.elapsed_time, _NO_TIME - 1))
+                       for mv in history)
+        body = b''.join(buf)
+        return _U32.pack(len(body)) + body
+
+    @staticmethod
+    def read_game(body):
+        """
+        @param body bytes of one game without the length prefix
+        @return tuple of (game_information, initial_state, history)
+        """
+        flags = body[0]
+        text, pos = _text(body, 1)
+        info = dict(line.split('\t', 1) for line in text.splitlines())
+        if flags & _FLAG_HIRATE:
+            init_state = _hirate()
+        else:
+            init_state, pos = _unpack_state(body, pos)
+
+        n = _U16.unpack_from(body, pos)[0]
+        pos += 2
+        history = []
+        for _ in range(n):
+            b = body[pos]
+            if b == _SPECIAL:
+                history.append(Move(body[pos + 2:pos + 2 + body[pos + 1]].decode('ascii')))
+                pos += 2 + body[pos + 1]
+            else:
+                history.append(Move('{}{:02d}{:02d}{}'.format(
+                    WHITE if b & _WHITE_BIT else BLACK, b & ~_WHITE_BIT, body[pos + 1], PIECE_TYPES[body[pos + 2]])))
+                pos += 3
+        if flags & _FLAG_TIMES:
+            for mv in history:
+                t = _U16.unpack_from(body, pos)[0]
+                mv.elapsed_time = None if t == _NO_TIME else t
+                pos += 2
+        return info, init_state, history
+
+    @staticmethod
+    def read(fp):
+        """@return list of tuple, (game_information, initial_state, history) as Record.read"""
+        return list(BinaryRecord.iter_read(fp))
+
+    @staticmethod
+    def iter_read(fp):
+        """
+        @param fp binary file object positioned at MAGIC
+        @return iterator of tuple, (game_information, initial_state, history)
+        """
+        if fp.read(len(MAGIC)) != MAGIC:
+            raise BinaryFormatError('not a binary record')
+        while True:
+            head = fp.read(_U32.size)
+            if not head:
+                break
+            n = _U32.unpack(head)[0] if len(head) == _U32.size else -1
+            body = fp.read(n) if n >= 0 else b''
+            if len(body) != n:
+                raise BinaryFormatError('truncated game')
+            try:
+                game = BinaryRecord.read_game(body)
+            except (IndexError, ValueError, AssertionError, struct.error) as e:
+                raise BinaryFormatError('broken game: {!r}'.format(e))
+            yield game
+
+
+if __name__ == '__main__':
+    pass
@@ -4,19 +4,92 @@
 game
 """
 
+import time
+
 from core import *
+from core.movegen import check_move, gives_check, is_in_check, king_square
 from core.record import Record
+from core.zobrist import hash_of, next_hash
+
+
+# special moves (records use '%', server game-end reasons use '#'), seen from the side to move
+_SPECIAL_LOSE = {'%TORYO', '%TIME_UP', '%ILLEGAL_MOVE', '%TSUMI', '#RESIGN', '#TIME_UP'}
+_SPECIAL_WIN = {'%KACHI', '#JISHOGI'}
+
+# repetition: the game ends when the same position appears this many times
+REPETITION_LIMIT = 4
+SENNICHITE, OUTE_SENNICHITE = '#SENNICHITE', '#OUTE_SENNICHITE'
+
+
+class IllegalMoveError(Exception):
+    pass
+
+
+def winner_of(history, to_move):
+    """
+    @param history list of Move
+    @param to_move turn to move after the history
+    @return BLACK or WHITE if the last special move decides the winner, otherwise None (draw or unknown)
+    """
+    for mv in reversed([mv for mv in history[-2:] if mv.is_special]):
+        if mv.move_str in _SPECIAL_LOSE:
+            return FLIP_TURN[to_move]
+        if mv.move_str in _SPECIAL_WIN:
+            return to_move
+        if mv.move_str[1:] in ('+ILLEGAL_ACTION', '-ILLEGAL_ACTION'):
+            return FLIP_TURN[mv.move_str[1]]
+    return None
+
+
+def local_condition(init_state, name_black='', name_white='', game_id='', my_turn=BLACK):
+    """Build a game condition dictionary for a game which does not come from the server."""
+    return {'Game_Summary': {
+        'Game_ID': game_id,
+        'Name+': name_black,
+        'Name-': name_white,
+        'Your_Turn': my_turn,
+        'To_Move': init_state.to_move,
+        'Rematch_On_Draw': 'NO',
+        'Time': {'Time_Unit': '1sec', 'Total_Time': '-', 'Byoyomi': '-', 'Least_Time_Per_Move': '-'},
+        'Position': str(init_state),
+    }}
 
 
 class Game:
 
     def __init__(self, game_condition):
-        self.init_state, self.history = self.__load_text(game_condition['Game_Summary']['Position'])
+        self.init_state, history = self.__load_text(game_condition['Game_Summary']['Position'])
         self.state = self.init_state.copy()
+        self.history = []
+        self.history_lines = []  # rendered history, appended by move()
+        self.autosave = None  # core.autosave.AutoSaver which receives every move
         self.id = game_condition['Game_Summary']['Game_ID']
+        self.start_time = time.strftime('%Y/%m/%d %H:%M:%S')  # in the CSA format of $START_TIME
         self.my_turn = game_condition['Game_Summary']['Your_Turn']
         self.condition = game_condition
 
+        # position table for repetition, updated by move()
+        self.hash = hash_of(self.state)
+        self.positions = {self.hash: (1, 0)}  # {hash: (occurrences, ply of the first occurrence)}
+        self.checks = {BLACK: 0, WHITE: 0}  # number of the last moves of each turn which all gave check
+        self.kings = {t: king_square(self.state, t) for t in TURNS}
+
+        # moves already played before this game condition was sent
+        for mv in history:
+            self.move(mv)
+
+    @classmethod
+    def from_record(cls, info, init_state, history=(), my_turn=BLACK):
+        """
+        Create a game from the tuple of Record.read.
+        @param my_turn the turn treated as 'You' in the summary
+        """
+        game = cls(local_condition(init_state, info.get('Name+', ''), info.get('Name-', ''), info.get('Event', ''),
+                                   my_turn))
+        for mv in history:
+            game.move(mv)
+        return game
+
     def __str__(self):
         s = self.condition['Game_Summary']
         buf = list()
@@ -42,24 +115,89 @@ class Game:
     def is_my_turn(self):
         return self.state.to_move == self.my_turn
 
-    def history_str(self):
-        width = 4
+    def is_over(self):
+        return bool(self.history) and self.history[-1].is_special
+
+    def result(self, turn=None):
+        """@return '#WIN', '#LOSE' or '#DRAW' seen from the turn (default: my turn), decided by winner()"""
+        winner = self.winner()
+        if winner is None:
+            return '#DRAW'
+        return '#WIN' if winner == (turn or self.my_turn) else '#LOSE'
+
+    def winner(self):
+        """@return BLACK or WHITE if the last special move decides the winner, otherwise None (draw or unknown)"""
+        return winner_of(self.history, self.state.to_move)
+
+    def history_str(self, width=4):
         if not self.history:
             return 'no history'
-        buf = ['{:03d}: {}'.format(i, h) for i, h in enumerate(self.history)]
-        buf = ['{:20s}{}'.format(h, '\n' * (i % width - width + 2)) for i, h in enumerate(buf)]
-        return ''.join(buf)
+        lines = self.history_lines
+        buf = [''.join('{:20s}'.format(h) for h in lines[i:i + width]) for i in range(0, len(lines), width)]
+        return '\n'.join(buf) + ('\n' if len(lines) % width == 0 else '')
+
+    def history_range(self, start=0, stop=None):
+        """@return list of rendered history lines from start to stop (exclusive), e.g. ['000: +7776FU', ...]"""
+        return self.history_lines[start:stop]
+
+    def occurrences(self):
+        """@return number of times the current position has appeared"""
+        return self.positions[self.hash][0]
+
+    def repetition(self, mv=None):
+        """
+        Find repetition (sennichite) after the normal move (default: in the current position) in O(1).
+        The side which has checked with every move since the first occurrence of the position loses.
+        @return None, (SENNICHITE, None) for a draw, or (OUTE_SENNICHITE, turn) for perpetual check by the turn
+        """
+        h, ply, checks = self.hash, len(self.history), self.checks
+        if mv is not None:
+            h = next_hash(h, self.state, mv)
+            n, first = self.positions.get(h, (0, None))
+            if n + 1 < REPETITION_LIMIT:
+                return None
+            undo = self.state.apply_move(mv)
+            check = is_in_check(self.state)
+            self.state.undo_move(mv, undo)
+            checks = dict(checks)
+            checks[mv.turn] = checks[mv.turn] + 1 if check else 0
+            ply += 1
+        else:
+            n, first = self.positions[h]
+            if n < REPETITION_LIMIT:
+                return None
+
+        # the position is the same, so the cycle has even plies and each side has made half of them
+        for turn in TURNS:
+            if checks[turn] * 2 >= ply - first:
+                return OUTE_SENNICHITE, turn
+        return SENNICHITE, None
 
     def __load_text(self, text):
         game_records = Record.read(text.splitlines())
         return game_records[0][1:]
 
-    def move(self, mv):
+    def move(self, mv, check=False):
+        """
+        @param check if True, raise IllegalMoveError instead of playing a move which breaks the rules
+        """
+        if check:
+            if self.is_over():
+                raise IllegalMoveError('{}: game is over'.format(mv))
+            reason = None if mv.is_special else check_move(self.state, mv)
+            if reason:
+                raise IllegalMoveError('{}: {}'.format(mv, reason))
         if not mv.is_special:
-            captured = self.state.board[mv.move_to]
-            if captured[0] in TURNS:
-                self.state.set(POS_HAND, mv.turn + LOWER_PIECE_TYPE(captured[1:]))
-            self.state.reset(mv.move_from, mv.turn + mv.piece_type)
-            self.state.set(mv.move_to, mv.turn + mv.piece_type)
-            self.state.to_move = FLIP_TURN[mv.turn]
+            self.hash = next_hash(self.hash, self.state, mv)
+            self.state.apply_move(mv)
+            if mv.piece_type == KING:
+                self.kings[mv.turn] = mv.move_to
+            king = self.kings[FLIP_TURN[mv.turn]]
+            check = king is not None and gives_check(self.state, mv, king)
+            self.checks[mv.turn] = self.checks[mv.turn] + 1 if check else 0
+            n, first = self.positions.get(self.hash, (0, len(self.history) + 1))
+            self.positions[self.hash] = (n + 1, first)
+        self.history_lines.append('{:03d}: {}'.format(len(self.history), mv))
         self.history.append(mv)
+        if self.autosave:
+            self.autosave.append(mv)
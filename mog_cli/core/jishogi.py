@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Declaration of win by impasse (jishogi, nyugyoku)
+
+The side to move may send %KACHI when
+  - its king is in the promotion zone,
+  - at least 10 other pieces of the side are in the zone,
+  - its king is not in check, and
+  - the pieces in the zone and in hand count enough points: rooks and bishops (promoted or not)
+    are 5 points, the other pieces except the king 1 point.
+Points needed are 28 for BLACK and 27 for WHITE in the 27-point rule (the CSA server rule),
+and 31 for either side in the 24-point rule, where 24 to 30 points are a draw, not a win.
+
+A wrong declaration loses the game, so it is checked here before it is sent. Most positions are
+rejected by the king square alone, which is cheap enough to test on every move.
+"""
+
+from core import *
+from core.movegen import PROMOTION_ZONE, is_in_check, king_square
+
+RULE_24, RULE_27 = 24, 27
+DEFAULT_RULE = RULE_27
+
+# points needed to win by declaration, by rule and turn
+WIN_POINTS = {
+    RULE_24: {BLACK: 31, WHITE: 31},
+    RULE_27: {BLACK: 28, WHITE: 27},
+}
+MIN_PIECES_IN_ZONE = 10
+
+_BIG_PIECES = {BISHOP, ROOK, PBISHOP, PROOK}
+
+
+def points(state, turn):
+    """@return tuple of (points, number of pieces in the zone except the king) of the turn"""
+    zone = PROMOTION_ZONE[turn]
+    total, pieces = 0, 0
+    for pos, piece in state.board.items():
+        if piece[0] == turn and pos[1] in zone and piece[1:] != KING:
+            pieces += 1
+            total += 5 if piece[1:] in _BIG_PIECES else 1
+    for piece, n in state.hand.items():
+        if piece[0] == turn:
+            total += n * (5 if piece[1:] in _BIG_PIECES else 1)
+    return total, pieces
+
+
+def declaration_error(state, rule=DEFAULT_RULE):
+    """@return reason why the side to move cannot declare win, or None if it can"""
+    turn = state.to_move
+    king = king_square(state, turn)
+    if king is None or king[1] not in PROMOTION_ZONE[turn]:
+        return 'king is not in the zone'
+    total, pieces = points(state, turn)
+    if pieces < MIN_PIECES_IN_ZONE:
+        return '{} pieces in the zone'.format(pieces)
+    if total < WIN_POINTS[rule][turn]:
+        return '{} points'.format(total)
+    if is_in_check(state):
+        return 'king is in check'
+    return None
+
+
+def can_declare_win(state, rule=DEFAULT_RULE):
+    return declaration_error(state, rule) is None
+
+
+if __name__ == '__main__':
+    pass
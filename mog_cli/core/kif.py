@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Read KIF and KI2 records
+
+KIF moves carry the source square, e.g. '７六歩(77)', so they are converted without the board.
+KI2 moves only have the destination and relative notation, e.g. '▲５二金右上'; the board is
+replayed and the moving piece is found among the pieces which can reach the square, with
+check_move deciding between the candidates the notation leaves open.
+
+Both notations, and the board diagrams (BOD) of the KIF header, are read by the same reader.
+Games in one file are split at the first header line after moves; variations ('変化：') are skipped.
+"""
+
+import os
+import re
+
+from core import *
+from core.movegen import check_move, move_sources
+
+# encodings by suffix; Shift_JIS for the classic formats, UTF-8 for .kifu and .ki2u
+KIF_ENCODINGS = {'.kif': 'cp932', '.ki2': 'cp932', '.kifu': 'utf-8', '.ki2u': 'utf-8'}
+KIF_SUFFIXES = tuple(s + c for s in KIF_ENCODINGS for c in ('', '.gz', '.xz'))
+
+_NUMBERS = '一二三四五六七八九'
+_FILES = dict([(c, str(i + 1)) for i, c in enumerate('１２３４５６７８９')] + [(str(i), str(i)) for i in range(1, 10)])
+_RANKS = dict(_FILES, **{c: str(i + 1) for i, c in enumerate(_NUMBERS)})
+
+PIECE_NAMES = {
+    '玉': KING, '王': KING, '飛': ROOK, '龍': PROOK, '竜': PROOK, '角': BISHOP, '馬': PBISHOP,
+    '金': GOLD, '銀': SILVER, '成銀': PSILVER, '全': PSILVER, '桂': KNIGHT, '成桂': PKNIGHT, '圭': PKNIGHT,
+    '香': LANCE, '成香': PLANCE, '杏': PLANCE, '歩': PAWN, 'と': PPAWN,
+}
+
+# handicap games start with the moves of WHITE; {name: squares removed from WHITE}
+HANDICAPS = {
+    '平手': [],
+    '香落ち': ['11'],
+    '右香落ち': ['91'],
+    '角落ち': ['22'],
+    '飛車落ち': ['82'],
+    '飛香落ち': ['82', '11'],
+    '二枚落ち': ['82', '22'],
+    '四枚落ち': ['82', '22', '11', '91'],
+    '六枚落ち': ['82', '22', '11', '91', '81', '21'],
+    '八枚落ち': ['82', '22', '11', '91', '81', '21', '71', '31'],
+    '十枚落ち': ['82', '22', '11', '91', '81', '21', '71', '31', '61', '41'],
+}
+
+# move words of KIF; '反則勝ち' is handled separately as it depends on the turn
+SPECIAL_MOVES = {
+    '投了': '%TORYO',
+    '中断': '%CHUDAN',
+    '千日手': '%SENNICHITE',
+    '持将棋': '%JISHOGI',
+    '切れ負け': '%TIME_UP',
+    '時間切れ': '%TIME_UP',
+    '反則負け': '%ILLEGAL_MOVE',
+    '入玉勝ち': '%KACHI',
+    '詰み': '%TSUMI',
+    '不詰': '%FUZUMI',
+}
+
+# results of the 'まで' line, in the order they are looked for
+_RESULTS = [
+    ('時間切れ', '%TIME_UP'), ('切れ負け', '%TIME_UP'), ('反則', '%ILLEGAL_MOVE'), ('入玉', '%KACHI'),
+    ('千日手', '%SENNICHITE'), ('持将棋', '%JISHOGI'), ('中断', '%CHUDAN'), ('詰', '%TSUMI'), ('勝ち', '%TORYO'),
+]
+
+_HEADERS = {
+    '先手': 'Name+', '下手': 'Name+', '後手': 'Name-', '上手': 'Name-',
+    '棋戦': 'Event', '場所': 'Site', '開始日時': 'Start_Time', '終了日時': 'End_Time', '戦型': 'Opening',
+}
+_HANDS = {'先手の持駒': BLACK, '下手の持駒': BLACK, '後手の持駒': WHITE, '上手の持駒': WHITE}
+_TO_MOVE = {'先手番': BLACK, '下手番': BLACK, '後手番': WHITE, '上手番': WHITE}
+
+_SQUARE = '(?:([１-９1-9])([一二三四五六七八九１-９1-9])|同)'
+_PIECE = '(成[銀桂香]|[玉王飛龍竜角馬金銀全桂圭香杏歩と])'
+_RE_KIF_LINE = re.compile(r'^\s*\d+\s+(\S+)\s*(?:\(\s*(\d+):(\d+)\s*/.*\))?')
+_RE_KIF_MOVE = re.compile('^' + _SQUARE + _PIECE + r'(成|不成)?(?:(打)|\(([1-9])([1-9])\))?\+?$')
+_RE_KI2_MOVE = re.compile('([▲△☗☖])' + _SQUARE + _PIECE + '([右左直]?)([上寄引行]?)(成|不成|生)?(打)?')
+_RE_HEADER = re.compile('^([^\\s：:]+)[：:](.*)$')
+_RE_DATE = re.compile(r'(\d{4})/(\d{1,2})/(\d{1,2})(?:\D+(\d{1,2}):(\d{2})(?::(\d{2}))?)?')
+
+
+class KifFormatError(Exception):
+    pass
+
+
+def kif_encoding(path):
+    """@return encoding of the KIF or KI2 file by its suffix (ignoring .gz and .xz), or None if it is not one"""
+    root, ext = os.path.splitext(path)
+    if ext in ('.gz', '.xz'):
+        ext = os.path.splitext(root)[1]
+    return KIF_ENCODINGS.get(ext.lower())
+
+
+def _is_move(s):
+    # move numbers of KIF are in ASCII, while the file numbers over the board diagram are not
+    return s[0] in '▲△☗☖0123456789'
+
+
+def split_games(iterable):
+    """
+    Split the lines into games without parsing them; a game starts at the first header line after moves.
+    @return iterator of list of lines
+    """
+    lines, moves = [], False
+    for line in iterable:
+        s = line.strip()
+        if not s or s[0] in '*&' or s.startswith(('まで', '変化')):
+            lines.append(line)
+        elif _is_move(s):
+            lines.append(line)
+            moves = True
+        else:
+            if moves:
+                yield lines
+                lines, moves = [], False
+            lines.append(line)
+    if any(x.strip() for x in lines):
+        yield lines
+
+
+def _kanji_number(s):
+    """@return int of '一' to '十八', or of digits"""
+    if s.isdigit():
+        return int(s)
+    if '十' in s:
+        tens, _, ones = s.partition('十')
+        return 10 * (_NUMBERS.index(tens) + 1 if tens else 1) + (_NUMBERS.index(ones) + 1 if ones else 0)
+    return _NUMBERS.index(s) + 1
+
+
+def _set_hand(state, turn, text):
+    for item in re.split('[\\s　]+', text.strip()):
+        if not item or item == 'なし':
+            continue
+        if item[0] not in PIECE_NAMES:
+            raise KifFormatError('unknown piece in hand: {}'.format(item))
+        for _ in range(_kanji_number(item[1:]) if item[1:] else 1):
+            state.set_hand(turn + PIECE_NAMES[item[0]])
+
+
+def _set_rank(state, rank, line):
+    """Set one rank of the board diagram, e.g. '| ・ ・ ・ ・v玉 ・ ・ ・ ・|一'."""
+    cells = line[1:line.index('|', 1)]
+    if len(cells) != 18:
+        raise KifFormatError('broken board: {}'.format(line))
+    for i in range(9):
+        mark, name = cells[2 * i], cells[2 * i + 1]
+        if name in PIECE_NAMES:
+            state.set_board('{}{}'.format(9 - i, rank), (WHITE if mark == 'v' else BLACK) + PIECE_NAMES[name])
+
+
+def _date(text):
+    """@return date and time in the CSA format, or None"""
+    m = _RE_DATE.search(text)
+    if not m:
+        return None
+    y, mo, d, h, mi, sec = m.groups()
+    ret = '{}/{:02d}/{:02d}'.format(y, int(mo), int(d))
+    return ret if h is None else '{} {:02d}:{}:{:02d}'.format(ret, int(h), mi, int(sec or 0))
+
+
+def _initial_state(handicap, diagram):
+    if diagram is not None:
+        return diagram
+    if handicap not in HANDICAPS:
+        raise KifFormatError('unknown handicap: {}'.format(handicap))
+    state = State()
+    state.set_hirate()
+    for pos in HANDICAPS[handicap]:
+        state.reset_board(pos)
+    if HANDICAPS[handicap]:
+        state.to_move = WHITE
+    return state
+
+
+def _kif_move(text, turn, last_to):
+    """@return Move of a KIF move, e.g. '７六歩(77)', '同　歩(76)', '５五角打'"""
+    m = _RE_KIF_MOVE.match(text)
+    if not m:
+        raise KifFormatError('unknown move: {}'.format(text))
+    f, r, name, promote, drop, src_f, src_r = m.groups()
+    to = _FILES[f] + _RANKS[r] if f else last_to
+    if to is None:
+        raise KifFormatError('no previous move: {}'.format(text))
+    pt = PIECE_NAMES[name]
+    if promote == '成':
+        pt = UPPER_PIECE_TYPE(pt)
+    return Move('{}{}{}{}'.format(turn, POS_HAND if drop or src_f is None else src_f + src_r, to, pt))
+
+
+def _forward(turn, src, to):
+    """@return positive if the piece moves toward the opponent, 0 if sideways, negative if backward"""
+    d = int(src[1]) - int(to[1])
+    return d if turn == BLACK else -d
+
+
+def _ki2_move(state, m, last_to):
+    """@return Move of a KI2 move matched by _RE_KI2_MOVE, e.g. '▲５二金右上', '△同　銀成'"""
+    mark, f, r, name, side, vertical, promote, drop = m.groups()
+    turn = BLACK if mark in '▲☗' else WHITE
+    if turn != state.to_move:
+        raise KifFormatError('not the turn: {}'.format(m.group(0)))
+    to = _FILES[f] + _RANKS[r] if f else last_to
+    if to is None:
+        raise KifFormatError('no previous move: {}'.format(m.group(0)))
+    pt = PIECE_NAMES[name]
+
+    sources = [] if drop else move_sources(state, to, pt)
+    if not sources:
+        if pt not in HAND_PIECE_TYPES or not state.hand.get(turn + pt):
+            raise KifFormatError('no piece to move: {}'.format(m.group(0)))
+        return Move('{}{}{}{}'.format(turn, POS_HAND, to, pt))
+
+    if len(sources) > 1 and vertical:
+        # 上 (行): forward, 引: backward, 寄: sideways
+        sign = {'上': 1, '行': 1, '引': -1, '寄': 0}[vertical]
+        sources = [s for s in sources if (_forward(turn, s, to) > 0) - (_forward(turn, s, to) < 0) == sign]
+    if len(sources) > 1 and side:
+        if side == '直':
+            sources = [s for s in sources if s[0] == to[0] and _forward(turn, s, to) > 0]
+        else:
+            # the right side of BLACK is file 1, that of WHITE file 9
+            key = lambda s: int(s[0]) if turn == BLACK else -int(s[0])
+            best = (min if side == '右' else max)(key(s) for s in sources)
+            sources = [s for s in sources if key(s) == best]
+
+    moved = UPPER_PIECE_TYPE(pt) if promote == '成' else pt
+    moves = [Move('{}{}{}{}'.format(turn, s, to, moved)) for s in sources]
+    if len(moves) > 1:
+        moves = [mv for mv in moves if check_move(state, mv) is None]
+    if len(moves) != 1:
+        raise KifFormatError('{} moves match: {}'.format(len(moves), m.group(0)))
+    return moves[0]
+
+
+def _result(text):
+    """@return special move of the result line, e.g. 'まで64手で先手の勝ち'"""
+    for word, special in _RESULTS:
+        if word in text:
+            return special
+    return None
+
+
+class KifRecord:
+    @staticmethod
+    def read(iterable):
+        """
+        @param iterable list or iterator of string in KIF or KI2
+        @return list of tuple, (game_information, initial_state, history) as Record.read
+        """
+        return list(KifRecord.iter_read(iterable))
+
+    @staticmethod
+    def iter_read(iterable):
+        """Streaming version of read, e.g. from a file object."""
+        for lines in split_games(iterable):
+            yield KifRecord.read_game(lines)
+
+    @staticmethod
+    def read_game(lines):
+        """
+        @param lines list of string of one game, as split_games yields
+        @return tuple of (game_information, initial_state, history)
+        """
+        info, history = dict(), list()
+        handicap, diagram, rank = '平手', None, 0
+        init_state, state, turn, last_to = None, None, None, None
+
+        for line in lines:
+            line = line.rstrip('\r\n').replace('同　', '同')
+            s = line.strip()
+            if not s or s[0] in '*#&':
+                continue
+            if s.startswith('変化'):
+                break
+
+            if _is_move(s):
+                if init_state is None:
+                    init_state = _initial_state(handicap, diagram)
+                    state, turn = init_state.copy(), init_state.to_move
+                if history and history[-1].is_special:
+                    continue
+                if s[0] not in '▲△☗☖':
+                    m = _RE_KIF_LINE.match(line)
+                    if not m:
+                        raise KifFormatError('unknown move: {}'.format(s))
+                    text, minutes, seconds = m.groups()
+                    if text in SPECIAL_MOVES:
+                        mv = Move(SPECIAL_MOVES[text])
+                    elif text == '反則勝ち':
+                        mv = Move('%{}ILLEGAL_ACTION'.format(FLIP_TURN[turn]))
+                    else:
+                        mv = _kif_move(text, turn, last_to)
+                        last_to, turn = mv.move_to, FLIP_TURN[turn]
+                    if minutes is not None:
+                        mv.elapsed_time = int(minutes) * 60 + int(seconds)
+                    history.append(mv)
+                else:
+                    for m in _RE_KI2_MOVE.finditer(s):
+                        mv = _ki2_move(state, m, last_to)
+                        state.apply_move(mv)
+                        last_to = mv.move_to
+                        history.append(mv)
+            elif s.startswith('まで'):
+                special = _result(s)
+                if special and not (history and history[-1].is_special):
+                    history.append(Move(special))
+            elif s[0] == '|':
+                if diagram is None:
+                    diagram = State()
+                rank += 1
+                _set_rank(diagram, rank, s)
+            elif s in _TO_MOVE:
+                if diagram is None:
+                    diagram = State()
+                diagram.to_move = _TO_MOVE[s]
+            else:
+                m = _RE_HEADER.match(s)
+                if not m:
+                    continue
+                key, value = m.group(1), m.group(2).strip()
+                if key in _HANDS:
+                    if diagram is None:
+                        diagram = State()
+                    _set_hand(diagram, _HANDS[key], value)
+                elif key == '手合割':
+                    handicap = value
+                elif key in ('開始日時', '終了日時'):
+                    value = _date(value)
+                    if value:
+                        info[_HEADERS[key]] = value
+                elif key in _HEADERS and value:
+                    info[_HEADERS[key]] = value
+
+        if init_state is None:
+            init_state = _initial_state(handicap, diagram)
+        return info, init_state, history
+
+
+if __name__ == '__main__':
+    pass
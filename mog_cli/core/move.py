@@ -9,7 +9,7 @@ class Move:
     def __init__(self, move_str, elapsed_time=None):
         move_str = move_str.upper()
 
-        if move_str.startswith('#'):
+        if move_str[0] in '#%':  # game end reason or special move
             self.is_special = True
             self.turn = None
             self.move_from = None
@@ -41,3 +41,9 @@ class Move:
 
     def __repr__(self):
         return 'Move({})'.format(self.__str__())
+
+    def __eq__(self, other):
+        return isinstance(other, Move) and (self.move_str, self.elapsed_time) == (other.move_str, other.elapsed_time)
+
+    def __hash__(self):
+        return hash((self.move_str, self.elapsed_time))
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Move generation and legality rules
+
+Works directly on the State dictionaries; moves are made and taken back in place
+with State.apply_move/undo_move instead of copying the state.
+"""
+
+from core import *
+
+# squares ordered as in the CSA board text (P1 from file 9 to 1, ..., P9)
+SQUARES = ['{}{}'.format(f, r) for r in range(1, 10) for f in range(9, 0, -1)]
+
+# direction vectors (file, rank) seen from BLACK; rank decreases toward the opponent
+_N, _S, _E, _W = (0, -1), (0, 1), (-1, 0), (1, 0)
+_NE, _NW, _SE, _SW = (-1, -1), (1, -1), (-1, 1), (1, 1)
+_KNIGHT_DIRS = [(-1, -2), (1, -2)]
+_ORTHOGONAL = [_N, _S, _E, _W]
+_DIAGONAL = [_NE, _NW, _SE, _SW]
+_GOLD_STEPS = [_N, _NE, _NW, _E, _W, _S]
+
+_STEPS = {
+    KING: _ORTHOGONAL + _DIAGONAL,
+    PAWN: [_N],
+    LANCE: [],
+    KNIGHT: _KNIGHT_DIRS,
+    SILVER: [_N, _NE, _NW, _SE, _SW],
+    GOLD: _GOLD_STEPS,
+    BISHOP: [],
+    ROOK: [],
+    PPAWN: _GOLD_STEPS,
+    PLANCE: _GOLD_STEPS,
+    PKNIGHT: _GOLD_STEPS,
+    PSILVER: _GOLD_STEPS,
+    PBISHOP: _ORTHOGONAL,
+    PROOK: _DIAGONAL,
+}
+_SLIDES = {
+    LANCE: [_N],
+    BISHOP: _DIAGONAL,
+    ROOK: _ORTHOGONAL,
+    PBISHOP: _DIAGONAL,
+    PROOK: _ORTHOGONAL,
+}
+
+
+def _flip(d):
+    return -d[0], -d[1]
+
+
+def _for_turn(table):
+    return {
+        BLACK: {pt: list(ds) for pt, ds in table.items()},
+        WHITE: {pt: [_flip(d) for d in ds] for pt, ds in table.items()},
+    }
+
+
+# {turn: {piece_type: [direction]}}
+STEP_DIRS = _for_turn(_STEPS)
+SLIDE_DIRS = _for_turn(_SLIDES)
+
+
+def _build_rays():
+    rays = {}
+    for sq in SQUARES:
+        f, r = int(sq[0]), int(sq[1])
+        d = {}
+        for df, dr in _ORTHOGONAL + _DIAGONAL + _KNIGHT_DIRS + [_flip(k) for k in _KNIGHT_DIRS]:
+            ray = []
+            x, y = f + df, r + dr
+            while 1 <= x <= 9 and 1 <= y <= 9:
+                ray.append('{}{}'.format(x, y))
+                x, y = x + df, y + dr
+            d[(df, dr)] = ray
+        rays[sq] = d
+    return rays
+
+
+# {square: {direction: [squares along the direction until the edge]}}
+RAYS = _build_rays()
+
+# {square: set of squares on the lines from the square}; only pieces on them can be pinned
+LINES = {sq: {x for d in _ORTHOGONAL + _DIAGONAL for x in RAYS[sq][d]} for sq in SQUARES}
+
+# {(square, square on its lines): direction from the first to the second}
+_LINE_DIRS = {(sq, x): d for sq in SQUARES for d in _ORTHOGONAL + _DIAGONAL for x in RAYS[sq][d]}
+
+# ranks where the pieces of each turn can promote
+PROMOTION_ZONE = {BLACK: '123', WHITE: '789'}
+
+# ranks where the piece could never move again, relative to each turn
+_DEAD_RANKS = {
+    BLACK: {PAWN: '1', LANCE: '1', KNIGHT: '12'},
+    WHITE: {PAWN: '9', LANCE: '9', KNIGHT: '89'},
+}
+
+
+def king_square(state, turn):
+    """@return square of the king of the turn, or None if the turn has no king (e.g. attacker in tsume)"""
+    king = turn + KING
+    for pos, piece in state.board.items():
+        if piece == king:
+            return pos
+    return None
+
+
+def is_attacked(state, pos, by):
+    """@return True if the square is attacked by any piece of the turn 'by'"""
+    board = state.board
+    steps, slides = STEP_DIRS[by], SLIDE_DIRS[by]
+
+    for d, ray in RAYS[pos].items():
+        if not ray:
+            continue
+        back = _flip(d)
+        if d in ((-1, 2), (1, 2), (-1, -2), (1, -2)):
+            # knights jump, so only the first square counts
+            piece = board.get(ray[0])
+            if piece and piece[0] == by and back in steps[piece[1:]]:
+                return True
+            continue
+        for i, sq in enumerate(ray):
+            piece = board.get(sq)
+            if piece is None:
+                continue
+            if piece[0] == by:
+                pt = piece[1:]
+                if back in slides.get(pt, ()) or (i == 0 and back in steps[pt]):
+                    return True
+            break
+    return False
+
+
+def is_in_check(state, turn=None):
+    """@return True if the king of the turn (default: side to move) is attacked"""
+    turn = turn or state.to_move
+    pos = king_square(state, turn)
+    return pos is not None and is_attacked(state, pos, FLIP_TURN[turn])
+
+
+def _targets(board, turn, pos, pt):
+    """Generate squares where the piece of the turn on pos can move, ignoring checks."""
+    for d in STEP_DIRS[turn][pt]:
+        ray = RAYS[pos][d]
+        if ray:
+            piece = board.get(ray[0])
+            if piece is None or piece[0] != turn:
+                yield ray[0]
+    for d in SLIDE_DIRS[turn].get(pt, ()):
+        for sq in RAYS[pos][d]:
+            piece = board.get(sq)
+            if piece is None:
+                yield sq
+                continue
+            if piece[0] != turn:
+                yield sq
+            break
+
+
+def move_sources(state, to, pt):
+    """
+    @return list of squares of the pieces of type pt of the side to move which can move to the square,
+            ignoring checks
+    """
+    board, turn = state.board, state.to_move
+    piece = turn + pt
+    return [pos for pos, p in board.items() if p == piece and to in _targets(board, turn, pos, pt)]
+
+
+def gives_check(state, mv, king):
+    """
+    Faster is_in_check for the position just after a normal move; only the moved piece and
+    the line it has left are looked at.
+    @param state State after the move
+    @param king square of the king of the opponent
+    """
+    board = state.board
+    turn = mv.turn
+    to, pt = mv.move_to, mv.piece_type
+    d = _LINE_DIRS.get((to, king))
+    if d is None:
+        # only knights attack off the lines
+        if pt == KNIGHT:
+            for k in STEP_DIRS[turn][KNIGHT]:
+                ray = RAYS[to][k]
+                if ray and ray[0] == king:
+                    return True
+    elif d in SLIDE_DIRS[turn].get(pt, ()):
+        for sq in RAYS[to][d]:
+            if sq == king:
+                return True
+            if sq in board:
+                break
+    elif d in STEP_DIRS[turn][pt] and RAYS[to][d][0] == king:
+        return True
+
+    # discovered check
+    d = _LINE_DIRS.get((king, mv.move_from))
+    if d is not None:
+        back = _flip(d)
+        for sq in RAYS[king][d]:
+            piece = board.get(sq)
+            if piece is not None:
+                return piece[0] == turn and back in SLIDE_DIRS[turn].get(piece[1:], ())
+    return False
+
+
+def _board_moves(state, turn):
+    """Generate pseudo-legal board moves as tuples of (from, to, piece_type)."""
+    board = state.board
+    zone = PROMOTION_ZONE[turn]
+    dead = _DEAD_RANKS[turn]
+
+    for pos, piece in list(board.items()):
+        if piece[0] != turn:
+            continue
+        pt = piece[1:]
+        promoted = UPPER_PIECE_TYPE(pt)
+        for to in _targets(board, turn, pos, pt):
+            if promoted != pt and (pos[1] in zone or to[1] in zone):
+                yield pos, to, promoted
+                if to[1] in dead.get(pt, ''):
+                    continue
+            yield pos, to, pt
+
+
+def _drop_moves(state, turn):
+    """Generate pseudo-legal drops except uchifuzume as tuples of (from, to, piece_type)."""
+    board = state.board
+    dead = _DEAD_RANKS[turn]
+    in_hand = [pt for pt in HAND_PIECE_TYPES if state.hand.get(turn + pt, 0) > 0]
+    if not in_hand:
+        return
+
+    pawn_files = {pos[0] for pos, piece in board.items() if piece == turn + PAWN}
+    for sq in SQUARES:
+        if sq in board:
+            continue
+        for pt in in_hand:
+            if sq[1] in dead.get(pt, ''):
+                continue
+            if pt == PAWN and sq[0] in pawn_files:
+                continue  # nifu
+            yield POS_HAND, sq, pt
+
+
+def _make(turn, move_from, move_to, piece_type):
+    return Move('{}{}{}{}'.format(turn, move_from, move_to, piece_type))
+
+
+def _is_pawn_drop_mate(state, mv):
+    """uchifuzume: dropping a pawn which checkmates is illegal"""
+    if mv.move_from != POS_HAND or mv.piece_type != PAWN:
+        return False
+    undo = state.apply_move(mv)
+    try:
+        return is_in_check(state) and not has_legal_move(state)
+    finally:
+        state.undo_move(mv, undo)
+
+
+def _legal_moves(state, only_checks=False):
+    turn = state.to_move
+    enemy = FLIP_TURN[turn]
+    my_king = king_square(state, turn)
+    in_check = my_king is not None and is_attacked(state, my_king, enemy)
+    pin_lines = LINES[my_king] if my_king is not None else ()
+
+    for move_from, move_to, piece_type in list(_board_moves(state, turn)) + list(_drop_moves(state, turn)):
+        mv = _make(turn, move_from, move_to, piece_type)
+
+        # the king cannot be exposed by drops or by pieces off its lines unless it is already in check
+        needs_test = my_king is not None and (in_check or move_from == my_king or move_from in pin_lines)
+        if needs_test or only_checks:
+            undo = state.apply_move(mv)
+            try:
+                king = move_to if move_from == my_king else my_king
+                if needs_test and is_attacked(state, king, enemy):
+                    continue
+                if only_checks and not is_in_check(state, enemy):
+                    continue
+            finally:
+                state.undo_move(mv, undo)
+        if _is_pawn_drop_mate(state, mv):
+            continue
+        yield mv
+
+
+def generate_moves(state):
+    """@return list of all legal moves for the side to move"""
+    return list(_legal_moves(state))
+
+
+def generate_checks(state):
+    """@return list of legal moves which check the opponent king"""
+    return list(_legal_moves(state, only_checks=True))
+
+
+def has_legal_move(state):
+    return any(True for _ in _legal_moves(state))
+
+
+def is_checkmate(state):
+    """@return True if the side to move is checkmated"""
+    return is_in_check(state) and not has_legal_move(state)
+
+
+def check_position(state):
+    """
+    Check the piece counts, the kings, dead pieces, nifu and whether the king of the side not to move is attacked.
+    @return reason why the position is illegal, or None
+    """
+    counts = {}
+    for piece, n in state.hand.items():
+        counts[piece[1:]] = counts.get(piece[1:], 0) + n
+    pawn_files = set()
+    for pos, piece in state.board.items():
+        turn, pt = piece[0], piece[1:]
+        base = LOWER_PIECE_TYPE(pt)
+        counts[base] = counts.get(base, 0) + 1
+        if pos[1] in _DEAD_RANKS[turn].get(pt, ''):
+            return 'dead piece at {}: {}'.format(pos, piece)
+        if pt == PAWN:
+            if (turn, pos[0]) in pawn_files:
+                return 'nifu at file {}'.format(pos[0])
+            pawn_files.add((turn, pos[0]))
+    for pt, n in counts.items():
+        if n > PIECE_COUNTS[pt]:
+            return 'too many pieces: {} {}'.format(n, pt)
+    for turn in TURNS:
+        if list(state.board.values()).count(turn + KING) > 1:
+            return 'too many kings: {}'.format(turn)
+    if is_in_check(state, FLIP_TURN[state.to_move]):
+        return 'king of {} can be captured'.format(FLIP_TURN[state.to_move])
+    return None
+
+
+def check_move(state, mv):
+    """
+    Check one normal move with every rule, without generating the other moves.
+    @return reason why the move is illegal in the state, or None
+    """
+    turn = state.to_move
+    if mv.turn != turn:
+        return 'not the turn of {}'.format(mv.turn)
+
+    board = state.board
+    dead = _DEAD_RANKS[turn]
+    if mv.move_from == POS_HAND:
+        if not state.hand.get(turn + mv.piece_type):
+            return 'no {} in hand'.format(mv.piece_type)
+        if mv.move_to in board:
+            return 'drop on occupied square'
+        if mv.move_to[1] in dead.get(mv.piece_type, ''):
+            return 'drop on the last ranks'
+        if mv.piece_type == PAWN and any(board.get(mv.move_to[0] + r) == turn + PAWN for r in '123456789'):
+            return 'nifu'
+    else:
+        piece = board.get(mv.move_from)
+        if piece is None or piece[0] != turn:
+            return 'no piece to move'
+        pt = piece[1:]
+        if mv.move_to not in _targets(board, turn, mv.move_from, pt):
+            return 'unreachable square'
+        if mv.piece_type != pt:
+            zone = PROMOTION_ZONE[turn]
+            if mv.piece_type != UPPER_PIECE_TYPE(pt) or (mv.move_from[1] not in zone and mv.move_to[1] not in zone):
+                return 'illegal promotion'
+        elif mv.move_to[1] in dead.get(pt, ''):
+            return 'must promote'
+
+    undo = state.apply_move(mv)
+    try:
+        if is_in_check(state, turn):
+            return 'king left in check'
+        if mv.move_from == POS_HAND and mv.piece_type == PAWN and is_in_check(state) and not has_legal_move(state):
+            return 'uchifuzume'
+    finally:
+        state.undo_move(mv, undo)
+    return None
+
+
+if __name__ == '__main__':
+    pass
@@ -6,6 +6,9 @@ Read and write CSA-format record
 @see protocol -> http://www.computer-shogi.org/protocol/record_v21.html
 """
 
+import gzip
+import lzma
+import os
 import re
 from core import *
 
@@ -17,10 +20,20 @@ _RE_NAME_BLACK = re.compile(r'^N[+](.+)')
 _RE_NAME_WHITE = re.compile(r'^N[-](.+)')
 _RE_EVENT = re.compile(r'^[$]EVENT:(.+)')
 _RE_SITE = re.compile(r'^[$]SITE:(.+)')
-_RE_START_TIME = re.compile(r'^[$]START_TIME:([0-9]{4})/([0-9]{2})/([0-9]{2})(?: ([0-9]{2}):([0-9]{2}):([0-9]{2}))?$')
-_RE_END_TIME = re.compile(r'^[$]END_TIME:([0-9]{4})/([0-9]{2})/([0-9]{2})(?: ([0-9]{2}):([0-9]{2}):([0-9]{2}))?$')
-_RE_TIME_LIMIT = re.compile(r'^[$]TIME_LIMIT:[0-9]{2}:[0-9]{2}[+][0-9]{2}$')
+_RE_START_TIME = re.compile(r'^[$]START_TIME:([0-9]{4}/[0-9]{2}/[0-9]{2}(?: [0-9]{2}:[0-9]{2}:[0-9]{2})?)$')
+_RE_END_TIME = re.compile(r'^[$]END_TIME:([0-9]{4}/[0-9]{2}/[0-9]{2}(?: [0-9]{2}:[0-9]{2}:[0-9]{2})?)$')
+_RE_TIME_LIMIT = re.compile(r'^[$]TIME_LIMIT:([0-9]{2}:[0-9]{2}[+][0-9]{2})$')
 _RE_OPENING = re.compile(r'^[$]OPENING:(.+)')
+_INFO_PATTERNS = [
+    ('Name+', _RE_NAME_BLACK),
+    ('Name-', _RE_NAME_WHITE),
+    ('Event', _RE_EVENT),
+    ('Site', _RE_SITE),
+    ('Start_Time', _RE_START_TIME),
+    ('End_Time', _RE_END_TIME),
+    ('Time_Limit', _RE_TIME_LIMIT),
+    ('Opening', _RE_OPENING),
+]
 
 # patterns for initial state
 _RE_PRESET = re.compile(r'^PI(?:[1-9]{2}[A-Z]{2})*$')
@@ -29,9 +42,58 @@ _RE_PIECE = re.compile(r'^P[+-](?:[0-9]{2}[A-Z]{2})+$')
 _RE_TO_MOVE = re.compile(r'^[+-]$')
 
 # patterns for move history
-_RE_MOVE = re.compile(r'[+-][0-9]{2}[1-9]{2}[A-Z]{2}$')
-_RE_SPECIAL_MOVE = re.compile(r'%.*$')
-_RE_TIME = re.compile(r'T[0-9]*$')
+_RE_MOVE = re.compile(r'^[+-][0-9]{2}[1-9]{2}[A-Z]{2}$')
+_RE_SPECIAL_MOVE = re.compile(r'^%[-+A-Z_]+$')
+_RE_TIME = re.compile(r'^T[0-9]*$')
+_INFO_FORMATS = {
+    'Name+': 'N+{}',
+    'Name-': 'N-{}',
+    'Event': '$EVENT:{}',
+    'Site': '$SITE:{}',
+    'Start_Time': '$START_TIME:{}',
+    'End_Time': '$END_TIME:{}',
+    'Time_Limit': '$TIME_LIMIT:{}',
+    'Opening': '$OPENING:{}',
+}
+
+# game end reasons of the server, and the special moves written for them
+REASON_SPECIAL_MOVES = {
+    '#RESIGN': '%TORYO',
+    '#TIME_UP': '%TIME_UP',
+    '#ILLEGAL_MOVE': '%ILLEGAL_MOVE',
+    '#SENNICHITE': '%SENNICHITE',
+    '#JISHOGI': '%KACHI',
+    '#MAX_MOVES': '%MAX_MOVES',
+    '#CHUDAN': '%CHUDAN',
+}
+
+
+# compressed records are opened by their suffixes
+_OPENERS = {'.gz': gzip.open, '.xz': lzma.open}
+
+
+def open_record(path, mode='r', encoding='utf-8'):
+    """
+    Open the record file, decompressing .gz and .xz files as they are read.
+    @param mode 'r' for text, 'rb' for bytes
+    @param encoding encoding of the text, e.g. 'cp932' for KIF files
+    """
+    opener = _OPENERS.get(os.path.splitext(path)[1], open)
+    return opener(path, 'rb') if 'b' in mode else opener(path, 'rt', encoding=encoding)
+
+
+def move_lines(mv):
+    """
+    @return CSA lines of the move, e.g. ['+7776FU', 'T3']
+            A game end reason of the server is written as its special move, or as a comment without the time
+            if there is none, e.g. ["'#OUTE_SENNICHITE"]
+    """
+    move_str = mv.move_str
+    if move_str.startswith('#'):
+        if move_str not in REASON_SPECIAL_MOVES:
+            return ["'" + move_str]
+        move_str = REASON_SPECIAL_MOVES[move_str]
+    return [move_str] + ([] if mv.elapsed_time is None else ['T{}'.format(mv.elapsed_time)])
 
 
 def chunk(iterable, chunk_size):
@@ -48,56 +110,113 @@ class Record:
                 initial_state   : State object
                 history         : list of Move object
         """
+        return list(Record.iter_read(iterable))
+
+    @staticmethod
+    def iter_read(iterable):
+        """
+        Streaming version of read.
+        Games separated by '/' lines are yielded one by one without holding the whole input.
+        @param iterable list or iterator of string, e.g. file object
+        @return iterator of tuple, (game_information, initial_state, history)
+        """
+        info, state, history = dict(), State(), list()
+        found, yielded = False, False
 
-        ### preprocessor
-        lines = list()
         for line in iterable:
             if line.startswith("'"):  # comment line
                 continue
-            for stmt in line.strip('\n').split(','):  # multiple statements
-                if stmt.strip():
-                    lines.append(stmt)
+            for stmt in line.rstrip('\r\n').split(','):  # multiple statements
+                if not stmt.strip():
+                    continue
 
-        # get version
-        versions = [_RE_VERSION.match(line).group(1) for line in lines if _RE_VERSION.match(line)]
-        version = versions[0] if versions else '1.0'
+                if stmt == '/':  # separator
+                    yield info, state, history
+                    info, state, history = dict(), State(), list()
+                    found, yielded = False, True
+                    continue
 
-        # TODO: read separator and multiple games
+                found = True
+                Record.__read_statement(stmt, info, state, history)
 
-        ret = list()
-        state = State()
-        history = list()
-
-        for line in lines:
-            # TODO: read game info
-            if _RE_PRESET.match(line):
-                xs = chunk(line[2:], 4)
-                state.set_hirate()
-                for p in xs:
-                    state.reset_board(p[:2])
-
-            elif _RE_BOARD.match(line):
-                rank = line[1]
-                xs = chunk(line[2:], 3)
-                for i, p in enumerate(xs):
-                    # print(p + ' ' + str(p[0] in TURNS) + ' ' + p[0])
-                    if p[0] in TURNS:
-                        state.set('{}{}'.format(9 - i, rank), p)
-
-            elif _RE_PIECE.match(line):
-                turn = line[1]
-                xs = chunk(line[2:], 4)
-                for p in xs:
-                    if p == '00AL':
-                        # TODO: calc the rest of pieces except king
-                        # TODO: set 00al already set
-                        state.set(p[0:2], turn + p[2:4])
-
-            elif _RE_TO_MOVE.match(line):
-                state.to_move = line
-            # TODO: parse move history
-
-        ret.append(({}, state, history))
+        if found or not yielded:
+            yield info, state, history
 
+    @staticmethod
+    def write(info, init_state, history):
+        """
+        @param info game information as read returns
+        @param init_state State object
+        @param history list of Move object
+        @return list of string (without line feeds)
+        """
+        ret = list()
+        if 'Version' in info:
+            ret.append('V{}'.format(info['Version']))
+        for key, _ in _INFO_PATTERNS:
+            if key in info:
+                ret.append(_INFO_FORMATS[key].format(info[key]))
+        ret.extend(str(init_state).splitlines())
+        for mv in history:
+            ret.extend(move_lines(mv))
         return ret
 
+    @staticmethod
+    def __set_rest(state, turn):
+        """00AL: the pieces on neither the board nor the hands, except the kings, go to the hand of the turn"""
+        used = {}
+        for piece in state.board.values():
+            pt = LOWER_PIECE_TYPE(piece[1:])
+            used[pt] = used.get(pt, 0) + 1
+        for piece, n in state.hand.items():
+            used[piece[1:]] = used.get(piece[1:], 0) + n
+        for pt in HAND_PIECE_TYPES:
+            for _ in range(PIECE_COUNTS[pt] - used.get(pt, 0)):
+                state.set_hand(turn + pt)
+
+    @staticmethod
+    def __read_statement(line, info, state, history):
+        if _RE_MOVE.match(line):
+            history.append(Move(line))
+
+        elif _RE_TIME.match(line):
+            if history:
+                history[-1].elapsed_time = int(line[1:]) if len(line) > 1 else None
+
+        elif _RE_SPECIAL_MOVE.match(line):
+            history.append(Move(line))
+
+        elif _RE_BOARD.match(line):
+            rank = line[1]
+            xs = chunk(line[2:], 3)
+            for i, p in enumerate(xs):
+                if p[0] in TURNS:
+                    state.set('{}{}'.format(9 - i, rank), p)
+
+        elif _RE_PIECE.match(line):
+            turn = line[1]
+            xs = chunk(line[2:], 4)
+            for p in xs:
+                if p == '00AL':
+                    Record.__set_rest(state, turn)
+                else:
+                    state.set(p[0:2], turn + p[2:4])
+
+        elif _RE_PRESET.match(line):
+            xs = chunk(line[2:], 4)
+            state.set_hirate()
+            for p in xs:
+                state.reset_board(p[:2])
+
+        elif _RE_TO_MOVE.match(line):
+            state.to_move = line
+
+        elif _RE_VERSION.match(line):
+            info['Version'] = _RE_VERSION.match(line).group(1)
+
+        else:
+            for key, pat in _INFO_PATTERNS:
+                m = pat.match(line)
+                if m:
+                    info[key] = m.group(1)
+                    break
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Step through the history of a game
+
+Copies of the state are kept every 'interval' plies, so a jump to any ply costs one
+State.copy() and less than 'interval' moves. Single steps make or take back one move in place.
+"""
+
+from core import *
+
+DEFAULT_INTERVAL = 16
+
+
+class Replay:
+    """
+    Cursor over the positions of a game; ply N is the position after the first N entries of game.history.
+    The game is not modified, and moves appended to it later become reachable.
+    """
+
+    def __init__(self, game, interval=DEFAULT_INTERVAL):
+        self.game = game
+        self.interval = interval
+        self.snapshots = [game.init_state.copy()]  # states at ply 0, interval, 2 * interval, ...
+        self.ply = 0
+        self.state = game.init_state.copy()
+        self.undo = []  # undo info (None for special moves) of the moves made since the last jump
+
+    def __len__(self):
+        return len(self.game.history)
+
+    def __extend_snapshots(self, ply):
+        """Take snapshots up to the ply, replaying from the last one."""
+        last = (len(self.snapshots) - 1) * self.interval
+        if last + self.interval > ply:
+            return
+        state = self.snapshots[-1].copy()
+        for i in range(last, ply - ply % self.interval):
+            mv = self.game.history[i]
+            if not mv.is_special:
+                state.apply_move(mv)
+            if (i + 1) % self.interval == 0:
+                self.snapshots.append(state.copy())
+
+    def last_move(self):
+        """@return Move which led to the current position, or None at the start"""
+        return self.game.history[self.ply - 1] if self.ply else None
+
+    def jump(self, ply):
+        """Move to the ply, clipped to the range of the history. @return the current ply"""
+        ply = max(0, min(ply, len(self)))
+        if self.ply <= ply < self.ply + self.interval:
+            return self.forward(ply - self.ply)
+
+        self.__extend_snapshots(ply)
+        base = ply - ply % self.interval
+        self.state = self.snapshots[base // self.interval].copy()
+        self.ply = base
+        self.undo = []
+        return self.forward(ply - base)
+
+    def forward(self, n=1):
+        """@return the current ply"""
+        for _ in range(min(n, len(self) - self.ply)):
+            mv = self.game.history[self.ply]
+            self.undo.append(None if mv.is_special else self.state.apply_move(mv))
+            self.ply += 1
+        return self.ply
+
+    def backward(self, n=1):
+        """@return the current ply"""
+        target = max(0, self.ply - n)
+        if self.ply - target > len(self.undo):
+            return self.jump(target)
+        while self.ply > target:
+            self.ply -= 1
+            u = self.undo.pop()
+            if u is not None:
+                self.state.undo_move(self.game.history[self.ply], u)
+        return self.ply
+
+
+if __name__ == '__main__':
+    pass
@@ -4,34 +4,82 @@
 
 from core import *
 
+# one letter per piece type for the compact view
+_COMPACT_PIECES = {
+    KING: 'K', PAWN: 'P', LANCE: 'L', KNIGHT: 'N', SILVER: 'S', GOLD: 'G', BISHOP: 'B', ROOK: 'R',
+    PPAWN: '+P', PLANCE: '+L', PKNIGHT: '+N', PSILVER: '+S', PBISHOP: '+B', PROOK: '+R',
+}
+_FILE_HEADER = ' 9 8 7 6 5 4 3 2 1'
+
+
+def _compact_piece(piece):
+    if piece is None:
+        return ' .'
+    p = _COMPACT_PIECES[piece[1:]]
+    return '{:>2}'.format(p if piece[0] == BLACK else p.lower())
+
 
 class State:
     """Represents the state of the game"""
     # TODO: consider to be immutable class
 
-    def __init__(self, to_move=BLACK, board={}, hand={}):
+    def __init__(self, to_move=BLACK, board=None, hand=None):
         self.to_move = to_move
 
         # board: {Pos, Piece} e.g. {'77': '+FU', '51': '-OU'}
-        self.board = board
+        self.board = {} if board is None else board
 
         # hand: {Piece, count} e.g. {'+FU': 3, '-HI': 0}
-        self.hand = hand
+        self.hand = {} if hand is None else hand
+
+        self.__clear_cache()
+
+    def __clear_cache(self):
+        # rendered text is cached by rank and by turn of the hand, and invalidated by the setters
+        self._rows = [None] * 9
+        self._hands = {}
+        self._text = None
+
+    def __row(self, r):
+        """@return tuple of (CSA line, compact line) of the rank"""
+        row = self._rows[r - 1]
+        if row is None:
+            pieces = [self.board.get('{}{}'.format(f, r)) for f in range(9, 0, -1)]
+            row = (
+                'P{}{}'.format(r, ''.join(p or ' * ' for p in pieces)),
+                '{} {}'.format(''.join(_compact_piece(p) for p in pieces), r),
+            )
+            self._rows[r - 1] = row
+        return row
+
+    def __hand(self, t):
+        """@return tuple of (CSA line, compact line) of the hand of the turn"""
+        hand = self._hands.get(t)
+        if hand is None:
+            counts = [(pt, self.hand.get(t + pt, 0)) for pt in HAND_PIECE_TYPES]
+            hand = (
+                'P{}{}'.format(t, ''.join('00{}'.format(pt) * n for pt, n in counts)),
+                '{}: {}'.format(t, ' '.join(
+                    _compact_piece(t + pt).strip() + (str(n) if n > 1 else '')
+                    for pt, n in reversed(counts) if n) or '-'),
+            )
+            self._hands[t] = hand
+        return hand
 
     def __str__(self):
-        buf = []
-
-        # board
-        for r in range(1, 10):
-            buf.append('P{}{}'.format(r, ''.join(self.get_board('{}{}'.format(f, r)) for f in range(9, 0, -1))))
-
-        # hand
-        for t in TURNS:
-            buf.append('P{}{}'.format(t, ''.join('00{}'.format(pt) * self.get_hand(t + pt) for pt in HAND_PIECE_TYPES)))
-
-        # turn to move
-        buf.append(self.to_move)
-
+        if self._text is None:
+            self._text = '\n'.join([self.__row(r)[0] for r in range(1, 10)] + [self.__hand(t)[0] for t in TURNS])
+        return '{}\n{}'.format(self._text, self.to_move)
+
+    def compact_str(self):
+        """
+        Terminal board view with one letter per piece (upper case: BLACK, lower case: WHITE, '+': promoted).
+        Lines are cached as well as the CSA text.
+        """
+        buf = [self.__hand(WHITE)[1], _FILE_HEADER]
+        buf.extend(self.__row(r)[1] for r in range(1, 10))
+        buf.append(self.__hand(BLACK)[1])
+        buf.append('{} to move'.format('BLACK' if self.to_move == BLACK else 'WHITE'))
         return '\n'.join(buf)
 
     def __repr__(self):
@@ -42,16 +90,28 @@ class State:
         return f(self) == f(other)
 
     def copy(self):
-        return State(self.to_move, self.board.copy(), self.hand.copy())
+        ret = State(self.to_move, self.board.copy(), self.hand.copy())
+        ret._rows, ret._hands, ret._text = list(self._rows), dict(self._hands), self._text
+        return ret
 
     def set(self, pos, piece):
         self.set_hand(piece) if pos == POS_HAND else self.set_board(pos, piece)
 
     def set_board(self, pos, piece):
         self.board[pos] = piece
+        self.__invalidate_rank(pos)
 
     def set_hand(self, piece):
-        self.hand[piece] += 1
+        self.hand[piece] = self.hand.get(piece, 0) + 1
+        self.__invalidate_hand(piece)
+
+    def __invalidate_rank(self, pos):
+        self._rows[int(pos[1]) - 1] = None
+        self._text = None
+
+    def __invalidate_hand(self, piece):
+        self._hands.pop(piece[0], None)
+        self._text = None
 
     def get_board(self, pos, empty_val=' * '):
         return self.board.get(pos, empty_val)
@@ -65,10 +125,48 @@ class State:
     def reset_board(self, pos):
         if pos in self.board:
             del self.board[pos]
+            self.__invalidate_rank(pos)
 
     def reset_hand(self, piece):
-        if piece in self.hand:
+        n = self.hand.get(piece, 0)
+        if n > 1:
+            self.hand[piece] = n - 1
+        elif n:
             del self.hand[piece]
+        self.__invalidate_hand(piece)
+
+    def key(self):
+        """Hashable snapshot of the position, e.g. for transposition tables."""
+        return self.to_move, frozenset(self.board.items()), frozenset((k, v) for k, v in self.hand.items() if v)
+
+    def apply_move(self, mv):
+        """
+        Make a normal move on this state.
+        @param mv Move object (not special)
+        @return tuple of (moved piece before the move, captured piece or None) for undo_move
+        """
+        piece_from = mv.turn + mv.piece_type if mv.move_from == POS_HAND else self.board[mv.move_from]
+        captured = self.board.get(mv.move_to)
+        if captured:
+            self.set_hand(mv.turn + LOWER_PIECE_TYPE(captured[1:]))
+        self.reset(mv.move_from, piece_from)
+        self.set_board(mv.move_to, mv.turn + mv.piece_type)
+        self.to_move = FLIP_TURN[mv.turn]
+        return piece_from, captured
+
+    def undo_move(self, mv, undo):
+        """
+        Take back the move made by apply_move.
+        @param undo tuple returned by apply_move
+        """
+        piece_from, captured = undo
+        if captured:
+            self.reset_hand(mv.turn + LOWER_PIECE_TYPE(captured[1:]))
+            self.set_board(mv.move_to, captured)
+        else:
+            self.reset_board(mv.move_to)
+        self.set(mv.move_from, piece_from)
+        self.to_move = mv.turn
 
     def set_hirate(self):
         self.to_move = BLACK
@@ -85,4 +183,5 @@ class State:
             '19': '+KY',
         }
         self.hand = {}
+        self.__clear_cache()
 
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Zobrist hashing of positions
+
+The 64-bit hash is the XOR of one random key per (square, piece), one per (hand piece, count)
+and one for WHITE to move. The keys come from a fixed seed, so hashes are stable across runs
+and can be stored on disk. next_hash() updates the hash by a move without scanning the board.
+"""
+
+import random
+
+from core import *
+from core.movegen import SQUARES
+
+HASH_BITS = 64
+
+_MAX_HAND = 18  # pawns
+
+_rand = random.Random(0x6d6f67)
+BOARD_KEYS = {(pos, t + pt): _rand.getrandbits(HASH_BITS) for pos in SQUARES for t in TURNS for pt in PIECE_TYPES}
+HAND_KEYS = {(t + pt, n): _rand.getrandbits(HASH_BITS) if n else 0
+             for t in TURNS for pt in HAND_PIECE_TYPES for n in range(_MAX_HAND + 1)}
+WHITE_KEY = _rand.getrandbits(HASH_BITS)
+
+
+def hash_of(state):
+    """@return hash of the position from scratch"""
+    h = WHITE_KEY if state.to_move == WHITE else 0
+    for pos, piece in state.board.items():
+        h ^= BOARD_KEYS[pos, piece]
+    for piece, n in state.hand.items():
+        h ^= HAND_KEYS[piece, n]
+    return h
+
+
+def next_hash(h, state, mv):
+    """
+    @param h hash of the state
+    @param state State before the normal move, which is not changed
+    @param mv Move object (not special)
+    @return hash of the position after the move
+    """
+    h ^= WHITE_KEY
+    if mv.move_from == POS_HAND:
+        piece = mv.turn + mv.piece_type
+        n = state.hand.get(piece, 0)
+        h ^= HAND_KEYS[piece, n] ^ HAND_KEYS[piece, n - 1]
+    else:
+        h ^= BOARD_KEYS[mv.move_from, state.board[mv.move_from]]
+
+    captured = state.board.get(mv.move_to)
+    if captured:
+        h ^= BOARD_KEYS[mv.move_to, captured]
+        piece = mv.turn + LOWER_PIECE_TYPE(captured[1:])
+        n = state.hand.get(piece, 0)
+        h ^= HAND_KEYS[piece, n] ^ HAND_KEYS[piece, n + 1]
+    return h ^ BOARD_KEYS[mv.move_to, mv.turn + mv.piece_type]
+
+
+if __name__ == '__main__':
+    pass
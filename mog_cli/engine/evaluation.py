@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Static evaluation: material and piece-square tables
+
+Scores are in centipawn-like units from the side to move.
+evaluate() is the scalar reference, evaluate_batch() scores the array encoding of
+archive.features (piece codes [N, 81], hand counts [N, 14], side [N]) at once.
+"""
+
+import numpy as np
+
+from core import *
+from core.movegen import SQUARES
+from archive.features import PIECE_CODES, HAND_INDEX, NUM_HANDS, encode_board, encode_hand
+
+MATERIAL = {
+    KING: 0, PAWN: 100, LANCE: 300, KNIGHT: 400, SILVER: 500, GOLD: 600, BISHOP: 800, ROOK: 1000,
+    PPAWN: 600, PLANCE: 600, PKNIGHT: 600, PSILVER: 600, PBISHOP: 1100, PROOK: 1300,
+}
+
+# pieces in hand are slightly more flexible than on the board
+HAND_MATERIAL = {pt: MATERIAL[pt] * 11 // 10 for pt in HAND_PIECE_TYPES}
+
+
+def _advance(weight):
+    return lambda f, r: weight * (9 - r)
+
+
+def _king(f, r):
+    # stay on the back ranks, away from the center file
+    return 10 * (r - 5) + 5 * abs(f - 5)
+
+
+def _center(weight):
+    return lambda f, r: -weight * (abs(f - 5) + abs(r - 5))
+
+
+_PST_FUNC = {
+    KING: _king,
+    PAWN: _advance(4),
+    LANCE: _advance(2),
+    KNIGHT: _advance(6),
+    SILVER: _advance(5),
+    GOLD: _center(3),
+    BISHOP: _center(4),
+    ROOK: _advance(3),
+    PPAWN: _center(3),
+    PLANCE: _center(3),
+    PKNIGHT: _center(3),
+    PSILVER: _center(3),
+    PBISHOP: _center(6),
+    PROOK: _center(4),
+}
+
+# {piece_type: {square: bonus}} seen from BLACK; WHITE uses the point-symmetric square
+PST = {pt: {sq: f(int(sq[0]), int(sq[1])) for sq in SQUARES} for pt, f in _PST_FUNC.items()}
+
+
+def _mirror(sq):
+    return '{}{}'.format(10 - int(sq[0]), 10 - int(sq[1]))
+
+
+def piece_value(piece, pos):
+    """@return value of the piece on the square from BLACK"""
+    turn, pt = piece[0], piece[1:]
+    v = MATERIAL[pt] + PST[pt][pos if turn == BLACK else _mirror(pos)]
+    return v if turn == BLACK else -v
+
+
+def evaluate(state):
+    """Scalar reference evaluation. @return score from the side to move"""
+    score = sum(piece_value(piece, pos) for pos, piece in state.board.items())
+    for piece, n in state.hand.items():
+        v = HAND_MATERIAL[piece[1:]] * n
+        score += v if piece[0] == BLACK else -v
+    return score if state.to_move == BLACK else -score
+
+
+def _board_table():
+    table = np.zeros((len(PIECE_CODES) + 1, len(SQUARES)), dtype=np.int32)
+    for piece, code in PIECE_CODES.items():
+        for i, sq in enumerate(SQUARES):
+            table[code, i] = piece_value(piece, sq)
+    return table
+
+
+def _hand_table():
+    table = np.zeros(NUM_HANDS, dtype=np.int32)
+    for piece, i in HAND_INDEX.items():
+        v = HAND_MATERIAL[piece[1:]]
+        table[i] = v if piece[0] == BLACK else -v
+    return table
+
+
+# [piece code, square] -> value from BLACK, [hand index] -> value of one piece from BLACK
+BOARD_TABLE = _board_table()
+HAND_TABLE = _hand_table()
+_SQUARE_RANGE = np.arange(len(SQUARES))
+
+
+def encode_states(states):
+    """@return tuple of arrays (codes [N, 81], hands [N, 14], side [N]) for the list of State"""
+    n = len(states)
+    codes = np.zeros((n, len(SQUARES)), dtype=np.uint8)
+    hands = np.zeros((n, NUM_HANDS), dtype=np.uint8)
+    side = np.zeros(n, dtype=np.uint8)
+    for i, state in enumerate(states):
+        encode_board(state, memoryview(codes[i]))
+        encode_hand(state, memoryview(hands[i]))
+        side[i] = TURNS.index(state.to_move)
+    return codes, hands, side
+
+
+def encode_records(records):
+    """
+    Replay the games and encode every position.
+    @param records iterator of tuple (game_information, initial_state, history) as Record.iter_read
+    @return tuple of arrays (codes [N, 81], hands [N, 14], side [N])
+    """
+    codes, hands, side = bytearray(), bytearray(), bytearray()
+    board_buf, hand_buf = bytearray(len(SQUARES)), bytearray(NUM_HANDS)
+
+    def add(state):
+        encode_board(state, board_buf)
+        encode_hand(state, hand_buf)
+        codes.extend(board_buf)
+        hands.extend(hand_buf)
+        side.append(TURNS.index(state.to_move))
+
+    for _, init_state, history in records:
+        state = init_state.copy()
+        add(state)
+        for mv in history:
+            if not mv.is_special:
+                state.apply_move(mv)
+                add(state)
+
+    n = len(side)
+    return (np.frombuffer(bytes(codes), dtype=np.uint8).reshape(n, len(SQUARES)),
+            np.frombuffer(bytes(hands), dtype=np.uint8).reshape(n, NUM_HANDS),
+            np.frombuffer(bytes(side), dtype=np.uint8))
+
+
+def evaluate_batch(codes, hands, side):
+    """
+    Vectorized evaluation of the array encoding.
+    @return int32 array [N] of scores from the side to move
+    """
+    codes = np.asarray(codes)
+    score = BOARD_TABLE[codes, _SQUARE_RANGE].sum(axis=1, dtype=np.int32)
+    score += np.asarray(hands, dtype=np.int32) @ HAND_TABLE
+    return np.where(np.asarray(side) == 0, score, -score).astype(np.int32)
+
+
+def evaluate_states(states):
+    """Vectorized evaluation of the list of State. @return int32 array [N]"""
+    return evaluate_batch(*encode_states(states))
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Built-in move sources
+
+Players share the interface of engine.usi.UsiPlayer:
+think(game, declare=True), start_ponder(game), game_over(result) and close().
+With declare=False, think() does not return a declaration of win.
+"""
+
+import random
+
+from core.jishogi import can_declare_win, declaration_error
+from core.movegen import generate_moves
+
+RESIGN, DECLARE_WIN = '%TORYO', '%KACHI'
+
+
+def checked_move(player, game):
+    """
+    Ask the player for a move of the game. A declaration of win which the impasse rule does not allow
+    would be taken as an illegal move by the server, so the player is asked again without declarations.
+    If it still declares, the first move which does not lose by perpetual check is played
+    (or resignation if there is none).
+    @return tuple of (move string, reason why the declaration was replaced or None)
+    """
+    mv = player.think(game)
+    if mv != DECLARE_WIN:
+        return mv, None
+    reason = declaration_error(game.state)
+    if reason is None:
+        return mv, None
+    mv = player.think(game, declare=False)
+    if mv == DECLARE_WIN:
+        moves = generate_moves(game.state)
+        mv = safe_moves(game, moves)[0].move_str if moves else RESIGN
+    return mv, reason
+
+
+def safe_moves(game, moves):
+    """@return the moves which do not lose by perpetual check, or all the moves if every one does"""
+    turn = game.state.to_move
+    ret = [mv for mv in moves if (game.repetition(mv) or (None, None))[1] != turn]
+    return ret or moves
+
+
+class RandomPlayer:
+    """Plays a random legal move."""
+
+    name = 'random'
+
+    def __init__(self, seed=None):
+        self.random = random.Random(seed)
+
+    def __str__(self):
+        return 'RandomPlayer'
+
+    def think(self, game, declare=True):
+        if declare and can_declare_win(game.state):
+            return DECLARE_WIN
+        moves = generate_moves(game.state)
+        if not moves:
+            return RESIGN
+        return self.random.choice(safe_moves(game, moves)).move_str
+
+    def start_ponder(self, game):
+        return False
+
+    def game_over(self, result):
+        pass
+
+    def close(self):
+        pass
+
+
+class GreedyPlayer(RandomPlayer):
+    """Plays the move with the best static evaluation after one ply (ties are broken at random)."""
+
+    name = 'greedy'
+
+    def __init__(self, seed=None):
+        super().__init__(seed)
+        from engine.evaluation import evaluate  # numpy is only needed by this player
+        self.evaluate = evaluate
+
+    def __str__(self):
+        return 'GreedyPlayer'
+
+    def think(self, game, declare=True):
+        state = game.state
+        if declare and can_declare_win(state):
+            return DECLARE_WIN
+        best, best_score = [], None
+        for mv in safe_moves(game, generate_moves(state)):
+            undo = state.apply_move(mv)
+            score = -self.evaluate(state)
+            state.undo_move(mv, undo)
+            if best_score is None or score > best_score:
+                best, best_score = [mv], score
+            elif score == best_score:
+                best.append(mv)
+        if not best:
+            return RESIGN
+        return self.random.choice(best).move_str
+
+
+BUILTIN_PLAYERS = {p.name: p for p in [RandomPlayer, GreedyPlayer]}
+
+
+if __name__ == '__main__':
+    pass
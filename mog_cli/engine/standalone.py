@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Local games without server
+
+Moves are checked with the local rules, and the game end is decided locally.
+"""
+
+import time
+from collections import namedtuple
+
+from core import *
+from core.game import Game, IllegalMoveError, local_condition
+from core.jishogi import declaration_error
+from core.movegen import generate_moves, has_legal_move
+
+# the game is drawn after this number of moves
+MAX_MOVES = 256
+
+# special moves which end local games (CSA record notation)
+RESIGN, CHECKMATE, ILLEGAL_MOVE, MAX_MOVES_DRAW = '%TORYO', '%TSUMI', '%ILLEGAL_MOVE', '%HIKIWAKE'
+DECLARE_WIN, SENNICHITE = '%KACHI', '%SENNICHITE'
+
+
+def new_game(init_state=None, name_black='', name_white='', my_turn=BLACK):
+    """@return Game starting from the state (default: hirate)"""
+    if init_state is None:
+        init_state = State()
+        init_state.set_hirate()
+    return Game(local_condition(init_state, name_black, name_white, 'local', my_turn))
+
+
+def play_move(game, move_str, max_moves=MAX_MOVES):
+    """
+    Check the move with the local rules and play it.
+    @return special Move which ended the game (e.g. Move('%TSUMI')), or None when the game continues
+    """
+    if game.is_over():
+        raise IllegalMoveError('game is over')
+
+    if move_str == RESIGN:
+        game.move(Move(RESIGN))
+        return game.history[-1]
+
+    if move_str == DECLARE_WIN:
+        reason = declaration_error(game.state)
+        if reason:
+            raise IllegalMoveError('{}: {}'.format(move_str, reason))
+        game.move(Move(DECLARE_WIN))
+        return game.history[-1]
+
+    if move_str.startswith('%') or move_str not in {m.move_str for m in generate_moves(game.state)}:
+        raise IllegalMoveError(move_str)
+
+    game.move(Move(move_str))
+    repetition = game.repetition()
+    if not has_legal_move(game.state):
+        end = CHECKMATE
+    elif repetition:
+        # perpetual check is recorded as an illegal action of the checking side
+        end = SENNICHITE if repetition[1] is None else '%{}ILLEGAL_ACTION'.format(repetition[1])
+    elif sum(1 for mv in game.history if not mv.is_special) >= max_moves:
+        end = MAX_MOVES_DRAW
+    else:
+        return None
+    game.move(Move(end))
+    return game.history[-1]
+
+
+class SelfPlayStats(namedtuple('SelfPlayStats', 'games black_wins white_wins draws plies elapsed')):
+    @property
+    def games_per_minute(self):
+        return 60.0 * self.games / self.elapsed if self.elapsed else float('inf')
+
+    def __str__(self):
+        return '{} games (+{} -{} ={}), {} plies in {:.1f}s: {:.1f} games/min'.format(
+            self.games, self.black_wins, self.white_wins, self.draws, self.plies, self.elapsed,
+            self.games_per_minute)
+
+
+class SelfPlay:
+    """
+    Play games between two move sources back to back.
+
+    @param black, white players such as engine.player.RandomPlayer or engine.usi.UsiPlayer
+    """
+
+    def __init__(self, black, white, init_state=None, max_moves=MAX_MOVES):
+        self.players = {BLACK: black, WHITE: white}
+        self.init_state = init_state
+        self.max_moves = max_moves
+
+    def play(self):
+        """@return finished Game"""
+        game = new_game(self.init_state, str(self.players[BLACK]), str(self.players[WHITE]))
+        while not game.is_over():
+            if not has_legal_move(game.state):
+                game.move(Move(CHECKMATE))
+                break
+            mv = self.players[game.state.to_move].think(game)
+            try:
+                play_move(game, mv, self.max_moves)
+            except IllegalMoveError:
+                game.move(Move(ILLEGAL_MOVE))
+
+        for turn, player in self.players.items():
+            player.game_over(game.result(turn))
+        return game
+
+    def run(self, games, callback=None):
+        """
+        @param callback function called with (index, Game) after each game
+        @return SelfPlayStats
+        """
+        start = time.time()
+        wins = {BLACK: 0, WHITE: 0, None: 0}
+        plies = 0
+        for i in range(games):
+            game = self.play()
+            wins[game.winner()] += 1
+            plies += sum(1 for mv in game.history if not mv.is_special)
+            if callback:
+                callback(i, game)
+        return SelfPlayStats(games, wins[BLACK], wins[WHITE], wins[None], plies, time.time() - start)
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tsume (checkmate) solver with df-pn search
+
+The side to move is the attacker. Attacker nodes (OR) only try checking moves,
+defender nodes (AND) try every legal evasion.
+"""
+
+import time
+from collections import namedtuple
+
+from core import *
+from core.movegen import generate_moves, generate_checks
+
+INF = 100000000
+
+# status of the result
+MATE, NO_MATE, UNKNOWN = 'mate', 'no_mate', 'unknown'
+
+TsumeResult = namedtuple('TsumeResult', 'status moves nodes elapsed')
+
+
+class _Abort(Exception):
+    pass
+
+
+class DfPnSolver:
+    """
+    Depth-first proof-number search.
+
+    @param max_nodes  search stops after visiting this many nodes
+    @param time_limit search stops after this many seconds (None: unlimited)
+    @param table_size maximum number of entries in the proof/disproof table
+    """
+
+    def __init__(self, max_nodes=100000, time_limit=None, table_size=200000):
+        self.max_nodes = max_nodes
+        self.time_limit = time_limit
+        self.table_size = table_size
+        self.table = {}  # {State.key(): [pn, dn, work]}
+        self.nodes = 0
+        self.deadline = None
+
+    def solve(self, state):
+        """
+        Search the mate from the state.
+        The state is modified during the search, but restored when returned.
+        @return TsumeResult
+        """
+        start = time.time()
+        self.nodes = 0
+        self.deadline = None if self.time_limit is None else start + self.time_limit
+
+        try:
+            self.__mid(state, INF - 1, INF - 1, True, set())
+        except _Abort:
+            pass
+
+        pn, dn, _ = self.__lookup(state.key())
+        if pn == 0:
+            status, moves = MATE, self.__principal_variation(state)
+        elif dn == 0:
+            status, moves = NO_MATE, []
+        else:
+            status, moves = UNKNOWN, []
+        return TsumeResult(status, moves, self.nodes, time.time() - start)
+
+    def __lookup(self, key):
+        return self.table.get(key, (1, 1, 0))
+
+    def __store(self, key, pn, dn, work):
+        if key not in self.table and len(self.table) >= self.table_size:
+            self.__shrink()
+        self.table[key] = (pn, dn, work)
+
+    def __shrink(self):
+        """Drop the least-searched half of the unresolved entries (or the whole half if all are resolved)."""
+        entries = sorted(self.table.items(), key=lambda kv: (kv[1][0] == 0 or kv[1][1] == 0, kv[1][2]))
+        for k, _ in entries[:len(entries) // 2]:
+            del self.table[k]
+
+    def __children(self, state, or_node):
+        moves = generate_checks(state) if or_node else generate_moves(state)
+        ret = []
+        for mv in moves:
+            undo = state.apply_move(mv)
+            ret.append((mv, state.key()))
+            state.undo_move(mv, undo)
+        return ret
+
+    def __count_node(self):
+        self.nodes += 1
+        if self.nodes > self.max_nodes:
+            raise _Abort
+        if self.deadline is not None and self.nodes % 256 == 0 and time.time() > self.deadline:
+            raise _Abort
+
+    def __mid(self, state, thpn, thdn, or_node, path):
+        self.__count_node()
+        key = state.key()
+        children = self.__children(state, or_node)
+
+        if not children:
+            # no checks for the attacker, or no evasions for the defender
+            self.__store(key, INF, 0, 1) if or_node else self.__store(key, 0, INF, 1)
+            return
+
+        path.add(key)
+        start_nodes = self.nodes
+        try:
+            while True:
+                # (phi, delta) of children: (pn, dn) for OR children, (dn, pn) for AND children
+                values = []
+                for mv, child in children:
+                    if child in path:
+                        cpn, cdn = INF, 0  # repetition is not a mate
+                    else:
+                        cpn, cdn, _ = self.__lookup(child)
+                    values.append((cdn, cpn) if or_node else (cpn, cdn))
+
+                phi = min(v[1] for v in values)
+                delta = min(INF, sum(v[0] for v in values))
+                pn, dn = (phi, delta) if or_node else (delta, phi)
+                th_phi, th_delta = (thpn, thdn) if or_node else (thdn, thpn)
+
+                if phi >= th_phi or delta >= th_delta:
+                    self.__store(key, pn, dn, self.nodes - start_nodes + 1)
+                    return
+
+                order = sorted(range(len(values)), key=lambda i: values[i][1])
+                best = order[0]
+                second_delta = values[order[1]][1] if len(order) > 1 else INF
+                child_phi = th_delta + values[best][0] - delta
+                child_delta = min(th_phi, second_delta + 1)
+                if or_node:
+                    child_thpn, child_thdn = child_delta, child_phi
+                else:
+                    child_thpn, child_thdn = child_phi, child_delta
+
+                mv, _ = children[best]
+                undo = state.apply_move(mv)
+                try:
+                    self.__mid(state, child_thpn, child_thdn, not or_node, path)
+                finally:
+                    state.undo_move(mv, undo)
+        finally:
+            path.discard(key)
+
+    def __principal_variation(self, state):
+        """Follow proven nodes: shortest mate for the attacker, longest defense for the defender."""
+        memo = {}
+
+        def length(or_node, path):
+            key = state.key()
+            if (key, or_node) in memo:
+                return memo[(key, or_node)]
+            if key in path:
+                return None
+
+            best = None
+            path.add(key)
+            for mv, child in self.__children(state, or_node):
+                if self.__lookup(child)[0] != 0:
+                    continue
+                undo = state.apply_move(mv)
+                try:
+                    sub = length(not or_node, path)
+                finally:
+                    state.undo_move(mv, undo)
+                if sub is None:
+                    continue
+                if best is None or (sub[0] + 1 < best[0] if or_node else sub[0] + 1 > best[0]):
+                    best = (sub[0] + 1, [mv] + sub[1])
+            path.discard(key)
+
+            if best is None and not or_node and not generate_moves(state):
+                best = (0, [])  # checkmated
+            memo[(key, or_node)] = best
+            return best
+
+        ret = length(True, set())
+        return ret[1] if ret else []
+
+
+def solve(state, max_nodes=100000, time_limit=None, table_size=200000):
+    """
+    Solve tsume from the state where the side to move is the attacker.
+    @return TsumeResult, e.g. TsumeResult('mate', [Move(+0052KI)], 3, 0.01)
+    """
+    return DfPnSolver(max_nodes, time_limit, table_size).solve(state.copy())
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,369 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bridge to external engines speaking USI
+
+The engine runs as a long-lived subprocess. Its output is read by a background thread
+into a queue, so the caller never blocks on the pipe unless it waits for a reply.
+
+@see protocol -> http://shogidokoro.starfree.jp/usi.html
+"""
+
+import queue
+import shlex
+import subprocess
+import threading
+import time
+
+from core import *
+from core.movegen import generate_moves
+from engine.player import safe_moves
+
+_USI_PIECES = {
+    KING: 'K', PAWN: 'P', LANCE: 'L', KNIGHT: 'N', SILVER: 'S', GOLD: 'G', BISHOP: 'B', ROOK: 'R',
+    PPAWN: '+P', PLANCE: '+L', PKNIGHT: '+N', PSILVER: '+S', PBISHOP: '+B', PROOK: '+R',
+}
+_CSA_PIECES = {v: k for k, v in _USI_PIECES.items()}
+_USI_HAND_ORDER = [ROOK, BISHOP, GOLD, SILVER, KNIGHT, LANCE, PAWN]
+_RANKS = 'abcdefghi'
+
+# special moves in bestmove
+USI_RESIGN, USI_WIN = 'resign', 'win'
+CSA_RESIGN, CSA_WIN = '%TORYO', '%KACHI'
+
+
+class UsiError(Exception):
+    pass
+
+
+def _usi_square(pos):
+    return pos[0] + _RANKS[int(pos[1]) - 1]
+
+
+def _csa_square(sq):
+    return sq[0] + str(_RANKS.index(sq[1]) + 1)
+
+
+def csa_to_usi(mv, state):
+    """
+    @param mv normal Move, e.g. Move('+7776FU')
+    @param state State before the move
+    @return USI move string, e.g. '7g7f', '8h2b+', 'P*5e'
+    """
+    if mv.move_from == POS_HAND:
+        return '{}*{}'.format(_USI_PIECES[mv.piece_type], _usi_square(mv.move_to))
+    promotion = '+' if state.board[mv.move_from][1:] != mv.piece_type else ''
+    return '{}{}{}'.format(_usi_square(mv.move_from), _usi_square(mv.move_to), promotion)
+
+
+def usi_to_csa(usi, state):
+    """
+    @param usi USI move string
+    @param state State before the move
+    @return CSA move string, e.g. '+7776FU', or '%TORYO' / '%KACHI' for resign / win
+    """
+    if usi == USI_RESIGN:
+        return CSA_RESIGN
+    if usi == USI_WIN:
+        return CSA_WIN
+
+    turn = state.to_move
+    if usi[1] == '*':
+        return '{}00{}{}'.format(turn, _csa_square(usi[2:4]), _CSA_PIECES[usi[0]])
+
+    move_from, move_to = _csa_square(usi[0:2]), _csa_square(usi[2:4])
+    piece_type = state.board[move_from][1:]
+    if usi.endswith('+'):
+        piece_type = UPPER_PIECE_TYPE(piece_type)
+    return '{}{}{}{}'.format(turn, move_from, move_to, piece_type)
+
+
+def sfen(state, move_number=1):
+    """@return SFEN string of the state"""
+    rows = []
+    for r in range(1, 10):
+        row, empty = '', 0
+        for f in range(9, 0, -1):
+            piece = state.board.get('{}{}'.format(f, r))
+            if piece is None:
+                empty += 1
+                continue
+            if empty:
+                row += str(empty)
+                empty = 0
+            p = _USI_PIECES[piece[1:]]
+            row += p if piece[0] == BLACK else p.lower()
+        rows.append(row + (str(empty) if empty else ''))
+
+    hand = ''
+    for t in TURNS:
+        for pt in _USI_HAND_ORDER:
+            n = state.get_hand(t + pt)
+            if n:
+                p = _USI_PIECES[pt] if t == BLACK else _USI_PIECES[pt].lower()
+                hand += (str(n) if n > 1 else '') + p
+
+    return '{} {} {} {}'.format('/'.join(rows), 'b' if state.to_move == BLACK else 'w', hand or '-', move_number)
+
+
+def position_command(init_state, moves):
+    """
+    @param init_state State of the game start
+    @param moves list of normal Move from the start
+    @return 'position' command for the engine
+    """
+    hirate = State()
+    hirate.set_hirate()
+    base = 'startpos' if init_state == hirate else 'sfen {}'.format(sfen(init_state))
+
+    state = init_state.copy()
+    usi_moves = []
+    for mv in moves:
+        usi_moves.append(csa_to_usi(mv, state))
+        state.apply_move(mv)
+    return 'position {}{}'.format(base, ' moves ' + ' '.join(usi_moves) if usi_moves else '')
+
+
+class UsiEngine:
+    """
+    USI engine process.
+
+    @param command command line (string or list) to start the engine
+    @param options dict of engine options sent by setoption
+    @param timeout seconds to wait for replies of handshake commands
+    """
+
+    def __init__(self, command, options=None, timeout=30):
+        self.command = shlex.split(command) if isinstance(command, str) else list(command)
+        self.timeout = timeout
+        self.name = None
+        self.lines = queue.Queue()
+        self.searching = False
+        self.pondering = False
+
+        self.proc = subprocess.Popen(self.command, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                     universal_newlines=True, bufsize=1)
+        self.reader = threading.Thread(target=self.__read_loop, daemon=True)
+        self.reader.start()
+
+        self.send('usi')
+        for line in self.wait_for(lambda x: x == 'usiok'):
+            if line.startswith('id name '):
+                self.name = line[len('id name '):]
+        for k, v in (options or {}).items():
+            self.send('setoption name {} value {}'.format(k, v))
+        self.send('isready')
+        self.wait_for(lambda x: x == 'readyok')
+
+    def __str__(self):
+        return 'UsiEngine@{}'.format(self.name or self.command[0])
+
+    def __read_loop(self):
+        for line in self.proc.stdout:
+            self.lines.put(line.rstrip('\r\n'))
+        self.lines.put(None)  # EOF
+
+    def send(self, message):
+        if self.proc.poll() is not None:
+            raise UsiError('engine is not running')
+        self.proc.stdin.write(message + '\n')
+        self.proc.stdin.flush()
+
+    def poll(self):
+        """@return list of lines which have already arrived, without blocking"""
+        ret = []
+        while True:
+            try:
+                line = self.lines.get_nowait()
+            except queue.Empty:
+                return ret
+            if line is None:
+                raise UsiError('engine exited')
+            ret.append(line)
+
+    def wait_for(self, predicate, timeout=-1):
+        """
+        Wait until receiving the line which satisfies the predicate.
+        @param timeout seconds, None for no limit, negative for the default of this engine
+        @return list of received lines, the last one satisfies the predicate
+        """
+        if timeout is not None and timeout < 0:
+            timeout = self.timeout
+        deadline = None if timeout is None else time.time() + timeout
+        buf = []
+        while True:
+            try:
+                line = self.lines.get(timeout=None if deadline is None else max(0, deadline - time.time()))
+            except queue.Empty:
+                raise UsiError('timeout: {}'.format(buf[-1:] if buf else 'no reply'))
+            if line is None:
+                raise UsiError('engine exited')
+            buf.append(line)
+            if predicate(line):
+                return buf
+
+    def new_game(self):
+        self.send('usinewgame')
+
+    def go(self, position, go_options=''):
+        """Start searching the position (non-blocking)."""
+        self.send(position)
+        self.send('go {}'.format(go_options).strip())
+        self.searching = True
+        self.pondering = False
+
+    def go_ponder(self, position, go_options=''):
+        """Start pondering on the position which includes the expected reply of the opponent (non-blocking)."""
+        self.send(position)
+        self.send('go ponder {}'.format(go_options).strip())
+        self.searching = True
+        self.pondering = True
+
+    def ponderhit(self):
+        """The opponent played the expected move; the current search continues as a normal search."""
+        assert self.pondering
+        self.send('ponderhit')
+        self.pondering = False
+
+    def bestmove(self, timeout=None):
+        """
+        Wait for the result of the search.
+        @return tuple of (best move, ponder move or None) in USI notation
+        """
+        assert self.searching
+        line = self.wait_for(lambda x: x.startswith('bestmove'), timeout)[-1]
+        self.searching = False
+        self.pondering = False
+        xs = line.split()
+        return xs[1], (xs[3] if len(xs) >= 4 and xs[2] == 'ponder' else None)
+
+    def stop(self):
+        """
+        Stop the search and discard its result.
+        @raise UsiError if the engine does not reply in the timeout
+        """
+        if self.searching:
+            self.send('stop')
+            self.bestmove(self.timeout)
+
+    def game_over(self, result):
+        """@param result 'win', 'lose' or 'draw'"""
+        self.stop()
+        self.send('gameover {}'.format(result))
+
+    def quit(self):
+        if self.proc.poll() is None:
+            try:
+                self.stop()
+                self.send('quit')
+                self.proc.wait(self.timeout)
+            except (UsiError, OSError, subprocess.TimeoutExpired):
+                self.proc.kill()
+                self.proc.wait()
+        self.proc.stdout.close()
+        self.proc.stdin.close()
+
+
+def _time_unit_msec(time_unit):
+    """@return milliseconds of the Time_Unit of the game summary, e.g. '1sec' -> 1000"""
+    for suffix, scale in (('msec', 1), ('sec', 1000), ('min', 60000)):
+        if time_unit.endswith(suffix):
+            return int(time_unit[:-len(suffix)]) * scale
+    raise ValueError(time_unit)
+
+
+class UsiPlayer:
+    """
+    Move source backed by a USI engine.
+
+    Thinks on the position of a Game, and ponders on the expected reply while the opponent thinks.
+    @param byoyomi milliseconds per move when the game has no usable time settings
+    """
+
+    def __init__(self, engine, byoyomi=1000, ponder=True):
+        self.engine = engine
+        self.byoyomi = byoyomi
+        self.ponder = ponder
+        self.ponder_move = None  # expected reply of the opponent in CSA notation
+        self.game_id = None
+
+    def __str__(self):
+        return str(self.engine)
+
+    def __go_options(self, game):
+        s = game.condition['Game_Summary'].get('Time', {})
+        try:
+            unit = _time_unit_msec(s['Time_Unit'])
+            total = int(s['Total_Time']) * unit
+            byoyomi = int(s.get('Byoyomi', 0)) * unit
+        except (KeyError, ValueError):
+            return 'btime 0 wtime 0 byoyomi {}'.format(self.byoyomi)
+
+        used = {BLACK: 0, WHITE: 0}
+        for mv in game.history:
+            if not mv.is_special and mv.elapsed_time:
+                used[mv.turn] += mv.elapsed_time * unit
+        return 'btime {} wtime {} byoyomi {}'.format(
+            max(0, total - used[BLACK]), max(0, total - used[WHITE]), byoyomi)
+
+    def __start_game(self, game):
+        if self.game_id != id(game):
+            self.engine.stop()
+            self.engine.new_game()
+            self.game_id = id(game)
+            self.ponder_move = None
+
+    @staticmethod
+    def __moves(game):
+        return [mv for mv in game.history if not mv.is_special]
+
+    def think(self, game, declare=True):
+        """
+        Search the current position of the game.
+        @param declare if False, the search is limited to the legal moves by searchmoves, without declaration of win
+        @return CSA move string, e.g. '+7776FU', '%TORYO', '%KACHI'
+        """
+        self.__start_game(game)
+        moves = self.__moves(game)
+        if declare and self.engine.pondering and moves and moves[-1].move_str == self.ponder_move:
+            self.engine.ponderhit()
+        else:
+            go_options = self.__go_options(game)
+            if not declare:
+                legal = generate_moves(game.state)
+                if not legal:
+                    return CSA_RESIGN
+                go_options += ' searchmoves ' + ' '.join(csa_to_usi(mv, game.state) for mv in safe_moves(game, legal))
+            self.engine.stop()
+            self.engine.go(position_command(game.init_state, moves), go_options)
+
+        best, ponder = self.engine.bestmove()
+        ret = usi_to_csa(best, game.state)
+
+        self.ponder_move = None
+        if ponder and not ret.startswith('%'):
+            state = game.state.copy()
+            state.apply_move(Move(ret))
+            self.ponder_move = usi_to_csa(ponder, state)
+        return ret
+
+    def start_ponder(self, game):
+        """Ponder on the expected reply while waiting for the opponent's move. Returns immediately."""
+        if not self.ponder or not self.ponder_move or self.engine.searching:
+            return False
+        moves = self.__moves(game) + [Move(self.ponder_move)]
+        self.engine.go_ponder(position_command(game.init_state, moves), self.__go_options(game))
+        return True
+
+    def game_over(self, result):
+        """@param result '#WIN', '#LOSE' or '#DRAW' seen from this player"""
+        self.engine.game_over({'#WIN': 'win', '#LOSE': 'lose', '#DRAW': 'draw'}.get(result, 'draw'))
+        self.game_id = None
+        self.ponder_move = None
+
+    def close(self):
+        self.engine.quit()
+
+
+if __name__ == '__main__':
+    pass
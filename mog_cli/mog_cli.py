@@ -3,11 +3,12 @@
 """"Command Line Interface for CSA Shogi Client"""
 
 
-import sys
 import argparse
-import logging
-from shell import Shell
-from util.logger import logger
+import os
+import sys
+
+# log levels (same as the logging module, which is imported after parsing arguments)
+DEBUG, INFO = 10, 20
 
 
 def main():
@@ -19,15 +20,41 @@ def main():
                         help='default port of shogi-server')
     parser.add_argument('-u', dest='username', metavar='DEFAULT_USERNAME', help='default login username')
     parser.add_argument('-p', dest='password', metavar='DEFAULT_PASSWORD', help='default login password')
-    parser.add_argument('--debug', dest='log_level', action='store_const', const=logging.DEBUG, default=logging.INFO,
+    parser.add_argument('--debug', dest='log_level', action='store_const', const=DEBUG, default=INFO,
                         help='set log level to DEBUG')
+    parser.add_argument('--script', metavar='FILE', type=argparse.FileType('r'),
+                        help='run commands from FILE in batch mode')
+    parser.add_argument('--batch', action='store_true',
+                        help='run in batch mode: no prompts, confirmations take defaults, stop at the first error '
+                             '(default when stdin is not a terminal)')
+    parser.add_argument('--autosave', metavar='DIR',
+                        help='append every move of network games to DIR/<game_id>.csa (see RECOVER)')
+    parser.add_argument('--sync-interval', metavar='SECONDS', default=1.0, type=float,
+                        help='seconds between syncs of autosave files to the disk (default: 1.0)')
+    parser.add_argument('--store', metavar='FILE',
+                        help='SQLite game store; finished games are added to it (see GAMES and INGEST)')
+    parser.add_argument('--capture', metavar='DIR',
+                        help='write every line sent to and received from the server to a wire log in DIR '
+                             '(see network/replay.py)')
     args = parser.parse_args()
+    if args.capture and os.path.exists(args.capture) and not os.path.isdir(args.capture):
+        parser.error('--capture: not a directory: {}'.format(args.capture))
+
+    # import the shell after parsing arguments, so that '--help' returns immediately
+    from shell import Shell
+
+    if args.log_level == DEBUG:
+        # the logging module is loaded only when it is needed
+        from util.logger import init_logger
+        init_logger(args.log_level).debug('Starting shell with args: {}'.format(args))
 
-    logger.setLevel(args.log_level)
-    logger.debug('Starting shell with args: {}'.format(args))
+    input_stream = args.script or sys.stdin
+    batch = args.batch or args.script is not None or not sys.stdin.isatty()
 
-    sh = Shell(args.host, args.port, args.username, args.password)
-    sh.start()
+    sh = Shell(args.host, args.port, args.username, args.password, input=input_stream, batch=batch,
+               autosave_dir=args.autosave, sync_interval=args.sync_interval, store_path=args.store,
+               capture_dir=args.capture)
+    return sh.start()
 
 
 if __name__ == '__main__':
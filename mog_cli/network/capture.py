@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Wire logs of CsaClient sessions
+
+Every line sent and received by a client is written with the seconds since the log was opened,
+from the monotonic clock, e.g.
+  0.000412 > LOGIN alice *****
+  0.003107 < LOGIN:alice OK
+Received lines are stamped when the client reads them from the socket. The log is line buffered,
+so that it survives a crash of the client; network.replay feeds it back to a client.
+Passwords of LOGIN are redacted, as the logs are copied around to reproduce incidents.
+"""
+
+import itertools
+import os
+import time
+from collections import namedtuple
+
+SENT, RECEIVED = '>', '<'
+
+# written in place of the password of LOGIN
+REDACTED = '*****'
+
+
+def redact(line):
+    """@return the line without the password, e.g. 'LOGIN alice *****' for 'LOGIN alice pass'"""
+    words = line.split(' ')
+    if len(words) >= 3 and words[0] == 'LOGIN':
+        words[2] = REDACTED
+        return ' '.join(words)
+    return line
+
+
+class WireEvent(namedtuple('WireEvent', 'time direction line')):
+    """Line of the wire log; direction is SENT or RECEIVED, seen from the client."""
+
+    def __str__(self):
+        return '{:.6f} {} {}'.format(self.time, self.direction, self.line)
+
+
+class WireLog:
+    """
+    Writer of the wire log.
+
+    @param fp text file object, or path of the file to create
+    """
+
+    def __init__(self, fp):
+        self.file = open(fp, 'w', buffering=1, encoding='utf-8') if isinstance(fp, str) else fp
+        self.start = time.monotonic()
+
+    def sent(self, line):
+        self.__write(SENT, redact(line))
+
+    def received(self, line):
+        self.__write(RECEIVED, line)
+
+    def __write(self, direction, line):
+        self.file.write('{}\n'.format(WireEvent(time.monotonic() - self.start, direction, line)))
+
+    def close(self):
+        self.file.close()
+
+
+def read_log(iterable):
+    """
+    @param iterable lines of the wire log, e.g. file object
+    @return list of WireEvent
+    """
+    ret = []
+    for line in iterable:
+        line = line.rstrip('\r\n')
+        if not line:
+            continue
+        t, direction, text = (line.split(' ', 2) + [''])[:3]
+        if direction not in (SENT, RECEIVED):
+            raise ValueError('broken wire log: {}'.format(line))
+        ret.append(WireEvent(float(t), direction, text))
+    return ret
+
+
+def capture_factory(directory, factory=None):
+    """
+    @param factory CsaClient class or a function of (host, port, capture=...)
+    @return function of (host, port) which opens a client capturing into a new log in the directory,
+            e.g. for ConnectionPool; the directory is created if it does not exist
+    """
+    os.makedirs(directory, exist_ok=True)
+    if factory is None:
+        from network.csa_client import CsaClient
+        factory = CsaClient
+    counter = itertools.count(1)
+
+    def f(host, port):
+        name = '{}-{}-{}-{}.log'.format(time.strftime('%Y%m%d-%H%M%S'), host, port, next(counter))
+        return factory(host, port, capture=WireLog(os.path.join(directory, name)))
+
+    return f
+
+
+if __name__ == '__main__':
+    pass
@@ -7,7 +7,7 @@ Protocol document: http://www.computer-shogi.org/protocol/tcp_ip_server_113.html
 """
 
 import socket
-import re
+from collections import deque, namedtuple
 
 from util.logger import logger
 
@@ -29,31 +29,146 @@ LF = '\n'
 # state
 CONNECTED, GAME_WAITING, AGREE_WAITING, START_WAITING, GAME_TO_MOVE, GAME_TO_WAIT = range(6)
 
-# regexp pattern
-PAT_MOVE = re.compile(r'^[/+-]\d{2}[1-9]{2}[A-Z]{2}$')
-PAT_MOVE_CONFIRM = re.compile(r'^([/+-]\d{2}[1-9]{2}[A-Z]{2}),T(\d+)$')
-PAT_CONFIRM = re.compile(r'.*,T(\d+)$')
-PAT_SPECIAL = re.compile(r'^%[A-Z]+$')
-PAT_SPECIAL_CONFIRM = re.compile(r'^(%[A-Z]+)(?:,T(\d+))?$')
+# kinds of the lines from the server
+MOVE, SPECIAL, REASON, RESULT, OTHER = range(5)
+
+# actions of the client, and {state: {action: next state}}
+LOGIN, LOGOUT, SUMMARY, AGREE, REJECT, START_TO_MOVE, START_TO_WAIT, PLAY, GAME_END = range(9)
+TRANSITIONS = {
+    CONNECTED: {LOGIN: GAME_WAITING},
+    GAME_WAITING: {LOGOUT: CONNECTED, SUMMARY: AGREE_WAITING},
+    AGREE_WAITING: {AGREE: START_WAITING, REJECT: GAME_WAITING},
+    START_WAITING: {START_TO_MOVE: GAME_TO_MOVE, START_TO_WAIT: GAME_TO_WAIT, REJECT: GAME_WAITING},
+    GAME_TO_MOVE: {PLAY: GAME_TO_WAIT, GAME_END: GAME_WAITING},
+    GAME_TO_WAIT: {PLAY: GAME_TO_MOVE, GAME_END: GAME_WAITING},
+}
+
+# game results; the other lines starting with '#' are the reasons
+RESULTS = frozenset(['#WIN', '#LOSE', '#DRAW', '#CENSORED', '#CHUDAN'])
+
+# {(reason, result): commands of the peer allowed before them, or None for any}
+GAME_END_BEFORE_MOVE = {('#TIME_UP', '#LOSE'): None}
+GAME_END_AFTER_MOVE = {
+    ('#SENNICHITE', '#DRAW'): None,
+    ('#OUTE_SENNICHITE', '#WIN'): None,
+    ('#ILLEGAL_MOVE', '#LOSE'): None,
+    ('#TIME_UP', '#LOSE'): None,
+}
+GAME_END_AFTER_PEER_MOVE = {
+    ('#SENNICHITE', '#DRAW'): None,
+    ('#OUTE_SENNICHITE', '#LOSE'): None,
+    ('#ILLEGAL_MOVE', '#WIN'): None,
+    ('#TIME_UP', '#WIN'): {None},
+    ('#RESIGN', '#WIN'): {'%TORYO'},
+    ('#JISHOGI', '#LOSE'): {'%KACHI'},
+}
+GAME_END_AFTER_RESIGN = {('#RESIGN', '#LOSE'): None, ('#TIME_UP', '#LOSE'): None}
+GAME_END_AFTER_DECLARATION = {('#ILLEGAL_MOVE', '#LOSE'): None, ('#TIME_UP', '#LOSE'): None, ('#JISHOGI', '#WIN'): None}
+
+
+class Event(namedtuple('Event', 'kind line command time')):
+    """
+    Line from the server classified once.
+    command: move or special move without the time, e.g. '+7776FU' or '%TORYO' (None for the other kinds)
+    time   : consumed time of ',T<n>' or None
+    """
+
+
+# piece types in CSA, and the digits of squares on the board
+PIECE_NAMES = frozenset(['FU', 'KY', 'KE', 'GI', 'KI', 'KA', 'HI', 'OU', 'TO', 'NY', 'NK', 'NG', 'UM', 'RY'])
+_RANKS = frozenset('123456789')
+
+
+def _event(kind, line, command=None, time=None):
+    # tuple.__new__ skips the argument handling of the namedtuple, which is on the path of every line
+    return _new(Event, (kind, line, command, time))
+
+
+_new = tuple.__new__
+
+
+def _is_move_body(s):
+    """@return True if s[1:7] is the squares and the piece type, e.g. '7776FU'"""
+    return s[5:7] in PIECE_NAMES and s[3] in _RANKS and s[4] in _RANKS and s[1:3].isdigit()
+
+
+def is_move_string(s):
+    """@return True for a normal move, e.g. '+7776FU'"""
+    return len(s) == 7 and s[0] in '+-' and _is_move_body(s)
+
+
+def _classify_move(line):
+    # fixed positions: '+7776FU' or '+7776FU,T12'
+    if len(line) >= 7 and _is_move_body(line):
+        if len(line) == 7:
+            return _new(Event, (MOVE, line, line, None))
+        if line[7:9] == ',T' and line[9:].isdigit():
+            return _new(Event, (MOVE, line, line[:7], int(line[9:])))
+    return _event(OTHER, line)
+
+
+def _classify_special(line):
+    # '%TORYO' or '%TORYO,T12'
+    command, sep, t = line.partition(',T')
+    if command[1:].isalpha() and command[1:].isupper() and (not sep or t.isdigit()):
+        return _event(SPECIAL, line, command, int(t) if sep else None)
+    return _event(OTHER, line)
+
+
+def _classify_game_end(line):
+    return _event(RESULT if line in RESULTS else REASON, line)
+
+
+# dispatch on the first character of the line
+_CLASSIFIERS = {'+': _classify_move, '-': _classify_move, '%': _classify_special, '#': _classify_game_end}
+
+
+def classify(line):
+    """@return Event of the line from the server"""
+    f = _CLASSIFIERS.get(line[:1])
+    return f(line) if f else _event(OTHER, line)
 
 
 class CsaClient:
 
-    def __init__(self, host, port=DEFAULT_PORT, timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+    def __init__(self, host, port=DEFAULT_PORT, timeout=socket._GLOBAL_DEFAULT_TIMEOUT, capture=None):
+        """@param capture network.capture.WireLog which records every line sent and received, or None"""
         self.host = host
         self.port = port
         self.timeout = timeout
         self.user = None
-        self.buffer = []
+        self.buffer = deque()  # Event objects received and not read yet
+        self.capture = capture
 
         # open connection
-        self.sock = socket.create_connection((self.host, self.port), self.timeout)
+        try:
+            self.sock = socket.create_connection((self.host, self.port), self.timeout)
+        except OSError:
+            if capture:
+                capture.close()
+            raise
         self.file = self.sock.makefile('rb')
         self.state = CONNECTED
 
     def close(self):
         """Close connection."""
+        # the socket is not closed while the file made from it is open
+        self.file.close()
         self.sock.close()
+        if self.capture:
+            self.capture.close()
+            self.capture = None
+
+    def is_alive(self):
+        """
+        @return False if the connection has been closed by the server.
+                Messages which have arrived are kept in the buffer.
+        """
+        try:
+            self.__sock_read_all()
+        except (ClosedConnectionError, OSError):
+            return False
+        return True
 
     def __enter__(self):
         return self
@@ -64,16 +179,25 @@ class CsaClient:
     def __str__(self):
         return 'CsaClient@{}'.format(self.user if self.user else '{:X}'.format(id(self)))
 
+    def __transit(self, action):
+        """Change the state by TRANSITIONS."""
+        next_state = TRANSITIONS[self.state].get(action)
+        if next_state is None:
+            raise ProtocolError('action {} in state {}'.format(action, self.state))
+        self.state = next_state
+
     def __send(self, message):
         """The lowest level socket data writing function."""
         logger.debug('{} -> {}'.format(self, repr(message)))
+        if self.capture:
+            self.capture.sent(message)
         self.sock.sendall('{}{}'.format(message, LF).encode('utf-8'))
 
     def __receive(self):
-        """Read one line from socket or its buffer."""
+        """Read one Event from socket or its buffer."""
         if not self.buffer:
             self.__sock_read_line()
-        return self.buffer.pop(0)
+        return self.buffer.popleft()
 
     def __sock_read_line_raw(self):
         """Read from socket until line feed.
@@ -104,16 +228,18 @@ class CsaClient:
                 self.__append_buffer(c + self.__sock_read_line_raw())
 
     def __append_buffer(self, data):
-        """Store a message to buffer."""
+        """Classify a message and store it to buffer."""
         decoded = data[:-1].decode('utf-8')
         logger.debug('{} <- {}'.format(self, repr(decoded)))
-        self.buffer.append(decoded)
+        if self.capture:
+            self.capture.received(decoded)
+        self.buffer.append(classify(decoded))
 
     def __await(self, predicate=lambda x: True):
         """Wait until receiving the line which satisfies the given predicate."""
         buf = []
         while True:
-            m = self.__receive()
+            m = self.__receive().line
             buf.append(m)
             if predicate(m):
                 break
@@ -138,7 +264,7 @@ class CsaClient:
             raise ProtocolError(res)
 
         self.user = username
-        self.state = GAME_WAITING
+        self.__transit(LOGIN)
         return True, res[0]
 
     def logout(self):
@@ -150,7 +276,7 @@ class CsaClient:
         res = self.__command('LOGOUT')
         if res[0] != 'LOGOUT:completed':
             raise ProtocolError(res)
-        self.state = CONNECTED
+        self.__transit(LOGOUT)
         return True, res[0]
 
     def get_game_condition(self):
@@ -164,34 +290,34 @@ class CsaClient:
 
         res = self.__await(lambda x: x == 'END Game_Summary')
         cond = self.__parse_game_condition(res)
-        self.state = AGREE_WAITING
+        self.__transit(SUMMARY)
         return cond, res
 
-    def __parse_game_condition(self, lines):
-        pat_tag_begin = re.compile(r'BEGIN (\w+)')
-        pat_key_value = re.compile(r'([\w+-]+):(.+)')
-
+    @staticmethod
+    def __parse_game_condition(lines):
         def f(ls):
             d = {}
-            while ls:
-                head = ls.pop(0)
+            i = 0
+            while i < len(ls):
+                head = ls[i]
+                i += 1
 
-                if pat_tag_begin.match(head):
-                    tag = pat_tag_begin.match(head).group(1)
+                if head.startswith('BEGIN '):
+                    tag = head[6:]
 
                     # Find first closing tag (if not found, throws ValueError).
-                    j = ls.index('END {}'.format(tag))
+                    j = ls.index('END {}'.format(tag), i)
 
                     if tag == 'Position':
-                        d[tag] = '\n'.join(ls[:j])
+                        d[tag] = '\n'.join(ls[i:j])
                     else:
-                        d[tag] = f(ls[:j])
-                    ls = ls[j + 1:]
+                        d[tag] = f(ls[i:j])
+                    i = j + 1
                     continue
 
-                if pat_key_value.match(head):
-                    m = pat_key_value.match(head)
-                    d[m.group(1)] = m.group(2)
+                key, sep, value = head.partition(':')
+                if sep and key and value and ' ' not in key:
+                    d[key] = value
                     continue
 
                 raise ProtocolError(head)
@@ -210,7 +336,7 @@ class CsaClient:
 
         game_id = game_condition['Game_Summary']['Game_ID']
         self.__send('AGREE {}'.format(game_id))
-        self.state = START_WAITING
+        self.__transit(AGREE)
 
     def get_agreement(self, game_condition):
         """
@@ -227,12 +353,12 @@ class CsaClient:
         init_turn = game_condition['Game_Summary']['To_Move']
         my_turn = game_condition['Game_Summary']['Your_Turn']
 
-        res = self.__receive()
+        res = self.__receive().line
         if res.startswith('REJECT:{} by '.format(game_id)):
-            self.state = GAME_WAITING
+            self.__transit(REJECT)
             return False, res
         if res == 'START:{}'.format(game_id):
-            self.state = GAME_TO_MOVE if init_turn == my_turn else GAME_TO_WAIT
+            self.__transit(START_TO_MOVE if init_turn == my_turn else START_TO_WAIT)
             return True, res
         raise ProtocolError(res)
 
@@ -248,16 +374,23 @@ class CsaClient:
         res = self.__command('REJECT {}'.format(game_id))
 
         if res[0].startswith('REJECT:{} by '.format(game_id)):
-            self.state = GAME_WAITING
+            self.__transit(REJECT)
             return res[0]
         raise ProtocolError(res)
 
-    def __parse_consumed_time(self, line):
-        m = PAT_CONFIRM.match(line)
-        if m:
-            return int(m.group(1))
-        else:
-            return None
+    def __game_end(self, allowed, command=None):
+        """
+        Read the reason and the result of the game end, and check them with the table.
+        @param allowed {(reason, result): commands allowed before them, or None for any}
+        @return tuple of (reason, result)
+        """
+        reason = self.__receive().line
+        result = self.__receive().line
+        commands = allowed.get((reason, result), ())
+        if commands != () and (commands is None or command in commands):
+            self.__transit(GAME_END)
+            return reason, result
+        raise ProtocolError((reason, result))
 
     def move(self, move_string):
         """
@@ -265,85 +398,59 @@ class CsaClient:
                 game_end_reason and game_end_result are None when game is continued.
 
                 e.g. ('+7776FU', 15, None, None)
-                     ('+7776FU', 3, '#TIMEUP', '#LOSE')
+                     ('+7776FU', None, '#TIME_UP', '#LOSE')
         """
         assert self.state == GAME_TO_MOVE, 'illegal state: {}'.format(self.state)
 
-        assert PAT_MOVE.match(move_string), 'move string format error: {}'.format(move_string)
+        assert is_move_string(move_string), 'move string format error: {}'.format(move_string)
 
         # Check timeup before move.
         if self.is_game_end():
-            reason = self.buffer.pop(0)
-            result = self.buffer.pop(0)
-            if (reason, result) not in ['#TIMEUP', '#LOSE']:
-                raise ProtocolError((reason, result))
-            # timeup
-            self.state = GAME_WAITING
-            return move_string, None, reason, result
+            return (move_string, None) + self.__game_end(GAME_END_BEFORE_MOVE)
 
         # Send move command, then get one line.
-        res = self.__command(move_string)
+        self.__send(move_string)
+        ev = self.__receive()
 
         # Check if confirmation comes.
-        pat_confirm = re.compile(r'^{},T(\d+)$'.format(move_string.replace('+', '\+')))
-        m = pat_confirm.match(res[0])
-        if m:
-            # found confirmation
-            consumed_time = int(m.group(1))
+        if ev.kind == MOVE and ev.command == move_string and ev.time is not None:
+            consumed_time = ev.time
         else:
             consumed_time = None
-            self.buffer.insert(0, res[0])  # put back to buffer
+            self.buffer.appendleft(ev)  # put back to buffer
 
         # Check game-end message after move.
         if self.is_game_end():
-            reason = self.buffer.pop(0)
-            result = self.buffer.pop(0)
-            if (reason, result) not in [
-                ('#SENNICHITE', '#DRAW'), ('#OUTE_SENNICHITE', '#WIN'), ('#ILLEGAL_MOVE', '#LOSE'),
-                ('#TIME_UP', '#LOSE')]:
-                raise ProtocolError((reason, result))
-            self.state = GAME_WAITING
-            return move_string, consumed_time, reason, result
-
-        if not consumed_time:
-            raise ProtocolError(res)
+            return (move_string, consumed_time) + self.__game_end(GAME_END_AFTER_MOVE)
 
-        self.state = GAME_TO_WAIT
+        if consumed_time is None:
+            raise ProtocolError(ev.line)
+
+        self.__transit(PLAY)
         return move_string, consumed_time, None, None
 
-    def __move_special(self, command, possible_results):
+    def __move_special(self, command, allowed):
         assert self.state == GAME_TO_MOVE, 'illegal state: {}'.format(self.state)
 
-        res = self.__command(command)
-
-        # It depends whether consumed time comes or not.
-        consumed_time = self.__parse_consumed_time(res[0])
-        if res[0].startswith(command) and consumed_time is None:
-            reason = res[0]
-        else:
-            reason = self.__receive()
+        self.__send(command)
+        ev = self.__receive()
+        if ev.kind != SPECIAL or ev.command != command:
+            raise ProtocolError(ev.line)
 
         # It depends whether command string echoes back or not.
-        if reason == command:
-            reason = self.__receive()
-
-        if not res[0].startswith(command):
-            raise ProtocolError(res)
+        consumed_time = ev.time
+        ev = self.__receive()
+        if ev.kind != SPECIAL or ev.line != command:
+            self.buffer.appendleft(ev)
 
-        result = self.__receive()
-
-        if (reason, result) not in possible_results:
-            raise ProtocolError((reason, result))
-
-        self.state = GAME_WAITING
-        return command, consumed_time, reason, result
+        return (command, consumed_time) + self.__game_end(allowed)
 
     def resign(self):
         """
         @return tuple of (move_string, elapsed_time, game_end_reason, game_end_result)
                 e.g. ('%TORYO', 3, '#RESIGN', '#LOSE')
         """
-        return self.__move_special('%TORYO', [('#RESIGN', '#LOSE'), ('#TIME_UP', '#LOSE')])
+        return self.__move_special('%TORYO', GAME_END_AFTER_RESIGN)
 
     def declare_win(self):
         """
@@ -351,7 +458,7 @@ class CsaClient:
                 e.g. ('%KACHI', 3, '#JISHOGI', '#WIN')
                      ('%KACHI', 3, '#ILLEGAL_MOVE', '#LOSE')
         """
-        return self.__move_special('%KACHI', [('#ILLEGAL_MOVE', '#LOSE'), ('#TIME_UP', '#LOSE'), ('#JISHOGI', '#WIN')])
+        return self.__move_special('%KACHI', GAME_END_AFTER_DECLARATION)
 
     def get_move(self):
         """
@@ -364,56 +471,40 @@ class CsaClient:
         assert self.state == GAME_TO_WAIT, 'illegal state: {}'.format(self.state)
 
         # receive one line
-        res = self.__receive()
+        ev = self.__receive()
 
-        # move confirmation
-        if PAT_MOVE_CONFIRM.match(res):
-            command, t = PAT_MOVE_CONFIRM.match(res).groups()
-            consumed_time = int(t)
-            self.state = GAME_TO_MOVE
-        elif PAT_SPECIAL_CONFIRM.match(res):
-            command, t = PAT_SPECIAL_CONFIRM.match(res).groups()
-            consumed_time = None if t is None else int(t)
+        if ev.kind == MOVE and ev.time is not None:
+            # move confirmation
+            command, consumed_time = ev.command, ev.time
+        elif ev.kind == SPECIAL:
+            command, consumed_time = ev.command, ev.time
 
             # resign/jishogi commands can be sent twice
             # e.g. ['%KACHI,T12', '%KACHI', '#JISHOGI', '#LOSE']
             check = self.__receive()
-            if check != command:
-                self.buffer.insert(0, check)
+            if check.line != command:
+                self.buffer.appendleft(check)
         else:
             # no confirmation, maybe game is end
-            command = None
-            consumed_time = None
-            self.buffer.insert(0, res)  # put back to buffer
+            command, consumed_time = None, None
+            self.buffer.appendleft(ev)  # put back to buffer
 
         # check if game is end
         if self.is_game_end():
-            reason = self.buffer.pop(0)
-            result = self.buffer.pop(0)
-            if (command, reason, result) not in [
-                (command, '#SENNICHITE', '#DRAW'),
-                (command, '#OUTE_SENNICHITE', '#LOSE'),
-                (command, '#ILLEGAL_MOVE', '#WIN'),
-                (None, '#ILLEGAL_MOVE', '#WIN'),
-                (None, '#TIME_UP', '#WIN'),
-                ('%TORYO', '#RESIGN', '#WIN'),
-                ('%KACHI', '#JISHOGI', '#LOSE')]:
-                raise ProtocolError((reason, result))
-            self.state = GAME_WAITING
-            return command, consumed_time, reason, result
-
-        if not consumed_time:
-            raise ProtocolError(res)
+            return (command, consumed_time) + self.__game_end(GAME_END_AFTER_PEER_MOVE, command)
+
+        if consumed_time is None:
+            raise ProtocolError(ev.line)
 
-        self.state = GAME_TO_MOVE
+        self.__transit(PLAY)
         return command, consumed_time, None, None
 
     def is_game_end(self):
         self.__sock_read_all()
         if not self.buffer:
             return False
-        return all(b.startswith('#') for b in self.buffer[:2])
+        return all(ev.kind in (REASON, RESULT) for ev in list(self.buffer)[:2])
 
 
 if __name__ == '__main__':
-    pass
\ No newline at end of file
+    pass
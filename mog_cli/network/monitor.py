@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Watch many server games over one connection
+
+Uses the monitoring extension of shogi-server, enabled by logging in with 'x1'.
+  %%MONITOR2ON <game_id>   the server sends the record so far, then every move
+  %%MONITOR2OFF <game_id>  stop watching
+  %%LIST                   list the games in progress
+
+Every reply line is prefixed with its tag, e.g. '##[MONITOR2][<game_id>] +7776FU', and a block
+ends with '##[MONITOR2][<game_id>] +OK'. Lines are demultiplexed by game ID and each block is
+applied to the Game of that ID at once.
+"""
+
+import re
+import select
+import socket
+
+from core import *
+from core.record import Record
+from network.csa_client import ClosedConnectionError, ProtocolError, DEFAULT_PORT
+from util.logger import logger
+
+LF = '\n'
+
+PAT_TAGGED = re.compile(r'^##\[(\w+)\](?:\[([^\]]+)\])? ?(.*)$')
+
+# columns of the summary table
+TABLE_FORMAT = '{:<40s} {:<12s} {:<12s} {:>4s} {:<12s} {}'
+TABLE_HEADER = TABLE_FORMAT.format('Game ID', 'Black', 'White', 'Ply', 'Last', 'Status')
+
+
+class WatchedGame:
+    """
+    Game followed by the monitor.
+
+    @param game_id game ID on the server
+    """
+
+    def __init__(self, game_id):
+        self.game_id = game_id
+        self.game = None  # created from the first block
+        self.reason = None  # game end reason from the server, e.g. '#RESIGN'
+        self.pending = []  # lines of the block being received
+        self.__row = None  # cached row of the summary table
+
+    def feed(self, line):
+        """
+        Receive one line of this game without its tag.
+        @return True if a block has been applied
+        """
+        if line != '+OK':
+            self.pending.append(line)
+            return False
+
+        lines, self.pending = self.pending, []
+        info, state, history = Record.read(lines)[0]
+        if self.game is None:
+            self.game = Game.from_record(info, state)
+            self.game.id = self.game_id
+        for mv in history:
+            self.game.move(mv)
+        for x in lines:
+            if x.startswith('#'):
+                self.reason = x
+        self.__row = None
+        return True
+
+    def is_over(self):
+        return self.reason is not None or (self.game is not None and self.game.is_over())
+
+    def row(self):
+        """@return line of the summary table, rendered again only after the game has changed"""
+        if self.__row is None:
+            if self.game is None:
+                self.__row = TABLE_FORMAT.format(self.game_id, '', '', '', '', 'waiting')
+            else:
+                s = self.game.condition['Game_Summary']
+                last = self.game.history[-1].move_str if self.game.history else '-'
+                status = self.reason or ('over' if self.game.is_over() else 'to move: {}'.format(
+                    self.game.state.to_move))
+                self.__row = TABLE_FORMAT.format(self.game_id, s['Name+'][:12], s['Name-'][:12],
+                                                 str(len(self.game.history)), last, status)
+        return self.__row
+
+
+class MonitorClient:
+    """
+    Connection in the extended mode which watches games.
+
+    Incoming data is read without blocking by poll(); replies are matched to the games by their tags.
+    """
+
+    def __init__(self, host, port=DEFAULT_PORT, timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+        self.host = host
+        self.port = port
+        self.user = None
+        self.games = {}  # {game_id: WatchedGame} in the order of watch()
+        self.game_list = None  # result of the last %%LIST
+        self.__list_buffer = []
+        self.__data = b''
+        self.__lines = []  # untagged lines, e.g. replies to LOGIN
+
+        self.sock = socket.create_connection((self.host, self.port), timeout)
+        self.sock.setblocking(False)
+
+    def close(self):
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __str__(self):
+        return 'MonitorClient@{}'.format(self.user if self.user else '{:X}'.format(id(self)))
+
+    def __send(self, *messages):
+        """Send the messages at once."""
+        logger.debug('{} -> {}'.format(self, repr(messages)))
+        data = ''.join(m + LF for m in messages).encode('utf-8')
+        while data:
+            select.select([], [self.sock], [])
+            n = self.sock.send(data)
+            data = data[n:]
+
+    def __read(self, timeout):
+        """Read the data which has arrived. @return list of received lines"""
+        ready, _, _ = select.select([self.sock], [], [], timeout)
+        if not ready:
+            return []
+
+        chunks = []
+        while True:
+            try:
+                chunk = self.sock.recv(1 << 16)
+            except BlockingIOError:
+                break
+            if not chunk:
+                raise ClosedConnectionError
+            chunks.append(chunk)
+        *lines, self.__data = (self.__data + b''.join(chunks)).split(b'\n')
+        ret = [x.decode('utf-8') for x in lines]
+        logger.debug('{} <- {} lines'.format(self, len(ret)))
+        return ret
+
+    def login(self, username, password):
+        """
+        Login in the extended mode.
+        @return tuple of boolean (true if succeeded) and received message
+        """
+        self.__send('LOGIN {} {} x1'.format(username, password))
+        while True:
+            self.poll(None)
+            while self.__lines:
+                line = self.__lines.pop(0)
+                if line == 'LOGIN:incorrect':
+                    return False, line
+                if line == 'LOGIN:{} OK'.format(username):
+                    self.user = username
+                    return True, line
+                raise ProtocolError(line)
+
+    def logout(self):
+        self.__send('LOGOUT')
+
+    def request_list(self):
+        """Request the list of the games in progress. The result is set to game_list by poll()."""
+        self.game_list = None
+        self.__send('%%LIST')
+
+    def watch(self, *game_ids):
+        """Start watching the games. The records arrive through poll()."""
+        new = [x for x in game_ids if x not in self.games]
+        for x in new:
+            self.games[x] = WatchedGame(x)
+        if new:
+            self.__send(*('%%MONITOR2ON {}'.format(x) for x in new))
+        return new
+
+    def unwatch(self, *game_ids):
+        found = [x for x in game_ids if x in self.games]
+        for x in found:
+            del self.games[x]
+        if found:
+            self.__send(*('%%MONITOR2OFF {}'.format(x) for x in found))
+        return found
+
+    def poll(self, timeout=0):
+        """
+        Receive and dispatch the lines which have arrived.
+        @param timeout seconds to wait for data, None to block until some data arrives
+        @return list of game IDs which have changed, in the order of the first change
+        """
+        changed = []
+        for line in self.__read(timeout):
+            m = PAT_TAGGED.match(line)
+            if not m:
+                self.__lines.append(line)
+                continue
+
+            tag, game_id, body = m.groups()
+            if tag == 'MONITOR2':
+                g = self.games.get(game_id)
+                if g is not None and g.feed(body) and game_id not in changed:
+                    changed.append(game_id)
+            elif tag == 'LIST':
+                if body == '+OK':
+                    self.game_list, self.__list_buffer = self.__list_buffer, []
+                else:
+                    self.__list_buffer.append(body)
+            else:
+                logger.debug('{} ignored: {}'.format(self, line))
+        return changed
+
+    def table(self, game_ids=None):
+        """@return summary lines of the games (default: all watched games), with the header"""
+        games = self.games.values() if game_ids is None else (self.games[x] for x in game_ids)
+        return [TABLE_HEADER] + [g.row() for g in games]
+
+
+if __name__ == '__main__':
+    pass
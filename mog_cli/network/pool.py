@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Pool of idle server connections
+
+A client released after its game stays logged in (GAME_WAITING), so the next game of the
+same user starts with get_game_condition() on the same socket. Clients which are only
+CONNECTED are handed out for a new LOGIN. Dead sockets are dropped when they are acquired.
+"""
+
+from network.csa_client import CsaClient, ClosedConnectionError, ProtocolError, CONNECTED, GAME_WAITING, DEFAULT_PORT
+
+
+class ConnectionPool:
+    """
+    Idle CsaClient objects per (host, port).
+
+    @param max_idle maximum number of idle clients kept for each host
+    """
+
+    def __init__(self, max_idle=4, factory=CsaClient):
+        self.max_idle = max_idle
+        self.factory = factory
+        self.idle = {}  # {(host, port): [CsaClient]}, the most recently released last
+
+    def acquire(self, host, port=DEFAULT_PORT, user=None):
+        """
+        @param user preferred user; a client logged in as this user is taken first
+        @return CsaClient in GAME_WAITING (logged in as the user) or CONNECTED state, opened if none is idle
+        """
+        clients = self.idle.get((host, port), [])
+        alive = []
+        for c in clients:
+            if c.is_alive():
+                alive.append(c)
+            else:
+                c.close()
+        clients[:] = alive
+
+        # logged in as the user, then a connection where anyone can log in
+        for ok in (lambda c: c.state == GAME_WAITING and c.user == user, lambda c: c.state == CONNECTED):
+            for c in reversed(clients):
+                if ok(c):
+                    clients.remove(c)
+                    return c
+        return self.factory(host, port)
+
+    def release(self, client):
+        """Keep the client for reuse if it is idle, otherwise close it."""
+        if client.state not in (CONNECTED, GAME_WAITING):
+            client.close()
+            return
+        clients = self.idle.setdefault((client.host, client.port), [])
+        if client in clients:
+            return
+        clients.append(client)
+        while len(clients) > self.max_idle:
+            c = clients.pop(0)
+            if c.state == GAME_WAITING:
+                try:
+                    c.logout()
+                except (ProtocolError, ClosedConnectionError, OSError):
+                    pass  # closing anyway
+            c.close()
+
+    def close(self):
+        for clients in self.idle.values():
+            for c in clients:
+                c.close()
+        self.idle.clear()
+
+
+if __name__ == '__main__':
+    pass
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+TCP proxy which impairs the link between a client and a server
+
+Each direction of a connection is delayed by the one-way latency and a uniform jitter, limited by
+the bandwidth, and the data is cut into segments of random sizes up to the segment size, so that
+lines arrive in pieces across recv boundaries. Lost segments are modeled as TCP sees them: the
+segment is retransmitted after the timeout and holds back the ones behind it, as bytes are always
+delivered in order.
+
+usage (in mog_cli/): python -m network.proxy [--port PORT] [--profile NAME] [--latency SEC] ... <host>[:<port>]
+"""
+
+import random
+import socket
+import threading
+import time
+from collections import deque, namedtuple
+
+from network.csa_client import DEFAULT_PORT
+
+RECV_SIZE = 4096
+
+
+class ImpairmentProfile(namedtuple('ImpairmentProfile', 'latency jitter bandwidth segment loss rto')):
+    """
+    latency  : one-way delay in seconds
+    jitter   : maximum extra delay in seconds, uniformly distributed
+    bandwidth: bytes per second, or None for unlimited
+    segment  : maximum bytes per segment, or None to forward the data as received
+    loss     : probability that a segment is lost and retransmitted
+    rto      : retransmission timeout in seconds
+    """
+
+    def __str__(self):
+        return 'latency={}s jitter={}s bandwidth={} segment={} loss={}'.format(
+            self.latency, self.jitter, self.bandwidth or '-', self.segment or '-', self.loss)
+
+
+PROFILES = {
+    'none': ImpairmentProfile(0.0, 0.0, None, None, 0.0, 0.2),
+    'lan': ImpairmentProfile(0.0005, 0.0005, None, None, 0.0, 0.2),
+    'broadband': ImpairmentProfile(0.015, 0.005, 1000000, 1460, 0.0, 0.2),
+    'mobile': ImpairmentProfile(0.05, 0.03, 50000, 512, 0.01, 0.2),
+    'congested': ImpairmentProfile(0.1, 0.08, 4000, 8, 0.03, 0.3),
+}
+
+
+class _Link:
+    """One direction of a connection; the segments are queued with the times they are due."""
+
+    def __init__(self, src, dst, profile, rng, on_close):
+        self.src = src
+        self.dst = dst
+        self.profile = profile
+        self.rng = rng
+        self.on_close = on_close
+        self.queue = deque()  # (due time, bytes or None for EOF), in the order of the due times
+        self.cond = threading.Condition()
+        self.link_free = 0.0  # time when the link has sent the segments so far
+        self.last_due = 0.0
+        self.segments = 0
+        self.bytes = 0
+
+    def start(self):
+        for f in (self.__read, self.__write):
+            threading.Thread(target=f, daemon=True).start()
+
+    def split(self, data):
+        """@return list of segments of random sizes up to the segment size"""
+        n = self.profile.segment
+        if not n or len(data) <= n:
+            return [data]
+        ret, i = [], 0
+        while i < len(data):
+            k = self.rng.randint(1, n)
+            ret.append(data[i:i + k])
+            i += k
+        return ret
+
+    def due(self, now, size):
+        """@return time when a segment of the size sent now arrives"""
+        p = self.profile
+        t = now
+        if p.bandwidth:
+            self.link_free = max(self.link_free, now) + size / p.bandwidth
+            t = self.link_free
+        t += p.latency + p.jitter * self.rng.random()
+        if p.loss and self.rng.random() < p.loss:
+            t += p.rto
+        # bytes are delivered in order, so a late segment holds back the ones behind it
+        self.last_due = max(self.last_due, t)
+        return self.last_due
+
+    def __put(self, due, data):
+        with self.cond:
+            self.queue.append((due, data))
+            self.cond.notify()
+
+    def __read(self):
+        while True:
+            try:
+                data = self.src.recv(RECV_SIZE)
+            except OSError:
+                data = b''
+            now = time.monotonic()
+            if not data:
+                self.__put(self.due(now, 0), None)
+                return
+            for seg in self.split(data):
+                self.__put(self.due(now, len(seg)), seg)
+
+    def __write(self):
+        try:
+            while True:
+                with self.cond:
+                    while not self.queue:
+                        self.cond.wait()
+                    due, data = self.queue[0]
+                    delay = due - time.monotonic()
+                    if delay > 0:
+                        self.cond.wait(delay)
+                        continue
+                    self.queue.popleft()
+                if data is None:
+                    self.dst.shutdown(socket.SHUT_WR)
+                    return
+                self.dst.sendall(data)
+                self.segments += 1
+                self.bytes += len(data)
+        except OSError:
+            pass
+        finally:
+            self.on_close()
+
+
+class ImpairmentProxy(threading.Thread):
+    """
+    Forwards the connections to the server through impaired links.
+
+    @param profile ImpairmentProfile or the name of one in PROFILES
+    @param seed seed of the random delays and segment sizes, for reproducible runs
+    """
+
+    def __init__(self, server_host, server_port=DEFAULT_PORT, profile='none', host='127.0.0.1', port=0, seed=None):
+        super().__init__(daemon=True)
+        self.server = (server_host, server_port)
+        self.profile = PROFILES[profile] if isinstance(profile, str) else profile
+        self.rng = random.Random(seed)
+        self.listener = socket.socket()
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((host, port))
+        self.listener.listen(8)
+        self.port = self.listener.getsockname()[1]
+        self.links = []
+        self.sockets = []
+
+    def run(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return  # closed
+            try:
+                upstream = socket.create_connection(self.server)
+            except OSError:
+                conn.close()
+                continue
+            self.connect(conn, upstream)
+
+    def connect(self, conn, upstream):
+        for s in (conn, upstream):
+            s.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sockets += [conn, upstream]
+        remaining = [2]
+        lock = threading.Lock()
+
+        def on_close():
+            with lock:
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            conn.close()
+            upstream.close()
+
+        # each link has its own generator so that the two directions do not share a sequence across threads
+        for src, dst in ((conn, upstream), (upstream, conn)):
+            link = _Link(src, dst, self.profile, random.Random(self.rng.random()), on_close)
+            self.links.append(link)
+            link.start()
+
+    def close(self):
+        self.listener.close()
+        for s in self.sockets:
+            try:
+                s.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            s.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='TCP proxy with latency, jitter, bandwidth cap and segment splitting')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT + 1,
+                        help='port to listen on (default: {})'.format(DEFAULT_PORT + 1))
+    parser.add_argument('--profile', default='none', choices=sorted(PROFILES), help='base profile (default: none)')
+    parser.add_argument('--latency', type=float, help='one-way delay in seconds')
+    parser.add_argument('--jitter', type=float, help='maximum extra delay in seconds')
+    parser.add_argument('--bandwidth', type=int, help='bytes per second')
+    parser.add_argument('--segment', type=int, help='maximum bytes per segment')
+    parser.add_argument('--loss', type=float, help='probability of retransmission of a segment')
+    parser.add_argument('--seed', type=int, help='random seed')
+    parser.add_argument('server', help='server to forward to, <host>[:<port>]')
+    args = parser.parse_args()
+
+    host, _, port = args.server.partition(':')
+    profile = PROFILES[args.profile]._replace(**{k: getattr(args, k) for k in ImpairmentProfile._fields
+                                                 if getattr(args, k, None) is not None})
+    proxy = ImpairmentProxy(host, int(port or DEFAULT_PORT), profile, host='', port=args.port, seed=args.seed)
+    print('listening on port {}: {}'.format(proxy.port, profile))
+    proxy.start()
+    try:
+        proxy.join()
+    except KeyboardInterrupt:
+        proxy.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Replay server of wire logs
+
+Serves a session captured by network.capture to one client. Lines the client received are sent
+back with their captured intervals divided by the speed, measured from the last line the client
+sent, so that the time the client takes itself is not counted twice; speed None sends them at once.
+Lines the client sends are awaited in order, and the ones which differ from the capture are kept
+in mismatches, as well as the lines sent after the end of the capture. The password of LOGIN is
+not compared, as the capture has it redacted.
+
+usage (in mog_cli/): python -m network.replay [--port PORT] [--speed N|max] <wire_log>
+"""
+
+import socket
+import threading
+import time
+
+from network.capture import SENT, read_log, redact
+
+LF = '\n'
+
+
+class ReplayServer(threading.Thread):
+    """
+    @param events list of WireEvent
+    @param speed 1.0 for the captured timing, 10.0 for ten times faster, None for no waits
+    """
+
+    def __init__(self, events, speed=1.0, host='127.0.0.1', port=0):
+        super().__init__(daemon=True)
+        self.events = events
+        self.speed = speed
+        self.listener = socket.socket()
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.listener.bind((host, port))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.mismatches = []  # tuples of (expected line or None, line sent by the client)
+        self.lines = 0  # lines sent and received
+        self.finished = threading.Event()
+
+    @classmethod
+    def from_file(cls, path, speed=1.0, **kwargs):
+        with open(path, encoding='utf-8') as f:
+            return cls(read_log(f), speed, **kwargs)
+
+    def run(self):
+        try:
+            conn, _ = self.listener.accept()
+        except OSError:
+            self.finished.set()
+            return
+        try:
+            with conn:
+                self.serve(conn)
+        except OSError:
+            pass  # the client has gone
+        finally:
+            self.finished.set()
+
+    def serve(self, conn):
+        reader = conn.makefile('rb')
+        pending = []  # lines to send at once
+
+        def flush():
+            if pending:
+                conn.sendall(''.join(pending).encode('utf-8'))
+                pending.clear()
+
+        anchor, anchor_time = time.monotonic(), self.events[0].time if self.events else 0.0
+        for ev in self.events:
+            if ev.direction == SENT:
+                flush()
+                line = reader.readline()
+                if not line:
+                    return
+                actual = line.decode('utf-8').rstrip('\r\n')
+                if actual != ev.line and redact(actual) != ev.line:
+                    self.mismatches.append((ev.line, actual))
+                anchor, anchor_time = time.monotonic(), ev.time
+            else:
+                if self.speed:
+                    delay = anchor + (ev.time - anchor_time) / self.speed - time.monotonic()
+                    if delay > 0:
+                        flush()
+                        time.sleep(delay)
+                pending.append(ev.line + LF)
+            self.lines += 1
+        flush()
+
+        # keep the connection open until the client closes it, as the server would
+        for line in reader:
+            self.mismatches.append((None, line.decode('utf-8').rstrip('\r\n')))
+
+    def close(self):
+        self.listener.close()
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='serve a wire log captured from CsaClient')
+    parser.add_argument('--port', type=int, default=4081, help='port to listen on (default: 4081)')
+    parser.add_argument('--speed', default='1', help='speed of the replay, e.g. 1, 10 or max (default: 1)')
+    parser.add_argument('log', help='wire log to replay')
+    args = parser.parse_args()
+
+    server = ReplayServer.from_file(args.log, None if args.speed == 'max' else float(args.speed), port=args.port)
+    print('listening on port {}'.format(server.port))
+    server.start()
+    server.finished.wait()
+    for expected, actual in server.mismatches:
+        print('expected {!r}, got {!r}'.format(expected, actual))
+    print('{} lines replayed, {} mismatches'.format(server.lines, len(server.mismatches)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Play server games back to back
+
+The loop is: login -> game condition -> agree or reject by the policy -> play -> next game,
+on one connection from the pool. Moves come from a player with the interface of
+engine.usi.UsiPlayer (think, start_ponder, game_over).
+"""
+
+import time
+from collections import namedtuple
+
+from core import *
+from engine.player import checked_move
+from network.csa_client import CONNECTED, ClosedConnectionError
+from network.pool import ConnectionPool
+
+
+class LoginError(Exception):
+    pass
+
+
+class GameInterrupted(Exception):
+    """The connection was lost during a game; record is the GameRecord of the game so far, without a result."""
+
+    def __init__(self, record):
+        super().__init__('{} interrupted'.format(record.game_id))
+        self.record = record
+
+
+def time_seconds(time_settings, key):
+    """@return the time setting of the game condition in seconds, e.g. ('1min', '25') -> 1500, or None"""
+    try:
+        unit = time_settings['Time_Unit']
+        value = int(time_settings[key])
+    except (KeyError, ValueError):
+        return None
+    for suffix, scale in (('msec', 0.001), ('sec', 1), ('min', 60)):
+        if unit.endswith(suffix):
+            return value * scale * int(unit[:-len(suffix)] or 1)
+    return None
+
+
+class AgreementPolicy:
+    """
+    Decide whether to agree to the game condition.
+
+    @param opponents names to play against (None: anyone)
+    @param excluded names never to play against
+    @param total_time (min, max) seconds of the total time, either may be None
+    @param byoyomi (min, max) seconds of byoyomi, either may be None
+    """
+
+    def __init__(self, opponents=None, excluded=(), total_time=(None, None), byoyomi=(None, None)):
+        self.opponents = None if opponents is None else set(opponents)
+        self.excluded = set(excluded)
+        self.ranges = {'Total_Time': total_time, 'Byoyomi': byoyomi}
+
+    def check(self, game_condition):
+        """@return None if agreed, otherwise the reason to reject"""
+        s = game_condition['Game_Summary']
+        opponent = s['Name-'] if s['Your_Turn'] == BLACK else s['Name+']
+        if opponent in self.excluded or (self.opponents is not None and opponent not in self.opponents):
+            return 'opponent: {}'.format(opponent)
+
+        for key, (lo, hi) in self.ranges.items():
+            if lo is None and hi is None:
+                continue
+            t = time_seconds(s.get('Time', {}), key)
+            if t is None or (lo is not None and t < lo) or (hi is not None and t > hi):
+                return '{}: {}'.format(key, t)
+        return None
+
+
+class GameRecord(namedtuple('GameRecord', 'game_id opponent my_turn result reason plies wait elapsed')):
+    """
+    Outcome of one game; wait is the seconds in GAME_WAITING before the game condition arrived.
+    result and reason are None when the game was interrupted by the connection.
+    """
+
+    def __str__(self):
+        return '{} vs {} ({}): {} in {} plies, waited {:.1f}s, played {:.1f}s'.format(
+            self.game_id, self.opponent, self.my_turn,
+            'interrupted' if self.result is None else '{} {}'.format(self.result, self.reason), self.plies,
+            self.wait, self.elapsed)
+
+
+class TournamentStats:
+    def __init__(self):
+        self.start = time.time()
+        self.games = []  # GameRecord
+        self.rejected = 0
+
+    def add(self, record):
+        self.games.append(record)
+
+    @property
+    def games_per_hour(self):
+        elapsed = time.time() - self.start
+        return 3600.0 * len(self.games) / elapsed if elapsed else 0.0
+
+    @property
+    def wait_time(self):
+        return sum(g.wait for g in self.games)
+
+    def count(self, result):
+        return sum(1 for g in self.games if g.result == result)
+
+    def __str__(self):
+        return '{} games (+{} -{} ={}), {} interrupted, {} rejected, {:.1f} games/hour, waited {:.1f}s in total'.format(
+            len(self.games), self.count('#WIN'), self.count('#LOSE'), self.count('#DRAW'), self.count(None),
+            self.rejected, self.games_per_hour, self.wait_time)
+
+
+class Tournament:
+    """
+    @param player move source
+    @param policy AgreementPolicy (default: agree to every game)
+    @param pool ConnectionPool shared with the shell, or None to use its own
+    @param autosave function which takes a started Game and attaches core.autosave.AutoSaver if needed
+    @param retry_delay seconds to wait before reconnecting after the connection is lost, doubled on each failure
+                       in a row up to max_retry_delay
+    """
+
+    def __init__(self, host, port, username, password, player, policy=None, pool=None, autosave=None,
+                 retry_delay=1.0, max_retry_delay=60.0):
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.player = player
+        self.policy = policy or AgreementPolicy()
+        self.pool = pool or ConnectionPool()
+        self.autosave = autosave
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.stats = TournamentStats()
+
+    def __client(self):
+        c = self.pool.acquire(self.host, self.port, self.username)
+        if c.state == CONNECTED and not c.login(self.username, self.password)[0]:
+            self.pool.release(c)
+            raise LoginError(self.username)
+        return c
+
+    def run(self, max_games=None, on_game=None, on_reject=None, on_error=None):
+        """
+        Play until max_games games (default: forever) have been played.
+        A lost connection is closed and replaced with a new one, after a delay; the game played on it is recorded
+        as interrupted.
+        @param on_game function called with (Game, GameRecord) after each game
+        @param on_reject function called with (game condition, reason) when the policy rejects a game
+        @param on_error function called with (exception, seconds before reconnecting) when the connection is lost
+        @return TournamentStats
+        """
+        failures = 0
+        while max_games is None or len(self.stats.games) < max_games:
+            c = None
+            try:
+                c = self.__client()
+                start = time.time()
+                cond = c.get_game_condition()[0]
+                wait = time.time() - start
+                failures = 0
+
+                reason = self.policy.check(cond)
+                if reason is not None:
+                    c.reject(cond)
+                    self.stats.rejected += 1
+                    if on_reject:
+                        on_reject(cond, reason)
+                    continue
+
+                c.agree(cond)
+                if not c.get_agreement(cond)[0]:
+                    continue
+
+                game, record = self.play(c, cond, wait)
+                self.stats.add(record)
+                if on_game:
+                    on_game(game, record)
+            except (GameInterrupted, ClosedConnectionError, OSError) as e:
+                # a broken connection never goes back to the pool
+                if c is not None:
+                    c.close()
+                    c = None
+                if isinstance(e, GameInterrupted):
+                    self.stats.add(e.record)
+                failures += 1
+                delay = min(self.retry_delay * 2 ** (failures - 1), self.max_retry_delay)
+                if on_error:
+                    on_error(e, delay)
+                time.sleep(delay)
+            finally:
+                if c is not None:
+                    self.pool.release(c)
+        return self.stats
+
+    def play(self, c, cond, wait):
+        """
+        Play the started game.
+        @return tuple of (Game, GameRecord)
+        @raise GameInterrupted if the connection is lost
+        """
+        start = time.time()
+        game = Game(cond)
+        if self.autosave:
+            self.autosave(game)
+
+        def record(result=None, reason=None):
+            s = cond['Game_Summary']
+            return GameRecord(game.id, s['Name-'] if game.my_turn == BLACK else s['Name+'], game.my_turn, result,
+                              reason, sum(1 for mv in game.history if not mv.is_special), wait, time.time() - start)
+
+        try:
+            reason, result = self.__play_moves(c, game)
+        except (ClosedConnectionError, OSError) as e:
+            raise GameInterrupted(record()) from e
+        finally:
+            if game.autosave:
+                game.autosave.close()
+                game.autosave = None
+        return game, record(result, reason)
+
+    def __play_moves(self, c, game):
+        """@return tuple of (game end reason, result) from the server"""
+        while True:
+            if game.is_my_turn():
+                mv = checked_move(self.player, game)[0]
+                if mv == '%TORYO':
+                    ret = c.resign()
+                elif mv == '%KACHI':
+                    ret = c.declare_win()
+                else:
+                    ret = c.move(mv)
+            else:
+                self.player.start_ponder(game)
+                ret = c.get_move()
+
+            mv, tm, reason, result = ret
+            # a move is played only if the server confirmed it
+            if mv is not None and not mv.startswith('%') and tm is not None:
+                game.move(Move(mv, tm))
+            if reason is not None:
+                game.move(Move(mv, tm) if mv is not None and mv.startswith('%') else Move(reason))
+                self.player.game_over(result)
+                return reason, result
+
+
+if __name__ == '__main__':
+    pass
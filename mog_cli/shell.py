@@ -3,13 +3,13 @@
 """Interactive shell."""
 
 import sys
-import traceback
-from command import *
-from util.logger import logger
+import command
 
 
 class ShellExit(Exception):
-    pass
+    def __init__(self, status=None):
+        super().__init__(status)
+        self.status = status
 
 
 class CommandError(Exception):
@@ -24,16 +24,38 @@ class CommandFailedError(Exception):
     pass
 
 
-MODE_INIT, MODE_NETWORK, MODE_STANDALONE = range(3)
+MODE_INIT, MODE_NETWORK, MODE_STANDALONE, MODE_MONITOR = range(4)
+
+# exit status of the shell
+EXIT_SUCCESS, EXIT_FAILURE, EXIT_USAGE = range(3)
 
 
 class Shell:
 
-    def __init__(self, default_host, default_port, default_user, default_pass, input=sys.stdin, output=sys.stdout):
+    def __init__(self, default_host, default_port, default_user, default_pass, input=sys.stdin, output=sys.stdout,
+                 batch=False, autosave_dir=None, sync_interval=1.0, store_path=None, capture_dir=None):
         self.input = input
         self.output = output
+
+        # batch mode: no prompts, confirmations take their defaults, stop at the first error
+        self.batch = batch
         self.game = None
         self.csa_client = None
+        self.pool = None  # idle server connections (network.pool.ConnectionPool)
+        self.engine = None  # move source backed by the external engine (engine.usi.UsiPlayer)
+        self.replay = None  # cursor of the REPLAY command (core.replay.Replay)
+        self.monitor = None  # connection of the monitor mode (network.monitor.MonitorClient)
+
+        # network games are saved move by move in this directory
+        self.autosave_dir = autosave_dir
+        self.sync_interval = sync_interval
+
+        # finished games are added to the game store (archive.store.GameStore), opened on first use
+        self.store_path = store_path
+        self.store = None
+
+        # wire logs of the server connections are written in this directory (network.capture)
+        self.capture_dir = capture_dir
 
         # default parameters for CsaClient
         self.default_host = default_host
@@ -43,13 +65,14 @@ class Shell:
 
         self.set_mode(MODE_INIT)
 
-    def __set_commands(self, *commands):
+    def __set_commands(self, *class_names):
         self.commands = {}
-        for command in commands:
-            for alias in command.alias():
-                self.commands[alias.upper()] = command
+        for cmd in command.lazy(*class_names):
+            for alias in cmd.alias():
+                self.commands[alias.upper()] = cmd
 
     def set_mode(self, mode):
+        self.mode = mode
         if mode == MODE_INIT:
             if self.game:
                 # self.prompt = lambda s: '[not connected]{}{:03d}(end)> '.format(s.game.turn, len(s.game.history))
@@ -59,27 +82,124 @@ class Shell:
                 # self.prompt = lambda s: '[not connected]> '
                 self.prompt = lambda: '[not connected]> '
             self.__set_commands(
-                HelpCommand(),
-                ExitCommand(),
-                LoginCommand(),
-                HistoryCommand(),
-                InfoCommand(),
+                'HelpCommand',
+                'ExitCommand',
+                'LoginCommand',
+                'MonitorCommand',
+                'TournamentCommand',
+                'HistoryCommand',
+                'BoardCommand',
+                'ReplayCommand',
+                'InfoCommand',
+                'TsumeCommand',
+                'ExportCommand',
+                'EvalCommand',
+                'EngineCommand',
+                'NewCommand',
+                'LoadCommand',
+                'RecoverCommand',
+                'IngestCommand',
+                'GamesCommand',
+                'PositionCommand',
+                'ValidateCommand',
+                'ConvertCommand',
+                'SelfPlayCommand',
             )
         elif mode == MODE_NETWORK:
             # self.prompt = lambda s: '[{}:{}]{}{:03d}> '.format(
             self.prompt = lambda: '[{}:{}]{:03d}> '.format(
                 self.csa_client.host, self.csa_client.port, len(self.game.history))
             self.__set_commands(
-                HelpCommand(),
-                HistoryCommand(),
-                InfoCommand(),
-                MoveCommand(),
-                ResignCommand(),
-                WinCommand(),
+                'HelpCommand',
+                'HistoryCommand',
+                'BoardCommand',
+                'ReplayCommand',
+                'InfoCommand',
+                'TsumeCommand',
+                'EvalCommand',
+                'EngineCommand',
+                'GoCommand',
+                'MoveCommand',
+                'ResignCommand',
+                'WinCommand',
             )
         elif mode == MODE_STANDALONE:
-            # TODO: implement
-            pass
+            self.prompt = lambda: '[standalone]{}{:03d}{}> '.format(
+                self.game.state.to_move, len(self.game.history), '(end)' if self.game.is_over() else '')
+            self.__set_commands(
+                'HelpCommand',
+                'ExitCommand',
+                'LoginCommand',
+                'HistoryCommand',
+                'BoardCommand',
+                'ReplayCommand',
+                'InfoCommand',
+                'TsumeCommand',
+                'EvalCommand',
+                'EngineCommand',
+                'GoCommand',
+                'MoveCommand',
+                'ResignCommand',
+                'NewCommand',
+                'LoadCommand',
+                'RecoverCommand',
+                'IngestCommand',
+                'GamesCommand',
+                'PositionCommand',
+                'ValidateCommand',
+                'ConvertCommand',
+                'SelfPlayCommand',
+            )
+        elif mode == MODE_MONITOR:
+            self.prompt = lambda: '[monitor {}:{}]{}> '.format(
+                self.monitor.host, self.monitor.port, len(self.monitor.games))
+            self.__set_commands(
+                'HelpCommand',
+                'ExitCommand',
+                'MonitorCommand',
+            )
+
+    def start_autosave(self, game):
+        """Save the game in the autosave directory, if any."""
+        if self.autosave_dir:
+            import os
+            from core import autosave
+            path = os.path.join(self.autosave_dir, '{}.csa'.format(game.id))
+            autosave.attach(game, path, self.sync_interval)
+
+    @staticmethod
+    def stop_autosave(game):
+        if game and game.autosave:
+            game.autosave.close()
+            game.autosave = None
+
+    def connection_pool(self):
+        """@return ConnectionPool of the server connections, created on first use"""
+        if self.pool is None:
+            from network.pool import ConnectionPool
+            if self.capture_dir:
+                from network.capture import capture_factory
+                self.pool = ConnectionPool(factory=capture_factory(self.capture_dir))
+            else:
+                self.pool = ConnectionPool()
+        return self.pool
+
+    def game_store(self):
+        """@return GameStore opened from store_path"""
+        if self.store is None:
+            if not self.store_path:
+                raise CommandFailedError('no game store (use --store)')
+            from archive.store import GameStore
+            self.store = GameStore(self.store_path)
+        return self.store
+
+    def store_game(self, game, result=None):
+        """
+        Add the finished game to the game store, if any.
+        @param result '#WIN', '#LOSE' or '#DRAW' from the server, if known
+        """
+        if self.store_path:
+            self.game_store().add_game(game, result=result)
 
     def sys_message(self, message):
         self.output.write('### {}\n'.format(message))
@@ -90,9 +210,16 @@ class Shell:
         self.output.write('\n'.join(['*' * width, '*' + s.center(width - 2) + '*', '*' * width, '']))
 
     def start(self):
+        """
+        Read and run commands until EOF or EXIT.
+        @return exit status: EXIT_SUCCESS, EXIT_FAILURE when a command failed,
+                EXIT_USAGE when an unknown command was given
+        """
+        status = EXIT_SUCCESS
         while True:
-            self.output.write(self.prompt())
-            self.output.flush()
+            if not self.batch:
+                self.output.write(self.prompt())
+                self.output.flush()
 
             try:
                 line = self.input.readline()
@@ -100,11 +227,11 @@ class Shell:
                     raise ShellExit
 
                 line = line.strip()
-                if not line:  # empty line
+                if not line or line.startswith('#'):  # empty line or comment
                     continue
 
                 # Get command name.
-                cmd_args = line.split(' ')
+                cmd_args = line.split()
                 cmd_name = cmd_args.pop(0)
 
                 cmd_name_upper = cmd_name.upper()
@@ -112,25 +239,91 @@ class Shell:
 
                 if not cmd:
                     self.output.write('unknown command: {}\n'.format(cmd_name))
+                    status = EXIT_USAGE
+                    if self.batch:
+                        break
                     continue
 
                 self.commands[cmd_name_upper].run(*cmd_args)(self)
 
-            except (ShellExit, EOFError):
+            except ShellExit as e:
+                if e.status is not None:
+                    status = e.status
+                break
+            except EOFError:
                 break
             except KeyboardInterrupt:
-                pass
+                if self.batch:
+                    status = EXIT_FAILURE
+                    break
             except Exception as e:
+                # only needed on failure
+                import traceback
+                from util.logger import logger
                 logger.debug(traceback.format_exc())
                 self.output.write('Exception: {}\n'.format(repr(e)))
+                status = EXIT_FAILURE
+                if self.batch:
+                    break
+
+        if self.engine:
+            self.engine.close()
+            self.engine = None
+        if self.monitor:
+            self.monitor.close()
+            self.monitor = None
+        self.stop_autosave(self.game)
+        if self.csa_client:
+            self.csa_client.close()
+            self.csa_client = None
+        if self.pool:
+            self.pool.close()
+            self.pool = None
+        if self.store:
+            self.store.close()
+            self.store = None
+        self.output.flush()
+        return status
+
+    def confirm(self, prompt, default=True):
+        """
+        Ask yes or no. In batch mode the default answer is taken without reading input.
+        @return boolean
+        """
+        if self.batch:
+            self.sys_message('{}: {}'.format(prompt, 'yes' if default else 'no'))
+            return default
+
+        while True:
+            self.output.write('{} [{}]: '.format(prompt, 'Y/n' if default else 'y/N'))
+            self.output.flush()
+            line = self.input.readline()
+            if not line:
+                raise EOFError
+            ret = line.strip().upper()
+            if ret == '':
+                return default
+            if ret in ('Y', 'N'):
+                return ret == 'Y'
+            self.output.write('Invalid input: {}\n'.format(ret))
 
     def interactive_input(self, prompt, default=None, assertion=lambda: True):
         while True:
-            ret = input('{} [{}]? : '.format(prompt, default))
+            if self.batch:
+                ret = ''
+            else:
+                self.output.write('{} [{}]? : '.format(prompt, default))
+                self.output.flush()
+                line = self.input.readline()
+                if not line:
+                    raise EOFError
+                ret = line.strip()
             if ret == '' and default is not None:
                 ret = default
             if assertion(ret):
                 break
+            if self.batch:
+                raise CommandArgumentsError('no default value for {}'.format(prompt))
             self.output.write('Invalid input: {}\n'.format(ret))
         return ret
 
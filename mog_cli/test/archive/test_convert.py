@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for converting record collections."""
+
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+from archive.convert import BINARY, CSA, convert_files, read_file
+from core.binary_record import BinaryRecord
+
+KIF = """先手：先手太郎
+後手：後手花子
+手数----指手---------消費時間--
+   1 ７六歩(77)   ( 0:03/00:00:03)
+   2 ３四歩(33)   ( 0:05/00:00:05)
+   3 投了
+"""
+
+KI2 = """先手：A
+後手：B
+▲７六歩    △３四歩    ▲２二角成  △同　銀
+まで4手で先手の勝ち
+"""
+
+CSA_GAMES = 'N+a\nN-b\nPI\n+\n+2726FU\n%CHUDAN\n/\nPI\n+\n+5958OU\n'
+
+
+class TestConvert(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        d = self.dir.name
+        with open(os.path.join(d, 'a.kif'), 'w', encoding='cp932') as f:
+            f.write(KIF + KIF.replace('７六歩', '２六歩').replace('(77)', '(27)'))
+        with open(os.path.join(d, 'b.ki2u'), 'w', encoding='utf-8') as f:
+            # the second game has no piece which can move to 45
+            f.write(KI2 + KI2.replace('２二角成', '４五歩') + KI2)
+        with gzip.open(os.path.join(d, 'c.csa.gz'), 'wt') as f:
+            f.write(CSA_GAMES)
+        with open(os.path.join(d, 'notes.txt'), 'w') as f:
+            f.write('not a record\n')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_convert(self):
+        src = self.dir.name
+        for fmt in (CSA, BINARY):
+            for jobs in (1, 2):
+                out = os.path.join(src, 'out.{}.{}'.format(fmt, jobs))
+                errors = []
+                stats = convert_files([src], out, fmt, jobs, chunk_games=1, on_error=errors.append)
+                self.assertEqual((stats.files, stats.games), (3, 6))
+                self.assertEqual([(os.path.basename(e.path), e.index) for e in errors], [('b.ki2u', 1)])
+                self.assertIn('no piece to move', errors[0].reason)
+
+                games = read_file(out)
+                self.assertEqual([info.get('Name+') for info, _, _ in games],
+                                 ['先手太郎', '先手太郎', 'A', 'A', 'a', None])
+                self.assertEqual([h[0].move_str for _, _, h in games],
+                                 ['+7776FU', '+2726FU', '+7776FU', '+7776FU', '+2726FU', '+5958OU'])
+                self.assertEqual(str(games[0][2][0]), '+7776FU,T3')
+
+        with open(os.path.join(src, 'out.bin.1'), 'rb') as f:
+            binary = f.read()
+        self.assertEqual(BinaryRecord.read(io.BytesIO(binary)), read_file(os.path.join(src, 'out.csa.1')))
+
+    def test_read_file(self):
+        self.assertEqual(len(read_file(os.path.join(self.dir.name, 'a.kif'))), 2)
+        self.assertEqual(len(read_file(os.path.join(self.dir.name, 'c.csa.gz'))), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
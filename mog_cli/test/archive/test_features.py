@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the feature export."""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from core import *
+from core.record import Record
+from archive.features import (HAND_INDEX, NUM_HANDS, NUM_MOVES, NUM_PLANES, PIECE_CODES, SQUARE_INDEX,
+                              export_games, move_index)
+
+RECORD = '''N+alice
+N-bob
+PI
++
++7776FU
+-3334FU
++8822UM
+-3122GI
++0045KA
+%TORYO
+'''
+
+
+def load(prefix, chunk, name):
+    return np.load('{}.{:05d}.{}.npy'.format(prefix, chunk, name), mmap_mode='r')
+
+
+class TestFeatures(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.prefix = os.path.join(self.dir.name, 'features')
+        # five positions in chunks of two
+        self.assertEqual(export_games(Record.iter_read(RECORD.splitlines()), self.prefix, chunk_size=2)[:2], (1, 5))
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_shapes(self):
+        for chunk, n in enumerate([2, 2, 1]):
+            for name, shape, dtype in [('planes', (n, NUM_PLANES, 81), np.uint8), ('hands', (n, NUM_HANDS), np.uint8),
+                                       ('side', (n,), np.uint8), ('moves', (n,), np.int32),
+                                       ('results', (n,), np.int8)]:
+                a = load(self.prefix, chunk, name)
+                self.assertEqual((a.shape, a.dtype), (shape, dtype), name)
+        self.assertFalse(os.path.exists('{}.00003.planes.npy'.format(self.prefix)))
+
+    def test_planes(self):
+        planes = load(self.prefix, 0, 'planes')
+        self.assertEqual(int(planes[0].sum()), 40)  # one plane per piece of the initial position
+        self.assertEqual(planes[0, PIECE_CODES['+FU'] - 1, SQUARE_INDEX['77']], 1)
+        self.assertEqual(planes[0, PIECE_CODES['-KA'] - 1, SQUARE_INDEX['22']], 1)
+        self.assertEqual(planes[1, PIECE_CODES['+FU'] - 1, SQUARE_INDEX['77']], 0)
+        self.assertEqual(planes[1, PIECE_CODES['+FU'] - 1, SQUARE_INDEX['76']], 1)
+        self.assertTrue(((planes.sum(axis=1)) <= 1).all())
+
+    def test_hands(self):
+        self.assertEqual(int(load(self.prefix, 0, 'hands').sum()), 0)
+        hands = load(self.prefix, 2, 'hands')  # before +0045KA; each side has taken a bishop
+        self.assertEqual(hands[0, HAND_INDEX['+KA']], 1)
+        self.assertEqual(hands[0, HAND_INDEX['-KA']], 1)
+        self.assertEqual(int(hands.sum()), 2)
+
+    def test_moves(self):
+        moves = np.concatenate([load(self.prefix, chunk, 'moves') for chunk in range(3)])
+        self.assertEqual(moves[0], (SQUARE_INDEX['77'] * 81 + SQUARE_INDEX['76']) * 2)
+        self.assertEqual(moves[2], (SQUARE_INDEX['88'] * 81 + SQUARE_INDEX['22']) * 2 + 1)  # promotion
+        self.assertEqual(moves[4], ((81 + HAND_PIECE_TYPES.index('KA')) * 81 + SQUARE_INDEX['45']) * 2)  # drop
+        self.assertTrue(((0 <= moves) & (moves < NUM_MOVES)).all())
+
+        state = State()
+        state.set_hirate()
+        self.assertEqual(move_index(state, Move('+7776FU')), moves[0])
+
+    def test_results(self):
+        side = np.concatenate([load(self.prefix, chunk, 'side') for chunk in range(3)])
+        results = np.concatenate([load(self.prefix, chunk, 'results') for chunk in range(3)])
+        self.assertEqual(side.tolist(), [0, 1, 0, 1, 0])
+        # WHITE resigned after the last move, so BLACK to move has won
+        self.assertEqual(results.tolist(), [1, -1, 1, -1, 1])
+
+
+if __name__ == '__main__':
+    unittest.main()
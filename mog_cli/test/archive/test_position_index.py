@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the position index."""
+
+import os
+import tempfile
+import unittest
+
+from core import *
+from core.record import Record
+from archive import position_index
+from archive.position_index import PositionIndex, IndexFormatError
+
+RECORDS_1 = '''N+alice
+N-bob
+PI
++
++7776FU
+-3334FU
++2726FU
+-8384FU
+%TORYO
+/
+N+bob
+N-carol
+PI
++
++2726FU
+-3334FU
++7776FU
+'''
+
+RECORDS_2 = '''N+carol
+N-alice
+PI
++
++7776FU
+-3334FU
++8822UM
+'''
+
+POSITION = '''P1-KY-KE-GI-KI-OU-KI-GI-KE-KY
+P2 * -HI *  *  *  *  * -KA * 
+P3-FU-FU-FU-FU-FU-FU * -FU-FU
+P4 *  *  *  *  *  * -FU *  * 
+P5 *  *  *  *  *  *  *  *  * 
+P6 *  * +FU *  *  *  * +FU * 
+P7+FU+FU * +FU+FU+FU+FU * +FU
+P8 * +KA *  *  *  *  * +HI * 
+P9+KY+KE+GI+KI+OU+KI+GI+KE+KY
+-
+'''
+
+
+class TestPositionIndex(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.paths = []
+        for i, text in enumerate([RECORDS_1, RECORDS_2]):
+            path = os.path.join(self.dir.name, 'games{}.csa'.format(i))
+            with open(path, 'w') as f:
+                f.write(text)
+            self.paths.append(path)
+        self.index_path = os.path.join(self.dir.name, 'positions.idx')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def find(self, text):
+        with PositionIndex(self.index_path) as index:
+            return sorted(index.find(Record.read(text.splitlines())[0][1]))
+
+    def test_find(self):
+        self.assertEqual(position_index.build(self.index_path, self.paths[:1], run_size=3), (2, 5 + 4))
+        matches = self.find(POSITION)
+        self.assertEqual(len(matches), 2)
+        self.assertEqual([ply for _, _, ply in matches], [3, 3])  # transposition
+
+        # the offset locates the game
+        names = sorted(position_index.read_game(path, offset)[0]['Name+'] for path, offset, _ in matches)
+        self.assertEqual(names, ['alice', 'bob'])
+
+        self.assertEqual([ply for _, _, ply in self.find('PI\n+\n')], [0, 0])
+        self.assertEqual(self.find('PI\n-\n'), [])
+
+    def test_merge(self):
+        position_index.build(self.index_path, self.paths[:1])
+        self.assertEqual(position_index.build(self.index_path, self.paths[1:], run_size=2), (1, 9 + 4))
+
+        matches = self.find('PI\n+\n')
+        self.assertEqual(len(matches), 3)
+        self.assertEqual(sorted(os.path.basename(p) for p, _, _ in matches), ['games0.csa', 'games0.csa', 'games1.csa'])
+
+        # after +7776FU -3334FU
+        matches = self.find(POSITION.replace('P6 *  * +FU *  *  *  * +FU * ', 'P6 *  * +FU *  *  *  *  *  * ')
+                            .replace('P7+FU+FU * +FU+FU+FU+FU * +FU', 'P7+FU+FU * +FU+FU+FU+FU+FU+FU')
+                            .replace('\n-\n', '\n+\n'))
+        self.assertEqual([(os.path.basename(p), ply) for p, _, ply in matches], [('games0.csa', 2), ('games1.csa', 2)])
+
+    def test_format_error(self):
+        with open(self.index_path, 'wb') as f:
+            f.write(b'not an index' * 4)
+        self.assertRaises(IndexFormatError, PositionIndex, self.index_path)
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for reading compressed archives."""
+
+import gzip
+import lzma
+import os
+import tempfile
+import unittest
+
+from archive import position_index
+from archive.reader import iter_files, iter_records, record_files
+from archive.store import GameStore
+from core.record import Record, open_record
+
+GAME = 'N+{}\nN-bob\nPI\n+\n+7776FU\n-3334FU\n%TORYO\n'
+
+
+def records(names):
+    return '/\n'.join(GAME.format(name) for name in names)
+
+
+class TestReader(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        d = self.dir.name
+        os.mkdir(os.path.join(d, 'sub'))
+        with open(os.path.join(d, 'a.csa'), 'w') as f:
+            f.write(records(['a1', 'a2']))
+        with gzip.open(os.path.join(d, 'b.csa.gz'), 'wt') as f:
+            f.write(records(['b1']))
+        with lzma.open(os.path.join(d, 'sub', 'c.csa.xz'), 'wt') as f:
+            f.write(records(['c1', 'c2', 'c3']))
+        with open(os.path.join(d, 'notes.txt'), 'w') as f:
+            f.write('not a record\n')
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_record_files(self):
+        files = [os.path.relpath(p, self.dir.name) for p in record_files([self.dir.name])]
+        self.assertEqual(files, ['a.csa', 'b.csa.gz', os.path.join('sub', 'c.csa.xz')])
+
+    def test_open_record(self):
+        with open_record(os.path.join(self.dir.name, 'sub', 'c.csa.xz')) as f:
+            self.assertEqual(len(Record.read(f)), 3)
+
+    def test_iter_records(self):
+        for workers in (1, 2, 4):
+            names = [r[0]['Name+'] for _, r in iter_records([self.dir.name], workers)]
+            self.assertEqual(names, ['a1', 'a2', 'b1', 'c1', 'c2', 'c3'])
+
+    def test_abandon_large_file(self):
+        # more than the buffered blocks, so that the reader thread blocks on the full queue
+        path = os.path.join(self.dir.name, 'large.csa.gz')
+        with gzip.open(path, 'wt') as f:
+            f.write(records(['x{}'.format(i) for i in range(40000)]))
+        for path, lines in iter_files([path, path]):
+            next(lines)
+
+    def test_bulk_tools(self):
+        with GameStore(':memory:') as store:
+            self.assertEqual(store.add_files([self.dir.name]), 6)
+            self.assertEqual(len(store.query(white='bob')), 6)
+
+        index_path = os.path.join(self.dir.name, 'positions.idx')
+        self.assertEqual(position_index.build(index_path, [self.dir.name])[0], 6)
+        with position_index.PositionIndex(index_path) as index:
+            state = Record.read(['PI', '+'])[0][1]
+            matches = index.find(state)
+        self.assertEqual(len(matches), 6)
+        self.assertEqual(sorted(position_index.read_game(p, offset)[0]['Name+'] for p, offset, _ in matches),
+                         ['a1', 'a2', 'b1', 'c1', 'c2', 'c3'])
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for GameStore class."""
+
+import unittest
+
+from core import *
+from core.game import local_condition
+from core.record import Record
+from archive.store import GameStore, DRAW
+
+RECORDS = '''V2.2
+N+alice
+N-bob
+$EVENT:game-1
+$START_TIME:2016/01/30 10:00:00
+$OPENING:YAGURA
+PI
++
++7776FU
+-3334FU
+%TORYO
+/
+N+bob
+N-carol
+$EVENT:game-2
+$START_TIME:2016/02/01 10:00:00
+PI
++
++2726FU
+%SENNICHITE
+/
+N+carol
+N-alice
+$EVENT:game-3
+$START_TIME:2016/02/02 10:00:00
+PI
++
++7776FU
+'''
+
+
+class TestGameStore(unittest.TestCase):
+    def setUp(self):
+        self.store = GameStore(':memory:')
+        self.assertEqual(self.store.add_records(Record.iter_read(RECORDS.splitlines()), batch_size=2), 3)
+
+    def tearDown(self):
+        self.store.close()
+
+    def ids(self, **kwargs):
+        return [row[1] for row in self.store.query(**kwargs)]
+
+    def test_query(self):
+        self.assertEqual(self.store.count(), 3)
+        self.assertEqual(self.ids(), ['game-3', 'game-2', 'game-1'])
+        self.assertEqual(self.ids(player='alice'), ['game-3', 'game-1'])
+        self.assertEqual(self.ids(black='bob'), ['game-2'])
+        self.assertEqual(self.ids(result=WHITE), ['game-1'])
+        self.assertEqual(self.ids(result=DRAW), ['game-2'])
+        self.assertEqual(self.ids(opening='YAGURA'), ['game-1'])
+        self.assertEqual(self.ids(since='2016/02/01', until='2016/02/02'), ['game-2'])
+        self.assertEqual(self.ids(min_plies=2), ['game-1'])
+        self.assertEqual(self.ids(player='alice', limit=1), ['game-3'])
+
+    def test_unfinished(self):
+        row = self.store.query(game_id='game-3')[0]
+        self.assertEqual((row[5], row[6], row[7]), (None, None, 1))
+
+    def test_add_game(self):
+        state = State()
+        state.set_hirate()
+        game = Game(local_condition(state, 'dave', 'erin', 'game-4'))
+        game.move(Move('+7776FU'))
+        game.move(Move('%TORYO'))
+        row_id = self.store.add_game(game)
+
+        self.assertEqual(self.ids(player='dave'), ['game-4'])
+        info, init_state, history = self.store.record(row_id)
+        self.assertEqual(info['Event'], 'game-4')
+        self.assertEqual(init_state, state)
+        self.assertEqual(history, game.history)
+
+    def test_add_network_game(self):
+        state = State()
+        state.set_hirate()
+        game_id = 'wdoor+floodgate-300-10F+dave+erin+20160203120000'
+        game = Game(local_condition(state, 'dave', 'erin', game_id, WHITE))
+        game.move(Move('+7776FU', 1))
+        game.move(Move('#ILLEGAL_MOVE', 3))
+        row_id = self.store.add_game(game, result='#WIN')
+
+        row = self.store.query(game_id=game_id)[0]
+        self.assertEqual(row[0], row_id)
+        self.assertEqual((row[4], row[5], row[6], row[7]), (game.start_time, WHITE, '#ILLEGAL_MOVE', 1))
+        self.assertEqual(self.store.conn.execute('SELECT event FROM games WHERE id = ?', (row_id,)).fetchone(),
+                         ('wdoor+floodgate-300-10F',))
+        self.assertEqual([str(m) for m in self.store.record(row_id)[2]], ['+7776FU,T1', '%ILLEGAL_MOVE,T3'])
+
+        game = Game(local_condition(state, 'dave', 'erin', 'game-5', BLACK))
+        game.move(Move('+7776FU'))
+        game.move(Move('#OUTE_SENNICHITE'))
+        self.store.add_game(game, result='#LOSE')
+        self.store.add_game(game)
+        self.assertEqual([row[5] for row in self.store.query(game_id='game-5')], [None, WHITE])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the archive validator."""
+
+import os
+import tempfile
+import unittest
+
+from archive.validator import validate_files, split_games
+
+RECORDS = '''N+alice
+N-bob
+PI
++
++7776FU
+-3334FU
++8822UM
+-3122GI
++0055KA
+%TORYO
+/
+N+bob
+N-carol
+PI
++
++7776FU
+-3334FU
++8822UM
+-3122GI
++0022KA
+/
+PI
++
++2726FU
+-8384FU
++2625FU
+-8485FU
++2524FU
+-2324FU
++2824HI
+-0086FU
+/
+P1 *  *  *  *  * -OU *  *  * 
+P3 *  *  *  *  * +KI *  *  * 
+P+00KI00FU
+P-00AL
++
++0042KI
+%TSUMI
+/
+P1-OU *  *  *  *  *  *  *  * 
+P2 * +FU *  *  *  *  *  *  * 
+P9 *  *  *  * +OU *  *  *  * 
+P+00KA00KA00KA
++
++0055KA
+'''
+
+
+class TestValidator(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.dir.name, 'games.csa')
+        with open(self.path, 'w') as f:
+            f.write(RECORDS)
+
+    def tearDown(self):
+        self.dir.cleanup()
+
+    def test_split_games(self):
+        with open(self.path, 'rb') as f:
+            games = list(split_games(f))
+        self.assertEqual(len(games), 5)
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        for offset, lines in games:
+            self.assertTrue(data[offset:].decode('utf-8').startswith(lines[0]))
+
+    def check(self, jobs):
+        found = []
+        stats = validate_files([self.path], jobs=jobs, chunk_games=2, on_violation=found.append)
+        self.assertEqual(stats.games, 5)
+        self.assertEqual(stats.violations, found)
+        self.assertEqual([(v.index, v.ply) for v in found], [(1, 5), (2, 8), (4, 0)])
+        self.assertIn('drop on occupied square', found[0].reason)
+        self.assertIn('nifu', found[1].reason)
+        self.assertEqual(found[2].reason, 'too many pieces: 3 KA')
+        self.assertEqual(stats.plies, 5 + 4 + 7 + 1)
+
+    def test_in_process(self):
+        self.check(1)
+
+    def test_pool(self):
+        self.check(2)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for autosave."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+from core import *
+from core.autosave import attach, recover
+from core.game import local_condition
+
+
+class TestAutoSave(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'game.csa')
+        state = State()
+        state.set_hirate()
+        self.game = Game(local_condition(state, 'alice', 'bob', 'game-1', WHITE))
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def play(self, moves):
+        for m in moves:
+            self.game.move(Move(*m))
+
+    def test_save_and_recover(self):
+        self.play([('+7776FU', 3)])
+        attach(self.game, self.path, sync_interval=0.05)
+        self.play([('-3334FU', 2), ('+8822UM', 10), ('%TORYO',)])
+        self.game.autosave.close()
+
+        g = recover(self.path)
+        self.assertEqual(g.id, 'game-1')
+        self.assertEqual(g.my_turn, WHITE)
+        self.assertEqual(g.condition['Game_Summary']['Name+'], 'alice')
+        self.assertEqual(g.history, self.game.history)
+        self.assertEqual(g.state, self.game.state)
+
+    def test_recover_finished(self):
+        # game end reasons of the server are saved as special moves, not as the time of the last move
+        attach(self.game, self.path)
+        self.play([('+7776FU', 1), ('-3334FU', 2), ('#RESIGN', 7)])
+        self.game.autosave.close()
+
+        g = recover(self.path)
+        self.assertEqual([str(m) for m in g.history], ['+7776FU,T1', '-3334FU,T2', '%TORYO,T7'])
+        self.assertTrue(g.is_over())
+        self.assertEqual(g.winner(), self.game.winner())
+
+    def test_recover_finished_without_special_move(self):
+        attach(self.game, self.path)
+        self.play([('+7776FU', 1), ('#OUTE_SENNICHITE', 3)])
+        self.game.autosave.close()
+
+        g = recover(self.path)
+        self.assertEqual([str(m) for m in g.history], ['+7776FU,T1', '#OUTE_SENNICHITE'])
+        self.assertTrue(g.is_over())
+
+    def test_recover_partial(self):
+        attach(self.game, self.path)
+        self.play([('+7776FU', 3), ('-3334FU', 2)])
+        self.game.autosave.close()
+
+        with open(self.path) as f:
+            text = f.read()
+        with open(self.path, 'w') as f:
+            f.write(text[:-5])  # cut off in the middle of '-3334FU'
+
+        g = recover(self.path)
+        self.assertEqual([str(m) for m in g.history], ['+7776FU,T3'])
+
+
+if __name__ == '__main__':
+    unittest.main()
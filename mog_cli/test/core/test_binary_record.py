@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the binary form of records."""
+
+import io
+import unittest
+
+from core.binary_record import MAGIC, BinaryFormatError, BinaryRecord
+from core.record import Record
+
+CSA = """N+先手
+N-後手
+$EVENT:test
+PI
++
++7776FU
+T3
+-3334FU
++8822UM
+T10
+-3122GI
+T1
+%TORYO
+/
+P1 *  *  *  *  *  *  *  * -OU
+P9 *  *  *  *  * +OU *  *  * 
+P+00KI
+P-00AL
+-
+-0029FU
++4958OU
+%+ILLEGAL_ACTION
+"""
+
+
+class TestBinaryRecord(unittest.TestCase):
+    def test_round_trip(self):
+        records = Record.read(CSA.splitlines())
+        data = MAGIC + b''.join(BinaryRecord.write(*r) for r in records)
+        self.assertEqual(BinaryRecord.read(io.BytesIO(data)), records)
+        csa = '/\n'.join('\n'.join(Record.write(*r)) + '\n' for r in records)
+        self.assertLess(len(data), len(csa.encode('utf-8')) / 2)
+
+    def test_broken_file(self):
+        data = BinaryRecord.write(*Record.read(CSA.splitlines())[0])
+        self.assertRaises(BinaryFormatError, BinaryRecord.read, io.BytesIO(data))
+        self.assertRaises(BinaryFormatError, BinaryRecord.read, io.BytesIO(MAGIC + data[:-1]))
+        self.assertRaises(BinaryFormatError, BinaryRecord.read, io.BytesIO(MAGIC + data[:2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
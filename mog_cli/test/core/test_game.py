@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for Game class."""
+
+import random
+import unittest
+
+from core import *
+from core.game import IllegalMoveError, local_condition, SENNICHITE, OUTE_SENNICHITE
+from core.movegen import SQUARES, check_move, check_position, generate_moves
+from core.record import Record
+
+MOVES = ['+7776FU', '-3334FU', '+2726FU', '-8384FU', '+2625FU', '-8485FU', '+6978KI', '-4132KI', '+2524FU']
+
+
+class TestGame(unittest.TestCase):
+    def setUp(self):
+        state = State()
+        state.set_hirate()
+        self.game = Game(local_condition(state))
+
+    def test_history_str(self):
+        self.assertEqual(self.game.history_str(), 'no history')
+        for i, m in enumerate(MOVES):
+            self.game.move(Move(m))
+            # rendering of the full history before the line cache
+            buf = ['{:03d}: {}'.format(j, h) for j, h in enumerate(self.game.history)]
+            expected = ''.join('{:20s}{}'.format(h, '\n' * (j % 4 - 4 + 2)) for j, h in enumerate(buf))
+            self.assertEqual(self.game.history_str(), expected)
+
+    def test_history_range(self):
+        for m in MOVES:
+            self.game.move(Move(m))
+        self.game.move(Move('%TORYO'))
+        self.assertEqual(self.game.history_range(8), ['008: +2524FU', '009: %TORYO'])
+        self.assertEqual(self.game.history_range(1, 3), ['001: -3334FU', '002: +2726FU'])
+        self.assertEqual(self.game.history_range(20), [])
+
+    def test_sennichite(self):
+        cycle = ['+2838HI', '-8272HI', '+3828HI', '-7282HI']
+        for m in cycle * 2 + cycle[:3]:
+            self.game.move(Move(m))
+            self.assertIsNone(self.game.repetition())
+        self.assertEqual(self.game.occurrences(), 3)
+        self.assertIsNone(self.game.repetition(Move('-7262HI')))
+        self.assertEqual(self.game.repetition(Move('-7282HI')), (SENNICHITE, None))
+
+        self.game.move(Move('-7282HI'))
+        self.assertEqual(self.game.occurrences(), 4)
+        self.assertEqual(self.game.repetition(), (SENNICHITE, None))
+
+    def test_perpetual_check(self):
+        state = State(BLACK, {'51': '-OU', '28': '+HI', '99': '+OU'})
+        game = Game(local_condition(state))
+        cycle = ['-5141OU', '+5848HI', '-4151OU', '+4858HI']
+        for m in ['+2858HI'] + cycle * 2 + cycle[:3]:
+            game.move(Move(m))
+        self.assertEqual(game.checks, {BLACK: 6, WHITE: 0})
+        self.assertEqual(game.repetition(Move('+4858HI')), (OUTE_SENNICHITE, BLACK))
+
+        game.move(Move('+4858HI'))
+        self.assertEqual(game.repetition(), (OUTE_SENNICHITE, BLACK))
+
+    def test_checks(self):
+        # discovered check by the bishop, and a direct check by the knight
+        state = State(BLACK, {'11': '-OU', '55': '+KA', '33': '+KE', '99': '+OU'}, {'+KE': 1})
+        game = Game(local_condition(state))
+        game.move(Move('+3321NK'))
+        self.assertEqual(game.checks[BLACK], 1)
+        game.move(Move('-1112OU'))
+        game.move(Move('+0024KE'))
+        self.assertEqual(game.checks[BLACK], 2)
+        game.move(Move('-1213OU'))
+        game.move(Move('+2122NK'))
+        self.assertEqual(game.checks[BLACK], 0)
+
+    def test_move_check(self):
+        for m in MOVES:
+            self.game.move(Move(m), check=True)
+        for m, reason in [('+2423TO', 'not the turn'), ('-5655FU', 'no piece to move'), ('-3121GI', 'unreachable'),
+                          ('-8292RY', 'illegal promotion'), ('-0055FU', 'no FU in hand')]:
+            with self.assertRaises(IllegalMoveError) as cm:
+                self.game.move(Move(m), check=True)
+            self.assertIn(reason, str(cm.exception))
+        self.assertEqual(len(self.game.history), len(MOVES))
+
+        self.game.move(Move('%TORYO'), check=True)
+        self.assertRaises(IllegalMoveError, self.game.move, Move('-3142GI'), check=True)
+
+    def test_check_move_rules(self):
+        def reason(text, mv):
+            return check_move(Record.read(text.splitlines())[0][1], Move(mv))
+
+        nifu = ('P1 *  *  *  * -OU *  *  *  * \nP7 *  *  *  *  *  *  * +FU * \nP9 *  *  *  * +OU *  *  *  * \n'
+                'P+00FU00KE\n+')
+        self.assertEqual(reason(nifu, '+0025FU'), 'nifu')
+        self.assertEqual(reason(nifu, '+0015FU'), None)
+        self.assertEqual(reason(nifu, '+0011FU'), 'drop on the last ranks')
+        self.assertEqual(reason(nifu, '+0012KE'), 'drop on the last ranks')
+        self.assertEqual(reason(nifu, '+5948OU'), None)
+
+        pinned = 'P1 *  *  *  * -HI *  *  *  * \nP5 *  *  *  * +KI *  *  *  * \nP9-OU *  *  * +OU *  *  *  * \n+'
+        self.assertEqual(reason(pinned, '+5545KI'), 'king left in check')
+        self.assertEqual(reason(pinned, '+5554KI'), None)
+
+        pawn = 'P1 *  *  *  * -OU *  *  *  * \nP3 *  *  *  * +FU *  *  *  * \nP9 *  *  *  * +OU *  *  *  * \n+'
+        self.assertEqual(reason(pawn, '+5352FU'), None)
+        self.assertEqual(reason(pawn, '+5352TO'), None)
+
+        uchifuzume = 'P1 *  *  *  *  *  *  * -KY-OU\nP2 *  *  *  *  *  *  * -FU * \n' \
+                     'P3 *  *  *  *  *  *  *  * +KI\nP9 *  *  *  * +OU *  *  *  * \nP+00FU\n+'
+        self.assertEqual(reason(uchifuzume, '+0012FU'), 'uchifuzume')
+
+    def test_check_move_agrees_with_generate_moves(self):
+        rand = random.Random(2)
+        state = self.game.state
+        for _ in range(120):
+            legal = {mv.move_str for mv in generate_moves(state)}
+            if not legal:
+                break
+            t = state.to_move
+            candidates = {'{}{}{}{}'.format(t, src, to, pt) for src in [POS_HAND] + list(state.board)
+                          for to in SQUARES for pt in (HAND_PIECE_TYPES if src == POS_HAND else
+                                                       {state.board[src][1:], UPPER_PIECE_TYPE(state.board[src][1:])})}
+            for m in candidates:
+                self.assertEqual(check_move(state, Move(m)) is None, m in legal, m)
+            state.apply_move(Move(rand.choice(sorted(legal))))
+
+    def test_check_position(self):
+        self.assertIsNone(check_position(self.game.state))
+        state = self.game.state.copy()
+        state.set_board('55', '+FU')
+        self.assertEqual(check_position(state), 'nifu at file 5')
+        state = self.game.state.copy()
+        state.set_hand('-FU')
+        self.assertEqual(check_position(state), 'too many pieces: 19 FU')
+        state = self.game.state.copy()
+        state.set_board('24', '-KY')
+        self.assertEqual(check_position(state), 'too many pieces: 5 KY')
+        state = self.game.state.copy()
+        state.set_board('51', '+FU')
+        self.assertEqual(check_position(state), 'dead piece at 51: +FU')
+
+
+if __name__ == '__main__':
+    unittest.main()
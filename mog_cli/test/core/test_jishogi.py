@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the declaration of win by impasse."""
+
+import unittest
+
+from core import *
+from core.jishogi import RULE_24, declaration_error, can_declare_win, points
+from core.record import Record
+
+# BLACK: king, 11 pieces in the zone (19 points) and R + B in hand (10 points)
+POSITION = '''P1+GI+GI+KI+KI * +KI+KI+KA+HI
+P2 *  *  *  * +OU *  *  *  * 
+P3 *  *  *  *  *  * +TO+TO+TO
+P9 *  *  *  * -OU *  *  *  * 
+P+00HI00KA
++
+'''
+
+
+class TestJishogi(unittest.TestCase):
+    def setUp(self):
+        self.state = Record.read(POSITION.splitlines())[0][1]
+
+    def test_points(self):
+        self.assertEqual(points(self.state, BLACK), (29, 11))
+        self.assertEqual(points(self.state, WHITE), (0, 0))
+
+    def test_declaration(self):
+        self.assertIsNone(declaration_error(self.state))
+        self.assertTrue(can_declare_win(self.state))
+        self.assertEqual(declaration_error(self.state, RULE_24), '29 points')
+
+        self.state.reset_hand('+KA')
+        self.assertEqual(declaration_error(self.state), '24 points')
+
+    def test_conditions(self):
+        self.state.set_board('55', '-HI')
+        self.assertEqual(declaration_error(self.state), 'king is in check')
+
+        self.state.reset_board('55')
+        self.state.reset_board('13')
+        self.state.reset_board('23')
+        self.assertEqual(declaration_error(self.state), '9 pieces in the zone')
+
+        self.state.set_board('13', '+TO')
+        self.state.set_board('23', '+TO')
+        self.state.reset_board('52')
+        self.state.set_board('54', '+OU')
+        self.assertEqual(declaration_error(self.state), 'king is not in the zone')
+
+        self.state.to_move = WHITE  # the king on 59 is in the zone of WHITE
+        self.assertEqual(declaration_error(self.state), '0 pieces in the zone')
+
+        hirate = State()
+        hirate.set_hirate()
+        self.assertFalse(can_declare_win(hirate))
+
+
+if __name__ == '__main__':
+    unittest.main()
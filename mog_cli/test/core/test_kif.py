@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for reading KIF and KI2 records."""
+
+import unittest
+
+from core import *
+from core.kif import KifFormatError, KifRecord, split_games
+
+KIF = """# ---- Kifu for Windows V7 V7.30 棋譜ファイル ----
+開始日時：2020/01/05(日) 9:30:00
+棋戦：テスト棋戦
+手合割：平手　　
+先手：先手太郎
+後手：後手花子
+手数----指手---------消費時間--
+   1 ７六歩(77)   ( 0:03/00:00:03)
+   2 ３四歩(33)   ( 0:05/00:00:05)
+   3 ２二角成(88)   ( 0:10/00:00:13)
+   4 同　銀(31)   ( 0:01/00:00:06)
+   5 ４五角打   ( 1:02/00:01:15)
+   6 投了   ( 0:02/00:00:08)
+まで5手で先手の勝ち
+
+変化：4手
+   4 同　飛(82)   ( 0:01/00:00:06)
+"""
+
+KI2 = """先手：A
+後手：B
+▲７六歩    △３四歩    ▲２二角不成  △同　銀    ▲４五角
+△５二金右
+まで6手で後手の勝ち
+"""
+
+# golds of BLACK around 52, and a gold and pawns in hand
+DIAGRAM = """後手の持駒：なし
+  ９ ８ ７ ６ ５ ４ ３ ２ １
++---------------------------+
+| ・ ・ ・ ・ 金 ・ ・ ・v玉|一
+| ・ ・ ・ 金 ・ ・ ・ ・ ・|二
+| ・ ・ ・ 金 金 金 ・ ・ ・|三
+| ・ ・ ・ ・ ・ ・ ・ ・ ・|四
+| ・ ・ ・ ・ ・ ・ ・ ・ ・|五
+| ・ ・ ・ ・ ・ ・ ・ ・ ・|六
+| ・ ・ ・ ・ ・ ・ ・ ・ ・|七
+| ・ ・ ・ ・ ・ ・ ・ ・ ・|八
+| 玉 ・ ・ ・ ・ ・ ・ ・ ・|九
++---------------------------+
+先手の持駒：金　歩二
+"""
+
+
+def moves(text):
+    return [mv.move_str for mv in KifRecord.read(text.splitlines())[0][2]]
+
+
+class TestKifRecord(unittest.TestCase):
+    def test_kif(self):
+        [(info, state, history)] = KifRecord.read(KIF.splitlines())
+        self.assertEqual(info, {'Start_Time': '2020/01/05 09:30:00', 'Event': 'テスト棋戦',
+                                'Name+': '先手太郎', 'Name-': '後手花子'})
+        hirate = State()
+        hirate.set_hirate()
+        self.assertEqual(state, hirate)
+        self.assertEqual([str(mv) for mv in history],
+                         ['+7776FU,T3', '-3334FU,T5', '+8822UM,T10', '-3122GI,T1', '+0045KA,T62', '%TORYO,T2'])
+
+    def test_ki2(self):
+        [(info, _, history)] = KifRecord.read(KI2.splitlines())
+        self.assertEqual(info, {'Name+': 'A', 'Name-': 'B'})
+        self.assertEqual([mv.move_str for mv in history],
+                         ['+7776FU', '-3334FU', '+8822KA', '-3122GI', '+0045KA', '-6152KI', '%TORYO'])
+
+    def test_relative_notation(self):
+        for text, expected in [('５二金右', '+4352KI'), ('５二金左上', '+6352KI'), ('５二金直', '+5352KI'),
+                               ('５二金寄', '+6252KI'), ('５二金引', '+5152KI'), ('５二金打', '+0052KI'),
+                               ('５五歩', '+0055FU')]:
+            self.assertEqual(moves(DIAGRAM + '▲' + text), [expected], text)
+        for text in ['５二金', '５二金左', '５二角']:
+            self.assertRaises(KifFormatError, moves, DIAGRAM + '▲' + text)
+        self.assertRaises(KifFormatError, moves, DIAGRAM + '△５二金右')
+
+    def test_pinned_piece(self):
+        diagram = DIAGRAM.replace('| ・ ・ ・ ・ 金 ・ ・ ・v玉|一', '| ・ ・ ・ ・ ・ ・ ・ ・v玉|一') \
+            .replace('| ・ ・ ・ 金 ・ ・ ・ ・ ・|二', '| ・ ・ ・ ・ ・ ・ ・ ・ ・|二') \
+            .replace('| ・ ・ ・ 金 金 金 ・ ・ ・|三', '| ・ ・ ・ 金 玉 金 ・ ・v飛|三') \
+            .replace('| 玉 ・ ・ ・ ・ ・ ・ ・ ・|九', '| ・ ・ ・ ・ ・ ・ ・ ・ ・|九')
+        # the gold on 43 cannot leave the line of the rook, so no relative notation is needed
+        self.assertEqual(moves(diagram + '▲５二金'), ['+6352KI'])
+
+    def test_board_diagram(self):
+        [(_, state, _)] = KifRecord.read((DIAGRAM + '後手番\n').splitlines())
+        self.assertEqual(state.to_move, WHITE)
+        self.assertEqual(state.board, {'51': '+KI', '11': '-OU', '62': '+KI', '63': '+KI', '53': '+KI', '43': '+KI',
+                                       '99': '+OU'})
+        self.assertEqual(state.hand, {'+KI': 1, '+FU': 2})
+
+    def test_handicap(self):
+        [(_, state, history)] = KifRecord.read(['手合割：香落ち', '   1 ３四歩(33)', '   2 ７六歩(77)'])
+        self.assertEqual(state.to_move, WHITE)
+        self.assertNotIn('11', state.board)
+        self.assertEqual([mv.move_str for mv in history], ['-3334FU', '+7776FU'])
+        self.assertRaises(KifFormatError, KifRecord.read, ['手合割：その他', '   1 ３四歩(33)'])
+
+    def test_split_games(self):
+        games = list(split_games((KIF + KI2 + KIF).splitlines()))
+        self.assertEqual(len(games), 3)
+        self.assertEqual([len(KifRecord.read_game(g)[2]) for g in games], [6, 7, 6])
+
+    def test_results(self):
+        self.assertEqual(moves('▲７六歩\nまで1手で千日手'), ['+7776FU', '%SENNICHITE'])
+        self.assertEqual(moves('▲７六歩\nまで1手で時間切れにより先手の勝ち'), ['+7776FU', '%TIME_UP'])
+        self.assertEqual(moves('   1 ７六歩(77)\n   2 反則勝ち\n'), ['+7776FU', '%+ILLEGAL_ACTION'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -47,6 +47,48 @@ class TestReadRecord(unittest.TestCase):
         # TODO: implement more test cases
         pass
 
+    def test_hand_pieces(self):
+        txt = """P1 *  *  *  *  * -OU *  *  * \nP+00KI00FU00FU\nP-00HI\n+"""
+
+        self.assertEqual(core.record.Record.read(txt.splitlines()), [
+            ({}, State(BLACK, {'41': '-OU'}, {'+KI': 1, '+FU': 2, '-HI': 1}), [])])
+
+    def test_hand_all_rest(self):
+        # tsume: the defender has every piece not on the board nor in the attacker's hand
+        txt = """P1 *  *  *  *  * -OU *  *  * \nP3 *  *  *  *  * +KI *  *  * \nP+00KI00FU\nP-00AL\n+"""
+
+        state = core.record.Record.read(txt.splitlines())[0][1]
+        self.assertEqual(state.hand, {'+KI': 1, '+FU': 1, '-FU': 17, '-KY': 4, '-KE': 4, '-GI': 4, '-KI': 2,
+                                      '-KA': 2, '-HI': 2})
+
+    def test_game_information_and_moves(self):
+        txt = """V2.2\nN+alice\nN-bob\n$EVENT:game-1\n$START_TIME:2014/01/02 03:04:05\nPI\n+\n""" \
+              """+7776FU\nT3\n-3334FU,T2\n%TORYO"""
+
+        info, state, history = core.record.Record.read(txt.splitlines())[0]
+        self.assertEqual(info, {'Version': '2.2', 'Name+': 'alice', 'Name-': 'bob', 'Event': 'game-1',
+                                'Start_Time': '2014/01/02 03:04:05'})
+        self.assertEqual([str(m) for m in history], ['+7776FU,T3', '-3334FU,T2', '%TORYO'])
+
+    def test_multiple_games(self):
+        txt = """PI\n+\n+2726FU\n/\nPI\n-\n-8384FU\n+2726FU"""
+
+        records = list(core.record.Record.iter_read(txt.splitlines()))
+        self.assertEqual(len(records), 2)
+        self.assertEqual([m.move_str for m in records[0][2]], ['+2726FU'])
+        self.assertEqual(records[1][1].to_move, WHITE)
+        self.assertEqual([m.move_str for m in records[1][2]], ['-8384FU', '+2726FU'])
+
+    def test_replay_game(self):
+        txt = """PI\n+\n+7776FU\n-3334FU\n+8822UM\n-3122GI\n+0055KA\n%TORYO"""
+
+        game = Game.from_record(*core.record.Record.read(txt.splitlines())[0])
+        self.assertEqual(game.state.get_board('22'), '-GI')
+        self.assertEqual(game.state.get_board('55'), '+KA')
+        self.assertEqual(game.state.hand, {'-KA': 1})
+        self.assertEqual(game.state.to_move, WHITE)
+        self.assertEqual(game.winner(), BLACK)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for Replay class."""
+
+import random
+import unittest
+
+from core import *
+from core.game import local_condition
+from core.movegen import generate_moves
+from core.replay import Replay
+
+
+class TestReplay(unittest.TestCase):
+    def setUp(self):
+        rand = random.Random(0)
+        state = State()
+        state.set_hirate()
+        self.game = Game(local_condition(state))
+        self.states = [state.copy()]
+        for _ in range(100):
+            moves = generate_moves(self.game.state)
+            if not moves:
+                break
+            self.game.move(rand.choice(moves))
+            self.states.append(self.game.state.copy())
+        self.game.move(Move('%TORYO'))
+        self.states.append(self.game.state.copy())
+
+    def assertPly(self, replay, ply):
+        self.assertEqual(replay.ply, ply)
+        self.assertEqual(replay.state, self.states[ply])
+        self.assertEqual(str(replay.state), str(self.states[ply]))
+
+    def test_steps(self):
+        replay = Replay(self.game, interval=8)
+        self.assertIsNone(replay.last_move())
+        for i in range(1, len(self.states)):
+            replay.forward()
+            self.assertPly(replay, i)
+        self.assertEqual(replay.forward(), len(self.game.history))
+        self.assertEqual(replay.last_move(), Move('%TORYO'))
+        for i in reversed(range(len(self.states) - 1)):
+            replay.backward()
+            self.assertPly(replay, i)
+        self.assertEqual(replay.backward(), 0)
+
+    def test_jumps(self):
+        replay = Replay(self.game, interval=8)
+        rand = random.Random(1)
+        for _ in range(200):
+            op = rand.randrange(3)
+            n = rand.randrange(len(self.states) + 5)
+            if op == 0:
+                replay.jump(n)
+            elif op == 1:
+                replay.forward(n % 20)
+            else:
+                replay.backward(n % 20)
+            self.assertPly(replay, replay.ply)
+        self.assertEqual(replay.jump(-3), 0)
+        self.assertEqual(replay.jump(10000), len(self.game.history))
+
+    def test_growing_history(self):
+        replay = Replay(self.game, interval=8)
+        self.game.move(Move('%TORYO'))
+        self.assertEqual(replay.jump(10000), len(self.states))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for State class."""
+
+import unittest
+
+from core import *
+
+
+def render(state):
+    """Render the state without the cache."""
+    return str(State(state.to_move, dict(state.board), dict(state.hand)))
+
+
+class TestState(unittest.TestCase):
+    def setUp(self):
+        self.state = State()
+        self.state.set_hirate()
+
+    def test_str(self):
+        self.assertEqual(str(self.state).splitlines()[0], 'P1-KY-KE-GI-KI-OU-KI-GI-KE-KY')
+        self.assertEqual(str(self.state).splitlines()[-3:], ['P+', 'P-', '+'])
+
+    def test_cache_invalidation(self):
+        str(self.state)
+        self.state.compact_str()
+        moves = [Move(m) for m in ['+7776FU', '-3334FU', '+8822UM', '-3122GI', '+0055KA']]
+        undo = []
+        for mv in moves:
+            undo.append(self.state.apply_move(mv))
+            self.assertEqual(str(self.state), render(self.state))
+        self.assertEqual(str(self.state).splitlines()[-3:], ['P+', 'P-00KA', '-'])
+        for mv, u in reversed(list(zip(moves, undo))):
+            self.state.undo_move(mv, u)
+            self.assertEqual(str(self.state), render(self.state))
+
+    def test_copy_keeps_cache_separate(self):
+        str(self.state)
+        s = self.state.copy()
+        s.apply_move(Move('+7776FU'))
+        self.assertEqual(str(self.state), render(self.state))
+        self.assertEqual(str(s), render(s))
+        self.assertNotEqual(str(s), str(self.state))
+
+    def test_compact_str(self):
+        self.state.apply_move(Move('+7776FU'))
+        self.state.apply_move(Move('-3334FU'))
+        self.state.apply_move(Move('+8822UM'))
+        self.assertEqual(self.state.compact_str().splitlines(), [
+            '-: -',
+            ' 9 8 7 6 5 4 3 2 1',
+            ' l n s g k g s n l 1',
+            ' . r . . . . .+B . 2',
+            ' p p p p p p . p p 3',
+            ' . . . . . . p . . 4',
+            ' . . . . . . . . . 5',
+            ' . . P . . . . . . 6',
+            ' P P . P P P P P P 7',
+            ' . . . . . . . R . 8',
+            ' L N S G K G S N L 9',
+            '+: B',
+            'WHITE to move',
+        ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""unit test for move generation and tsume solver"""
+
+import unittest
+from core import *
+from core.movegen import generate_moves, generate_checks, is_checkmate
+from engine.tsume import solve, MATE, NO_MATE, UNKNOWN
+
+
+class TestMoveGen(unittest.TestCase):
+    def perft(self, state, depth):
+        if depth == 0:
+            return 1
+        n = 0
+        for mv in generate_moves(state):
+            undo = state.apply_move(mv)
+            n += self.perft(state, depth - 1)
+            state.undo_move(mv, undo)
+        return n
+
+    def test_hirate_perft(self):
+        s = State()
+        s.set_hirate()
+        self.assertEqual(self.perft(s, 1), 30)
+        self.assertEqual(self.perft(s, 2), 900)
+        self.assertEqual(s, State(BLACK, dict(s.board), {}))
+
+    def test_nifu_and_uchifuzume(self):
+        s = State(BLACK, {'51': '-OU', '41': '-KI', '61': '-KI', '53': '+KI', '57': '+FU'}, {'+FU': 1})
+        drops = [m.move_str for m in generate_moves(s) if m.move_from == POS_HAND]
+        self.assertFalse([m for m in drops if m[3] == '5'])  # nifu
+        s = State(BLACK, {'11': '-OU', '21': '-KE', '13': '+KI'}, {'+FU': 1})
+        self.assertNotIn('+0012FU', [m.move_str for m in generate_moves(s)])  # protected by gold, no escape
+
+    def test_generate_checks(self):
+        s = State(BLACK, {'51': '-OU', '53': '+FU'}, {'+KI': 1})
+        checks = [m.move_str for m in generate_checks(s)]
+        self.assertIn('+0052KI', checks)
+        self.assertNotIn('+0055KI', checks)
+
+
+class TestTsume(unittest.TestCase):
+    def test_mate_in_one(self):
+        s = State(BLACK, {'51': '-OU', '53': '+FU'}, {'+KI': 1})
+        result = solve(s)
+        self.assertEqual(result.status, MATE)
+        self.assertEqual([m.move_str for m in result.moves], ['+0052KI'])
+
+    def test_longer_mate(self):
+        s = State(BLACK, {'21': '-OU', '33': '+HI', '44': '-KY'}, {'+KI': 1})
+        result = solve(s)
+        self.assertEqual(result.status, MATE)
+        self.assertEqual(len(result.moves) % 2, 1)
+        for mv in result.moves:
+            s.apply_move(mv)
+        self.assertTrue(is_checkmate(s))
+
+    def test_no_mate(self):
+        s = State(BLACK, {'51': '-OU', '59': '+OU'}, {'+FU': 1})
+        self.assertEqual(solve(s).status, NO_MATE)
+
+    def test_node_limit(self):
+        s = State(BLACK, {'51': '-OU', '41': '-KI', '61': '-KI'}, {'+KI': 1, '+GI': 1, '+HI': 1})
+        result = solve(s, max_nodes=50)
+        self.assertEqual(result.status, UNKNOWN)
+        self.assertLessEqual(result.nodes, 51)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for Zobrist hashing."""
+
+import random
+import unittest
+
+from core import *
+from core.movegen import generate_moves
+from core.zobrist import hash_of, next_hash
+
+
+class TestZobrist(unittest.TestCase):
+    def test_next_hash(self):
+        rand = random.Random(1)
+        for _ in range(5):
+            state = State()
+            state.set_hirate()
+            h = hash_of(state)
+            for _ in range(150):
+                moves = generate_moves(state)
+                if not moves:
+                    break
+                mv = rand.choice(moves)
+                h = next_hash(h, state, mv)
+                state.apply_move(mv)
+                self.assertEqual(h, hash_of(state))
+
+    def test_hash_of(self):
+        a, b = State(), State()
+        a.set_hirate()
+        b.set_hirate()
+        self.assertEqual(hash_of(a), hash_of(b))
+
+        b.to_move = WHITE
+        self.assertNotEqual(hash_of(a), hash_of(b))
+
+        # transposition
+        for mv in ['+7776FU', '-3334FU', '+2726FU']:
+            a.apply_move(Move(mv))
+        b.to_move = BLACK
+        for mv in ['+2726FU', '-3334FU', '+7776FU']:
+            b.apply_move(Move(mv))
+        self.assertEqual(hash_of(a), hash_of(b))
+
+        # one pawn in hand differs from two pawns
+        a.set_hand('+FU')
+        h = hash_of(a)
+        a.set_hand('+FU')
+        self.assertNotEqual(hash_of(a), h)
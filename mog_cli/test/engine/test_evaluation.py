@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""unit test for static evaluation"""
+
+import random
+import unittest
+from core import *
+from core.movegen import generate_moves
+
+try:
+    from engine import evaluation
+except ImportError:  # numpy is not installed
+    evaluation = None
+
+
+@unittest.skipIf(evaluation is None, 'numpy is not installed')
+class TestEvaluation(unittest.TestCase):
+    def random_states(self, games, plies):
+        rand = random.Random(12345)
+        ret = []
+        for _ in range(games):
+            s = State()
+            s.set_hirate()
+            for _ in range(plies):
+                moves = generate_moves(s)
+                if not moves:
+                    break
+                s.apply_move(rand.choice(moves))
+                ret.append(s.copy())
+        return ret
+
+    def test_hirate_is_even(self):
+        s = State()
+        s.set_hirate()
+        self.assertEqual(evaluation.evaluate(s), 0)
+        self.assertEqual(list(evaluation.evaluate_states([s])), [0])
+
+    def test_batch_matches_scalar(self):
+        states = self.random_states(5, 60)
+        self.assertEqual(list(evaluation.evaluate_states(states)), [evaluation.evaluate(s) for s in states])
+
+    def test_side_to_move(self):
+        s = State(BLACK, {'59': '+OU', '51': '-OU'}, {'+HI': 1})
+        self.assertGreater(evaluation.evaluate(s), 0)
+        s.to_move = WHITE
+        self.assertLess(evaluation.evaluate(s), 0)
+        self.assertEqual(list(evaluation.evaluate_states([s])), [evaluation.evaluate(s)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for local games."""
+
+import unittest
+
+from core import *
+from core.movegen import generate_moves
+from engine.player import RandomPlayer, checked_move, safe_moves
+from engine.standalone import new_game, play_move, IllegalMoveError, SelfPlay
+
+
+class DeclaringPlayer(RandomPlayer):
+    """Declares win at every position; with stubborn, even when asked not to."""
+
+    def __init__(self, stubborn=False):
+        super().__init__(0)
+        self.stubborn = stubborn
+
+    def think(self, game, declare=True):
+        return '%KACHI' if declare or self.stubborn else super().think(game, declare)
+
+
+class TestCheckedMove(unittest.TestCase):
+    def test_declaration_refused(self):
+        game = new_game()
+        mv, reason = checked_move(DeclaringPlayer(), game)
+        self.assertIn(Move(mv), generate_moves(game.state))
+        self.assertIsNotNone(reason)
+
+    def test_stubborn_declaration(self):
+        # the first move generated loses by perpetual check, so another move is played
+        game = new_game(State(WHITE, {'55': '+OU', '16': '-HI', '91': '-OU'}))
+        cycle = ['+5554OU', '-1514HI', '+5455OU', '-1415HI']
+        for m in ['-1615HI'] + cycle * 2 + cycle[:3]:
+            play_move(game, m)
+        mv, reason = checked_move(DeclaringPlayer(stubborn=True), game)
+        self.assertNotEqual(mv, '-1415HI')
+        self.assertIn(mv, [m.move_str for m in safe_moves(game, generate_moves(game.state))])
+        self.assertIsNotNone(reason)
+
+    def test_allowed(self):
+        state = State(BLACK, {'52': '+OU', '59': '-OU'}, {'+HI': 2, '+KA': 2})
+        for pos in ['11', '21', '31', '41', '61', '71', '81', '91', '13', '23']:
+            state.set_board(pos, '+TO')
+        self.assertEqual(checked_move(DeclaringPlayer(), new_game(state)), ('%KACHI', None))
+
+
+class TestPlayMove(unittest.TestCase):
+    def test_legal_and_illegal(self):
+        game = new_game()
+        self.assertIsNone(play_move(game, '+7776FU'))
+        self.assertRaises(IllegalMoveError, play_move, game, '+2726FU')
+        self.assertRaises(IllegalMoveError, play_move, game, '-3335FU')
+        self.assertRaises(IllegalMoveError, play_move, game, '%KACHI')
+        self.assertEqual(len(game.history), 1)
+        self.assertEqual(game.state.to_move, WHITE)
+
+    def test_checkmate(self):
+        game = new_game(State(BLACK, {'51': '-OU', '53': '+FU', '99': '+OU'}, {'+KI': 1}))
+        self.assertEqual(play_move(game, '+0052KI'), Move('%TSUMI'))
+        self.assertTrue(game.is_over())
+        self.assertEqual(game.winner(), BLACK)
+
+    def test_resign(self):
+        game = new_game()
+        self.assertEqual(play_move(game, '%TORYO'), Move('%TORYO'))
+        self.assertEqual(game.winner(), WHITE)
+        self.assertRaises(IllegalMoveError, play_move, game, '-3334FU')
+
+    def test_declare_win(self):
+        state = State(BLACK, {'52': '+OU', '59': '-OU'}, {'+HI': 2, '+KA': 2})
+        for pos in ['11', '21', '31', '41', '61', '71', '81', '91', '13', '23']:
+            state.set_board(pos, '+TO')
+        game = new_game(state)
+        self.assertEqual(RandomPlayer(0).think(game), '%KACHI')
+        self.assertEqual(play_move(game, '%KACHI'), Move('%KACHI'))
+        self.assertEqual(game.winner(), BLACK)
+
+        state.reset_hand('+KA')
+        game = new_game(state)
+        self.assertNotEqual(RandomPlayer(0).think(game), '%KACHI')
+        self.assertRaises(IllegalMoveError, play_move, game, '%KACHI')
+
+    def test_perpetual_check(self):
+        game = new_game(State(BLACK, {'51': '-OU', '28': '+HI', '99': '+OU'}))
+        cycle = ['-5141OU', '+5848HI', '-4151OU', '+4858HI']
+        for m in ['+2858HI'] + cycle * 2 + cycle[:3]:
+            self.assertIsNone(play_move(game, m))
+        self.assertNotEqual(RandomPlayer(0).think(game), '+4858HI')
+        self.assertEqual(play_move(game, '+4858HI'), Move('%+ILLEGAL_ACTION'))
+        self.assertEqual(game.winner(), WHITE)
+
+    def test_max_moves(self):
+        game = new_game()
+        play_move(game, '+2878HI', 4)
+        play_move(game, '-8272HI', 4)
+        play_move(game, '+7828HI', 4)
+        self.assertEqual(play_move(game, '-7282HI', 4), Move('%HIKIWAKE'))
+        self.assertTrue(game.is_over())
+        self.assertIsNone(game.winner())
+
+
+class TestSelfPlay(unittest.TestCase):
+    def test_run(self):
+        games = []
+        stats = SelfPlay(RandomPlayer(1), RandomPlayer(2), max_moves=40).run(3, lambda i, g: games.append(g))
+        self.assertEqual(stats.games, 3)
+        self.assertEqual(stats.black_wins + stats.white_wins + stats.draws, 3)
+        self.assertEqual(stats.plies, sum(sum(1 for mv in g.history if not mv.is_special) for g in games))
+        for g in games:
+            self.assertTrue(g.is_over())
+            self.assertTrue(g.history[-1].is_special)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""unit test for USI engine bridge"""
+
+import os
+import sys
+import unittest
+from core import *
+from core.game import Game, local_condition
+from engine.player import checked_move
+from engine.usi import *
+
+TEST_ENGINE = [sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), 'usi_test_engine.py')]
+
+
+def hirate():
+    s = State()
+    s.set_hirate()
+    return s
+
+
+class TestNotation(unittest.TestCase):
+    def test_csa_to_usi(self):
+        s = hirate()
+        self.assertEqual(csa_to_usi(Move('+7776FU'), s), '7g7f')
+        s = State(BLACK, {'88': '+KA'}, {'+FU': 1})
+        self.assertEqual(csa_to_usi(Move('+8822UM'), s), '8h2b+')
+        self.assertEqual(csa_to_usi(Move('+0055FU'), s), 'P*5e')
+
+    def test_usi_to_csa(self):
+        s = State(WHITE, {'22': '-KA'}, {'-GI': 1})
+        self.assertEqual(usi_to_csa('2b8h+', s), '-2288UM')
+        self.assertEqual(usi_to_csa('2b3c', s), '-2233KA')
+        self.assertEqual(usi_to_csa('S*5e', s), '-0055GI')
+        self.assertEqual(usi_to_csa('resign', s), '%TORYO')
+
+    def test_sfen(self):
+        self.assertEqual(sfen(hirate()), 'lnsgkgsnl/1r5b1/ppppppppp/9/9/9/PPPPPPPPP/1B5R1/LNSGKGSNL b - 1')
+        s = State(WHITE, {'51': '-OU', '59': '+OU'}, {'+FU': 2, '-HI': 1})
+        self.assertEqual(sfen(s), '4k4/9/9/9/9/9/9/9/4K4 w 2Pr 1')
+
+    def test_position_command(self):
+        self.assertEqual(position_command(hirate(), []), 'position startpos')
+        self.assertEqual(position_command(hirate(), [Move('+7776FU'), Move('-3334FU')]),
+                         'position startpos moves 7g7f 3c3d')
+
+
+class TestUsiPlayer(unittest.TestCase):
+    def setUp(self):
+        self.player = UsiPlayer(UsiEngine(TEST_ENGINE, timeout=10))
+        self.game = Game(local_condition(hirate()))
+
+    def tearDown(self):
+        self.player.close()
+
+    def test_think(self):
+        self.assertEqual(self.player.engine.name, 'test-engine')
+        mv = self.player.think(self.game)
+        self.assertEqual(mv, '+1716FU')
+        self.assertEqual(self.player.ponder_move, '-1112KY')
+
+    def test_ponder_hit(self):
+        self.game.move(Move(self.player.think(self.game)))
+        self.assertTrue(self.player.start_ponder(self.game))
+        self.assertTrue(self.player.engine.pondering)
+        self.game.move(Move(self.player.ponder_move))
+        self.assertEqual(self.player.think(self.game), '+1615FU')
+        self.assertFalse(self.player.engine.searching)
+
+    def test_ponder_miss(self):
+        self.game.move(Move(self.player.think(self.game)))
+        self.player.start_ponder(self.game)
+        self.game.move(Move('-9394FU'))
+        self.assertEqual(self.player.think(self.game), '+1615FU')
+        self.assertFalse(self.player.engine.searching)
+
+
+    def test_checked_move(self):
+        # the engine declares win at the initial position, which the impasse rule does not allow
+        player = UsiPlayer(UsiEngine(TEST_ENGINE + ['--win'], timeout=10))
+        self.addCleanup(player.close)
+        self.assertEqual(player.think(self.game), '%KACHI')
+        mv, reason = checked_move(player, self.game)
+        self.assertEqual(mv, '+1716FU')
+        self.assertIsNotNone(reason)
+        self.assertEqual(player.think(self.game, declare=False), '+1716FU')
+
+
+class TestUsiEngine(unittest.TestCase):
+    def test_quit_frozen(self):
+        # the engine replies to neither stop nor quit, so it is killed after the timeout
+        engine = UsiEngine(TEST_ENGINE + ['--frozen'], timeout=0.5)
+        engine.go_ponder('position startpos')
+        engine.quit()
+        self.assertIsNotNone(engine.proc.poll())
+
+    def test_game_over_frozen(self):
+        engine = UsiEngine(TEST_ENGINE + ['--frozen'], timeout=0.5)
+        self.addCleanup(engine.quit)
+        engine.go_ponder('position startpos')
+        self.assertRaises(UsiError, engine.game_over, 'win')
+
+
+if __name__ == '__main__':
+    unittest.main()
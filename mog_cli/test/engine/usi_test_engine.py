@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Minimal USI engine for tests: plays the first legal move in sorted order.
+With --frozen, stop and quit are ignored. With --win, it declares win unless searchmoves are given.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+from core import *
+from core.movegen import generate_moves
+from engine.usi import csa_to_usi, usi_to_csa
+
+
+def parse_position(args):
+    state = State()
+    state.set_hirate()
+    moves = args[args.index('moves') + 1:] if 'moves' in args else []
+    for usi in moves:
+        state.apply_move(Move(usi_to_csa(usi, state)))
+    return state
+
+
+def best(state, searchmoves=None):
+    moves = sorted(generate_moves(state), key=lambda m: m.move_str)
+    if searchmoves:
+        moves = [mv for mv in moves if csa_to_usi(mv, state) in searchmoves]
+    if not moves:
+        return 'resign', None
+    mv = moves[0]
+    undo = state.apply_move(mv)
+    replies = sorted(generate_moves(state), key=lambda m: m.move_str)
+    ponder = csa_to_usi(replies[0], state) if replies else None
+    state.undo_move(mv, undo)
+    return csa_to_usi(mv, state), ponder
+
+
+def main():
+    frozen = '--frozen' in sys.argv[1:]
+    win = '--win' in sys.argv[1:]
+    state, pending = None, None
+    for line in sys.stdin:
+        args = line.split()
+        if not args:
+            continue
+        out = []
+        if args[0] == 'usi':
+            out = ['id name test-engine', 'usiok']
+        elif args[0] == 'isready':
+            out = ['readyok']
+        elif args[0] == 'position':
+            state = parse_position(args)
+        elif args[0] == 'go':
+            searchmoves = args[args.index('searchmoves') + 1:] if 'searchmoves' in args else None
+            result = ('win', None) if win and not searchmoves else best(state, searchmoves)
+            if 'ponder' in args:
+                pending = result
+            else:
+                out = ['bestmove {}{}'.format(result[0], ' ponder {}'.format(result[1]) if result[1] else '')]
+        elif frozen and args[0] in ('stop', 'quit'):
+            continue
+        elif args[0] in ('stop', 'ponderhit') and pending:
+            out = ['info string {}'.format(args[0]), 'bestmove {}'.format(pending[0])]
+            pending = None
+        elif args[0] == 'quit':
+            break
+        for x in out:
+            sys.stdout.write(x + '\n')
+        sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,7 @@
 """Tests for CsaClient class."""
 
 import unittest
+import itertools
 import logging
 import os
 
@@ -14,14 +15,12 @@ SHOGI_SERVER_HOST = os.environ.get('SHOGI_SERVER_HOST', 'localhost')
 
 # logger.setLevel(logging.INFO)
 
-# counter for making unique username
-counter = 0
+# counter for making unique username, also across processes running the test classes in parallel
+counter = itertools.count(1)
 
 
 def setup():
-    global counter
-    counter += 1
-    return CsaClient(SHOGI_SERVER_HOST), 'user{}'.format(counter)
+    return CsaClient(SHOGI_SERVER_HOST), 'user{}_{}'.format(os.getpid(), next(counter))
 
 
 def teardown(client):
@@ -200,6 +199,7 @@ class TestAgree(unittest.TestCase):
 class TestGetAgreement(unittest.TestCase):
 
     def setUp(self):
+        self.driver = ConcurrentDriver()
         self.c1, self.user1 = setup()
         self.c2, self.user2 = setup()
         self.c1.login(self.user1, 'pass1')
@@ -218,6 +218,7 @@ class TestGetAgreement(unittest.TestCase):
             self.white = self.c1
 
     def tearDown(self):
+        self.driver.close()
         teardown(self.c1)
         teardown(self.c2)
 
@@ -244,12 +245,12 @@ class TestGetAgreement(unittest.TestCase):
 
     def test_get_agreement_before_peer_agree(self):
         self.c1.agree(self.cond1)
-        ret, state2 = a_before_b(partial(CsaClient.get_agreement, self.c1, self.cond1),
-                                 exec_then_get_state(CsaClient.agree, self.c2, self.cond2))
+        ret, state2 = self.driver.a_before_b(partial(CsaClient.get_agreement, self.c1, self.cond1),
+                                             exec_then_get_state(CsaClient.agree, self.c2, self.cond2), self.c1)
 
         self.assertEqual(ret, (True, 'START:{}'.format(self.game_id)))
+        self.assertEqual(state2, START_WAITING)
 
-        self.c2.state = state2  # fix state of subprocess
         self.c2.get_agreement(self.cond2)
 
         self.assertEqual(self.black.state, GAME_TO_MOVE)
@@ -257,8 +258,8 @@ class TestGetAgreement(unittest.TestCase):
 
     def test_get_agreement_before_peer_reject(self):
         self.c1.agree(self.cond1)
-        ret, state2 = a_before_b(partial(CsaClient.get_agreement, self.c1, self.cond1),
-                                 exec_then_get_state(CsaClient.reject, self.c2, self.cond2))
+        ret, state2 = self.driver.a_before_b(partial(CsaClient.get_agreement, self.c1, self.cond1),
+                                             exec_then_get_state(CsaClient.reject, self.c2, self.cond2), self.c1)
 
         self.assertEqual(ret, ((False, 'REJECT:{} by {}'.format(self.game_id, self.user2))))
         self.assertEqual(self.c1.state, GAME_WAITING)
@@ -267,6 +268,7 @@ class TestGetAgreement(unittest.TestCase):
 class TestReject(unittest.TestCase):
 
     def setUp(self):
+        self.driver = ConcurrentDriver()
         self.c1, self.user1 = setup()
         self.c2, self.user2 = setup()
         self.c1.login(self.user1, 'pass1')
@@ -279,6 +281,7 @@ class TestReject(unittest.TestCase):
         assert self.game_id == self.cond2['Game_Summary']['Game_ID']
 
     def tearDown(self):
+        self.driver.close()
         teardown(self.c1)
         teardown(self.c2)
 
@@ -290,14 +293,14 @@ class TestReject(unittest.TestCase):
         self.assertEqual(self.c1.state, GAME_WAITING)
 
     def test_reject_after_peer_agree(self):
-        ret, state2 = a_after_b(partial(CsaClient.reject, self.c1, self.cond1),
-                                exec_then_get_state(CsaClient.agree, self.c2, self.cond2))
+        ret, state2 = self.driver.a_after_b(partial(CsaClient.reject, self.c1, self.cond1),
+                                            exec_then_get_state(CsaClient.agree, self.c2, self.cond2), self.c2)
         self.assertEqual(ret, ('REJECT:{} by {}'.format(self.game_id, self.user1)))
         self.assertEqual(self.c1.state, GAME_WAITING)
 
     def test_reject_after_peer_reject(self):
-        ret, state2 = a_after_b(partial(CsaClient.reject, self.c1, self.cond1),
-                                exec_then_get_state(CsaClient.reject, self.c2, self.cond2))
+        ret, state2 = self.driver.a_after_b(partial(CsaClient.reject, self.c1, self.cond1),
+                                            exec_then_get_state(CsaClient.reject, self.c2, self.cond2), self.c2)
         self.assertEqual(ret, ('REJECT:{} by {}'.format(self.game_id, self.user2)))
         self.assertEqual(self.c1.state, GAME_WAITING)
 
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for MonitorClient class with a fake server."""
+
+import socket
+import threading
+import unittest
+
+from core import *
+from network.monitor import MonitorClient, WatchedGame
+
+HIRATE = [
+    'P1-KY-KE-GI-KI-OU-KI-GI-KE-KY',
+    'P2 * -HI *  *  *  *  * -KA * ',
+    'P3-FU-FU-FU-FU-FU-FU-FU-FU-FU',
+    'P4 *  *  *  *  *  *  *  *  * ',
+    'P5 *  *  *  *  *  *  *  *  * ',
+    'P6 *  *  *  *  *  *  *  *  * ',
+    'P7+FU+FU+FU+FU+FU+FU+FU+FU+FU',
+    'P8 * +KA *  *  *  *  * +HI * ',
+    'P9+KY+KE+GI+KI+OU+KI+GI+KE+KY',
+    '+',
+]
+
+
+def record(game_id, moves):
+    lines = ['V2', 'N+black', 'N-white', '$EVENT:{}'.format(game_id)] + HIRATE
+    for m in moves:
+        lines.extend([m, 'T1'])
+    return lines
+
+
+def tagged(game_id, lines):
+    return ''.join('##[MONITOR2][{}] {}\n'.format(game_id, x) for x in lines + ['+OK'])
+
+
+class FakeServer(threading.Thread):
+    """Accept one connection and reply to LOGIN, %%LIST and %%MONITOR2ON."""
+
+    def __init__(self, games):
+        super().__init__(daemon=True)
+        self.games = games
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.conn = None
+        self.ready = threading.Event()
+
+    def run(self):
+        self.conn, _ = self.listener.accept()
+        self.ready.set()
+        for line in self.conn.makefile('r'):
+            xs = line.split()
+            if xs[0] == 'LOGIN':
+                self.conn.sendall('##[LOGIN] +OK x1\nLOGIN:{} OK\n'.format(xs[1]).encode())
+            elif xs[0] == '%%LIST':
+                self.conn.sendall(''.join('##[LIST] {}\n'.format(g) for g in self.games).encode() + b'##[LIST] +OK\n')
+            elif xs[0] == '%%MONITOR2ON':
+                self.conn.sendall(tagged(xs[1], record(xs[1], self.games[xs[1]])).encode())
+
+    def send(self, data):
+        self.ready.wait()
+        self.conn.sendall(data.encode())
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+        self.listener.close()
+
+
+class TestWatchedGame(unittest.TestCase):
+    def test_feed(self):
+        g = WatchedGame('g1')
+        for x in record('g1', ['+7776FU']):
+            self.assertFalse(g.feed(x))
+        self.assertTrue(g.feed('+OK'))
+        self.assertEqual(g.game.id, 'g1')
+        self.assertEqual(len(g.game.history), 1)
+        row = g.row()
+        self.assertIs(g.row(), row)
+
+        for x in ['-3334FU', 'T5', '+OK']:
+            g.feed(x)
+        self.assertEqual(str(g.game.history[-1]), '-3334FU,T5')
+        self.assertIn('to move: +', g.row())
+        self.assertFalse(g.is_over())
+
+        for x in ['%TORYO', '#RESIGN', '+OK']:
+            g.feed(x)
+        self.assertTrue(g.is_over())
+        self.assertIn('#RESIGN', g.row())
+
+
+class TestMonitorClient(unittest.TestCase):
+    def setUp(self):
+        self.games = {'game-{}'.format(i): ['+7776FU', '-3334FU'][:i % 3] for i in range(200)}
+        self.server = FakeServer(self.games)
+        self.server.start()
+        self.client = MonitorClient('127.0.0.1', self.server.port)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.close()
+
+    def poll_until(self, predicate):
+        changed = []
+        while not predicate(changed):
+            changed.extend(self.client.poll(5))
+        return changed
+
+    def test_watch_many(self):
+        self.assertEqual(self.client.login('watcher', 'pass'), (True, 'LOGIN:watcher OK'))
+        self.client.request_list()
+        self.poll_until(lambda _: self.client.game_list is not None)
+        self.assertEqual(self.client.game_list, list(self.games))
+
+        self.client.watch(*self.client.game_list)
+        self.poll_until(lambda c: len(set(c)) == len(self.games))
+        for game_id, moves in self.games.items():
+            self.assertEqual([m.move_str for m in self.client.games[game_id].game.history], moves)
+
+        # moves of two games arrive interleaved
+        self.server.send('##[MONITOR2][game-0] +2726FU\n##[MONITOR2][game-1] -3334FU\n'
+                         '##[MONITOR2][game-0] T3\n##[MONITOR2][game-0] +OK\n##[MONITOR2][game-1] T2\n')
+        self.assertEqual(self.poll_until(lambda c: c), ['game-0'])
+        self.server.send('##[MONITOR2][game-1] +OK\n')
+        self.assertEqual(self.poll_until(lambda c: c), ['game-1'])
+        self.assertEqual(str(self.client.games['game-1'].game.history[-1]), '-3334FU,T2')
+
+        table = self.client.table(['game-0'])
+        self.assertEqual(len(table), 2)
+        self.assertIn('+2726FU', table[1])
+
+
+if __name__ == '__main__':
+    unittest.main()
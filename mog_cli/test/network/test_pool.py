@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for ConnectionPool class with a fake server."""
+
+import socket
+import threading
+import unittest
+
+from network.csa_client import CONNECTED, GAME_WAITING
+from network.pool import ConnectionPool
+
+
+class FakeServer(threading.Thread):
+    """Accept connections and reply to LOGIN and LOGOUT."""
+
+    def __init__(self):
+        super().__init__(daemon=True)
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(8)
+        self.port = self.listener.getsockname()[1]
+        self.connections = []
+        self.accepted = threading.Condition()
+
+    def run(self):
+        while True:
+            try:
+                conn, _ = self.listener.accept()
+            except OSError:
+                return
+            with self.accepted:
+                self.connections.append(conn)
+                self.accepted.notify_all()
+            threading.Thread(target=self.serve, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def serve(conn):
+        try:
+            for line in conn.makefile('r'):
+                xs = line.split()
+                if xs[0] == 'LOGIN':
+                    conn.sendall('LOGIN:{} OK\n'.format(xs[1]).encode())
+                elif xs[0] == 'LOGOUT':
+                    conn.sendall(b'LOGOUT:completed\n')
+        except OSError:
+            pass
+
+    def wait_connections(self, n):
+        with self.accepted:
+            self.accepted.wait_for(lambda: len(self.connections) >= n, 5)
+        return len(self.connections)
+
+    def close(self):
+        self.listener.close()
+        for c in self.connections:
+            c.close()
+
+
+class TestConnectionPool(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeServer()
+        self.server.start()
+        self.pool = ConnectionPool(max_idle=2)
+
+    def tearDown(self):
+        self.pool.close()
+        self.server.close()
+
+    def test_reuse_logged_in(self):
+        c = self.pool.acquire('127.0.0.1', self.server.port, 'user1')
+        self.assertEqual(c.state, CONNECTED)
+        c.login('user1', 'pass')
+        self.pool.release(c)
+
+        self.assertIs(self.pool.acquire('127.0.0.1', self.server.port, 'user1'), c)
+        self.assertEqual(c.state, GAME_WAITING)
+        self.pool.release(c)
+
+        # another user gets a new connection
+        d = self.pool.acquire('127.0.0.1', self.server.port, 'user2')
+        self.assertIsNot(d, c)
+        self.assertEqual(d.state, CONNECTED)
+        self.assertEqual(self.server.wait_connections(2), 2)
+
+    def test_reuse_connected(self):
+        c = self.pool.acquire('127.0.0.1', self.server.port)
+        self.pool.release(c)
+        self.assertIs(self.pool.acquire('127.0.0.1', self.server.port, 'user1'), c)
+
+    def test_drop_closed(self):
+        c = self.pool.acquire('127.0.0.1', self.server.port)
+        self.pool.release(c)
+        self.server.wait_connections(1)
+        for conn in self.server.connections:
+            conn.shutdown(socket.SHUT_RDWR)
+        d = self.pool.acquire('127.0.0.1', self.server.port)
+        self.assertIsNot(d, c)
+
+    def test_max_idle(self):
+        clients = [self.pool.acquire('127.0.0.1', self.server.port) for _ in range(3)]
+        for i, c in enumerate(clients):
+            c.login('user{}'.format(i), 'pass')
+            self.pool.release(c)
+        self.assertEqual(self.pool.idle[('127.0.0.1', self.server.port)], clients[1:])
+        self.assertEqual(clients[0].state, CONNECTED)  # logged out and closed
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the classification of server lines and the state transitions of CsaClient."""
+
+import unittest
+
+from network.csa_client import *
+
+
+class TestProtocol(unittest.TestCase):
+    def test_classify_move(self):
+        self.assertEqual(classify('+7776FU,T12'), Event(MOVE, '+7776FU,T12', '+7776FU', 12))
+        self.assertEqual(classify('-0055KA,T0'), Event(MOVE, '-0055KA,T0', '-0055KA', 0))
+        self.assertEqual(classify('+7776FU'), Event(MOVE, '+7776FU', '+7776FU', None))
+        self.assertEqual(classify('+7770FU,T1').kind, OTHER)
+        self.assertEqual(classify('+7776FU,T').kind, OTHER)
+        self.assertEqual(classify('+7776fu,T1').kind, OTHER)
+
+    def test_classify_special(self):
+        self.assertEqual(classify('%TORYO,T3'), Event(SPECIAL, '%TORYO,T3', '%TORYO', 3))
+        self.assertEqual(classify('%KACHI'), Event(SPECIAL, '%KACHI', '%KACHI', None))
+        self.assertEqual(classify('%TORYO,Tx').kind, OTHER)
+        self.assertEqual(classify('%').kind, OTHER)
+
+    def test_classify_game_end(self):
+        self.assertEqual(classify('#RESIGN').kind, REASON)
+        self.assertEqual(classify('#TIME_UP').kind, REASON)
+        for x in ['#WIN', '#LOSE', '#DRAW', '#CENSORED', '#CHUDAN']:
+            self.assertEqual(classify(x).kind, RESULT)
+
+    def test_classify_other(self):
+        for x in ['', 'LOGIN:alice OK', 'START:g1', 'BEGIN Game_Summary', 'T12']:
+            self.assertEqual(classify(x), Event(OTHER, x, None, None))
+
+    def test_is_move_string(self):
+        self.assertTrue(is_move_string('+7776FU'))
+        self.assertTrue(is_move_string('-0055KA'))
+        self.assertFalse(is_move_string('+7776FU,T1'))
+        self.assertFalse(is_move_string('*7776FU'))
+        self.assertFalse(is_move_string('+7706FU'))
+
+    def test_transitions(self):
+        # every state is reachable from CONNECTED and the game always ends in GAME_WAITING
+        reached, stack = {CONNECTED}, [CONNECTED]
+        while stack:
+            for s in TRANSITIONS[stack.pop()].values():
+                if s not in reached:
+                    reached.add(s)
+                    stack.append(s)
+        self.assertEqual(reached, set(TRANSITIONS))
+        self.assertEqual(TRANSITIONS[GAME_TO_MOVE][GAME_END], GAME_WAITING)
+        self.assertEqual(TRANSITIONS[GAME_TO_WAIT][GAME_END], GAME_WAITING)
+        self.assertNotIn(PLAY, TRANSITIONS[GAME_WAITING])
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the impairment proxy."""
+
+import random
+import time
+import unittest
+
+from network.capture import RECEIVED, SENT, WireEvent
+from network.csa_client import CsaClient, GAME_WAITING
+from network.proxy import ImpairmentProfile, ImpairmentProxy, _Link
+from network.replay import ReplayServer
+
+SUMMARY = [
+    'BEGIN Game_Summary', 'Protocol_Version:1.1', 'Game_ID:g1', 'Name+:alice', 'Name-:bob', 'Your_Turn:+',
+    'To_Move:+', 'BEGIN Time', 'Time_Unit:1sec', 'Total_Time:600', 'Byoyomi:10', 'END Time',
+    'BEGIN Position', 'PI', '+', 'END Position', 'END Game_Summary',
+]
+
+
+def profile(**kwargs):
+    return ImpairmentProfile(0.0, 0.0, None, None, 0.0, 0.2)._replace(**kwargs)
+
+
+class TestProxy(unittest.TestCase):
+    def test_split(self):
+        link = _Link(None, None, profile(segment=3), random.Random(0), None)
+        data = b'+7776FU,T12\n-3334FU,T3\n'
+        segments = link.split(data)
+        self.assertEqual(b''.join(segments), data)
+        self.assertTrue(all(1 <= len(s) <= 3 for s in segments))
+        self.assertEqual(_Link(None, None, profile(), None, None).split(data), [data])
+
+    def test_due(self):
+        link = _Link(None, None, profile(latency=0.1, jitter=0.05, loss=0.5), random.Random(0), None)
+        ts = [link.due(1.0, 10) for _ in range(100)]
+        self.assertEqual(ts, sorted(ts))  # delivered in order
+        self.assertTrue(all(t >= 1.1 for t in ts))
+        self.assertTrue(any(t >= 1.3 for t in ts))  # retransmitted
+
+        link = _Link(None, None, profile(bandwidth=100), random.Random(0), None)
+        self.assertEqual([link.due(1.0, 50), link.due(1.0, 50), link.due(3.0, 10)], [1.5, 2.0, 3.1])
+
+    def test_game(self):
+        lines = [(SENT, 'LOGIN alice pass'), (RECEIVED, 'LOGIN:alice OK')] + [(RECEIVED, x) for x in SUMMARY] + \
+                [(SENT, 'AGREE g1'), (RECEIVED, 'START:g1'), (SENT, '+7776FU'), (RECEIVED, '+7776FU,T1'),
+                 (RECEIVED, '-3334FU,T2'), (SENT, '%TORYO'), (RECEIVED, '%TORYO,T1'), (RECEIVED, '#RESIGN'),
+                 (RECEIVED, '#LOSE')]
+        server = ReplayServer([WireEvent(i * 0.001, d, x) for i, (d, x) in enumerate(lines)], None)
+        server.start()
+        self.addCleanup(server.close)
+        # lines are cut into pieces of one or two bytes
+        proxy = ImpairmentProxy('127.0.0.1', server.port, profile(latency=0.02, segment=2), seed=0)
+        proxy.start()
+        self.addCleanup(proxy.close)
+
+        with CsaClient('127.0.0.1', proxy.port) as c:
+            c.login('alice', 'pass')
+            cond = c.get_game_condition()[0]
+            self.assertEqual(cond['Game_Summary']['Game_ID'], 'g1')
+            c.agree(cond)
+            c.get_agreement(cond)
+            t = time.monotonic()
+            self.assertEqual(c.move('+7776FU'), ('+7776FU', 1, None, None))
+            self.assertGreaterEqual(time.monotonic() - t, 0.04)  # round trip
+            self.assertEqual(c.get_move(), ('-3334FU', 2, None, None))
+            self.assertEqual(c.resign(), ('%TORYO', 1, '#RESIGN', '#LOSE'))
+            self.assertEqual(c.state, GAME_WAITING)
+        server.finished.wait(5)
+        self.assertEqual(server.mismatches, [])
+        self.assertGreater(sum(link.segments for link in proxy.links), len(lines))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for Tournament class with a fake server."""
+
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+
+from core import *
+from core.autosave import attach, recover
+from engine.player import RandomPlayer
+from core.game import local_condition
+from network.csa_client import GAME_WAITING, ClosedConnectionError
+from network.tournament import AgreementPolicy, GameInterrupted, Tournament, time_seconds
+
+
+def game_summary(game_id, opponent, total_time=600):
+    return '\n'.join([
+        'BEGIN Game_Summary',
+        'Protocol_Version:1.1',
+        'Game_ID:{}'.format(game_id),
+        'Name+:bot',
+        'Name-:{}'.format(opponent),
+        'Your_Turn:+',
+        'Rematch_On_Draw:NO',
+        'To_Move:+',
+        'BEGIN Time',
+        'Time_Unit:1sec',
+        'Total_Time:{}'.format(total_time),
+        'Byoyomi:10',
+        'Least_Time_Per_Move:1',
+        'END Time',
+        'BEGIN Position',
+        'PI',
+        '+',
+        'END Position',
+        'END Game_Summary',
+        '',
+    ])
+
+
+class FakeServer(threading.Thread):
+    """Offer the games one by one on a connection; the opponent resigns after the first move."""
+
+    def __init__(self, games):
+        super().__init__(daemon=True)
+        self.games = games
+        self.listener = socket.socket()
+        self.listener.bind(('127.0.0.1', 0))
+        self.listener.listen(1)
+        self.port = self.listener.getsockname()[1]
+        self.conn = None
+        self.logins = 0
+
+    def run(self):
+        self.conn, _ = self.listener.accept()
+        games = iter(self.games)
+
+        def offer():
+            game = next(games, None)
+            if game:
+                self.conn.sendall(game_summary(*game).encode())
+
+        for line in self.conn.makefile('r'):
+            line = line.strip()
+            if line.startswith('LOGIN'):
+                self.logins += 1
+                self.conn.sendall('LOGIN:{} OK\n'.format(line.split()[1]).encode())
+                offer()
+            elif line.startswith('AGREE'):
+                self.conn.sendall('START:{}\n'.format(line.split()[1]).encode())
+            elif line.startswith('REJECT'):
+                self.conn.sendall('REJECT:{} by bot\n'.format(line.split()[1]).encode())
+                offer()
+            elif line.startswith('+'):
+                self.conn.sendall('{},T1\n%TORYO,T1\n#RESIGN\n#WIN\n'.format(line).encode())
+                offer()
+
+    def close(self):
+        if self.conn:
+            self.conn.close()
+        self.listener.close()
+
+
+class FakeClient:
+    """Client in a game as black; the opponent's time is up after the first move, or the connection is lost."""
+
+    def __init__(self, game_id, drop=False):
+        state = State()
+        state.set_hirate()
+        self.cond = local_condition(state, 'bot', 'alice', game_id, BLACK)
+        self.drop = drop
+        self.state = GAME_WAITING
+        self.closed = False
+
+    def get_game_condition(self):
+        return self.cond, None
+
+    def agree(self, cond):
+        pass
+
+    def get_agreement(self, cond):
+        return True, None
+
+    def move(self, mv):
+        return (mv, 1, None, None) if self.drop else (mv, 1, '#TIME_UP', '#WIN')
+
+    def get_move(self):
+        raise ClosedConnectionError
+
+    def close(self):
+        self.closed = True
+
+
+class FakePool:
+    def __init__(self, clients):
+        self.clients = clients
+        self.released = []
+
+    def acquire(self, host, port, user=None):
+        return self.clients.pop(0)
+
+    def release(self, c):
+        self.released.append(c)
+
+
+class TestAgreementPolicy(unittest.TestCase):
+    def test_check(self):
+        cond = {'Game_Summary': {'Your_Turn': '+', 'Name+': 'bot', 'Name-': 'alice',
+                                 'Time': {'Time_Unit': '1min', 'Total_Time': '10', 'Byoyomi': '0'}}}
+        self.assertEqual(time_seconds(cond['Game_Summary']['Time'], 'Total_Time'), 600)
+        self.assertIsNone(AgreementPolicy().check(cond))
+        self.assertIsNone(AgreementPolicy(opponents=['alice'], total_time=(600, None)).check(cond))
+        self.assertIsNotNone(AgreementPolicy(opponents=['bob']).check(cond))
+        self.assertIsNotNone(AgreementPolicy(excluded=['alice']).check(cond))
+        self.assertIsNotNone(AgreementPolicy(total_time=(None, 300)).check(cond))
+        self.assertIsNotNone(AgreementPolicy(byoyomi=(10, None)).check(cond))
+
+
+class TestTournament(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeServer([('g1', 'alice'), ('g2', 'mallory'), ('g3', 'alice', 60), ('g4', 'bob')])
+        self.server.start()
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_run(self):
+        policy = AgreementPolicy(excluded=['mallory'], total_time=(300, None))
+        tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp)
+        autosave = lambda g: attach(g, os.path.join(tmp, '{}.csa'.format(g.id)))
+        t = Tournament('127.0.0.1', self.server.port, 'bot', 'pass', RandomPlayer(0), policy, autosave=autosave)
+        games, rejected = [], []
+        stats = t.run(2, lambda g, r: games.append(r), lambda c, reason: rejected.append(reason))
+
+        self.assertEqual([r.game_id for r in games], ['g1', 'g4'])
+        self.assertEqual([r.opponent for r in games], ['alice', 'bob'])
+        self.assertEqual([(r.result, r.reason, r.plies) for r in games], [('#WIN', '#RESIGN', 1)] * 2)
+        self.assertEqual(rejected, ['opponent: mallory', 'Total_Time: 60'])
+        self.assertEqual((stats.count('#WIN'), stats.rejected), (2, 2))
+        self.assertEqual(self.server.logins, 1)  # one login for all the games
+        self.assertEqual(sorted(os.listdir(tmp)), ['g1.csa', 'g4.csa'])
+        self.assertEqual(len(recover(os.path.join(tmp, 'g4.csa')).history), 2)
+        t.pool.close()
+
+    def test_run_reconnect(self):
+        # the first connection is lost while waiting for the opponent's move
+        lost, c = FakeClient('g1', drop=True), FakeClient('g2')
+        pool = FakePool([lost, c])
+        t = Tournament('127.0.0.1', 4081, 'bot', 'pass', RandomPlayer(0), pool=pool, retry_delay=0)
+        games, errors = [], []
+        stats = t.run(2, lambda g, r: games.append(r), on_error=lambda e, delay: errors.append(e))
+
+        self.assertEqual([(r.game_id, r.result, r.plies) for r in stats.games], [('g1', None, 1), ('g2', '#WIN', 1)])
+        self.assertEqual([r.game_id for r in games], ['g2'])
+        self.assertEqual([type(e) for e in errors], [GameInterrupted])
+        self.assertTrue(lost.closed)
+        self.assertEqual(pool.released, [c])  # the closed client is not pooled
+        self.assertIn('1 interrupted', str(stats))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for wire logs and the replay server."""
+
+import io
+import os
+import tempfile
+import time
+import unittest
+
+from network.capture import RECEIVED, SENT, WireEvent, WireLog, capture_factory, read_log
+from network.csa_client import CsaClient, ProtocolError, GAME_TO_MOVE, GAME_TO_WAIT, GAME_WAITING
+from network.replay import ReplayServer
+
+SUMMARY = [
+    'BEGIN Game_Summary', 'Protocol_Version:1.1', 'Game_ID:g1', 'Name+:alice', 'Name-:bob', 'Your_Turn:{}',
+    'To_Move:+', 'BEGIN Time', 'Time_Unit:1sec', 'Total_Time:600', 'Byoyomi:10', 'END Time',
+    'BEGIN Position', 'PI', '+', 'END Position', 'END Game_Summary',
+]
+
+
+def session(turn, lines, interval=0.001):
+    """
+    @param lines lines of the game after START, prefixed by '> ' (sent by the client) or '< '
+    @return list of WireEvent of the whole session
+    """
+    head = ['> LOGIN alice *****', '< LOGIN:alice OK'] + ['< ' + x.format(turn) for x in SUMMARY] + \
+           ['> AGREE g1', '< START:g1']
+    return [WireEvent(i * interval, x[0], x[2:]) for i, x in enumerate(head + lines)]
+
+
+def start(server):
+    server.start()
+    c = CsaClient('127.0.0.1', server.port, capture=WireLog(io.StringIO()))
+    c.log = c.capture.file
+    c.log.close = lambda: None  # keep the log readable after the client is closed
+    c.login('alice', 'pass')
+    cond = c.get_game_condition()[0]
+    c.agree(cond)
+    c.get_agreement(cond)
+    return c
+
+
+class TestReplay(unittest.TestCase):
+    def replay(self, turn, lines, speed=None):
+        server = ReplayServer(session(turn, lines), speed)
+        self.addCleanup(server.close)
+        client = start(server)
+        self.addCleanup(client.close)
+        return server, client
+
+    def test_capture_round_trip(self):
+        lines = ['> +7776FU', '< +7776FU,T1', '< -3334FU,T2', '> %TORYO', '< %TORYO,T1', '< #RESIGN', '< #LOSE']
+        server, client = self.replay('+', lines)
+        self.assertEqual(client.move('+7776FU'), ('+7776FU', 1, None, None))
+        self.assertEqual(client.get_move(), ('-3334FU', 2, None, None))
+        self.assertEqual(client.resign(), ('%TORYO', 1, '#RESIGN', '#LOSE'))
+        client.close()
+        server.finished.wait(5)
+        self.assertEqual(server.mismatches, [])
+        self.assertEqual(server.lines, len(server.events))
+
+        # the password is not written, and the replay accepts the real one against the redacted log
+        self.assertNotIn('pass', client.log.getvalue())
+        captured = read_log(io.StringIO(client.log.getvalue()))
+        self.assertEqual([(e.direction, e.line) for e in captured], [(e.direction, e.line) for e in server.events])
+        self.assertEqual(captured, sorted(captured, key=lambda e: e.time))
+
+    def test_double_kachi(self):
+        # the declaration of the opponent is echoed once more before the result
+        server, client = self.replay('+', ['> +7776FU', '< +7776FU,T1', '< %KACHI,T12', '< %KACHI',
+                                           '< #JISHOGI', '< #LOSE'])
+        self.assertEqual(client.move('+7776FU'), ('+7776FU', 1, None, None))
+        self.assertEqual(client.state, GAME_TO_WAIT)
+        self.assertEqual(client.get_move(), ('%KACHI', 12, '#JISHOGI', '#LOSE'))
+        self.assertEqual(client.state, GAME_WAITING)
+
+    def test_late_confirmation(self):
+        lines = ['< +7776FU,T3', '> -3334FU', '< -3334FU,T1']
+        events = session('-', lines)
+        # the confirmation of the move comes 0.2 seconds after it was sent
+        events[-1] = events[-1]._replace(time=events[-2].time + 0.2)
+        for speed, least, most in [(1.0, 0.15, 10.0), (10.0, 0.0, 0.15)]:
+            server = ReplayServer(events, speed)
+            self.addCleanup(server.close)
+            client = start(server)
+            self.addCleanup(client.close)
+            self.assertEqual(client.get_move(), ('+7776FU', 3, None, None))
+            self.assertEqual(client.state, GAME_TO_MOVE)
+            t = time.monotonic()
+            self.assertEqual(client.move('-3334FU'), ('-3334FU', 1, None, None))
+            self.assertTrue(least <= time.monotonic() - t < most, speed)
+
+    def test_mismatch(self):
+        server, client = self.replay('+', ['> +7776FU', '< +7776FU,T1'])
+        # the confirmation of another move is not taken for the one sent
+        self.assertRaises(ProtocolError, client.move, '+2726FU')
+        client.close()
+        server.finished.wait(5)
+        self.assertEqual(server.mismatches, [('+7776FU', '+2726FU')])
+
+    def test_time_up_before_move(self):
+        events = session('-', ['< +7776FU,T0', '< #TIME_UP', '< #LOSE'])
+        # the time runs out 0.1 seconds after the move of the opponent
+        events[-2:] = [e._replace(time=e.time + 0.1) for e in events[-2:]]
+        server = ReplayServer(events, 1.0)
+        self.addCleanup(server.close)
+        client = start(server)
+        self.addCleanup(client.close)
+        self.assertEqual(client.get_move(), ('+7776FU', 0, None, None))
+        deadline = time.monotonic() + 5
+        while not client.is_game_end() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(client.move('-3334FU'), ('-3334FU', None, '#TIME_UP', '#LOSE'))
+        self.assertEqual(client.state, GAME_WAITING)
+
+    def test_capture_factory(self):
+        with tempfile.TemporaryDirectory() as d:
+            directory = os.path.join(d, 'logs')
+            f = capture_factory(directory, lambda host, port, capture: capture)
+            log = f('localhost', 4081)
+            log.sent('LOGIN alice secret x1')
+            log.close()
+            path = os.path.join(directory, os.listdir(directory)[0])
+            with open(path) as fp:
+                self.assertEqual([e.line for e in read_log(fp)], ['LOGIN alice ***** x1'])
+
+    def test_read_log(self):
+        self.assertEqual(read_log(['0.5 > LOGIN a b\n', '\n', '1.25 < LOGIN:a OK\n', '2 < \n']),
+                         [WireEvent(0.5, SENT, 'LOGIN a b'), WireEvent(1.25, RECEIVED, 'LOGIN:a OK'),
+                          WireEvent(2.0, RECEIVED, '')])
+        self.assertRaises(ValueError, read_log, ['0.5 ? LOGIN'])
+
+
+if __name__ == '__main__':
+    unittest.main()
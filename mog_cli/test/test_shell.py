@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for Shell class."""
+
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+import command
+import shell
+from command.move_command import MoveCommand
+from command.position_command import PositionCommand
+from core import *
+from core.autosave import recover
+from core.game import local_condition
+from core.record import Record
+from archive.store import BLACK_WIN
+
+
+def run_shell(script, batch=True):
+    out = io.StringIO()
+    sh = shell.Shell('localhost', 4081, None, None, input=io.StringIO(script), output=out, batch=batch)
+    return sh.start(), out.getvalue()
+
+
+class TestBatchMode(unittest.TestCase):
+    def test_no_prompt(self):
+        self.assertEqual(run_shell('# comment\nhistory\n'), (shell.EXIT_SUCCESS, 'no game\n'))
+
+    def test_exit_status(self):
+        self.assertEqual(run_shell('exit 5\nhistory\n'), (5, ''))
+
+    def test_stop_at_unknown_command(self):
+        self.assertEqual(run_shell('unknown\nhistory\n'), (shell.EXIT_USAGE, 'unknown command: unknown\n'))
+
+    def test_stop_at_failure(self):
+        status, out = run_shell('tsume\nhistory\n')
+        self.assertEqual(status, shell.EXIT_FAILURE)
+        self.assertNotIn('no game\n', out)
+
+    def test_confirm(self):
+        sh = shell.Shell('localhost', 4081, None, None, input=io.StringIO(), output=io.StringIO(), batch=True)
+        self.assertTrue(sh.confirm('agree?'))
+        self.assertFalse(sh.confirm('agree?', default=False))
+
+    def test_interactive_mode(self):
+        status, out = run_shell('history\n', batch=False)
+        self.assertEqual(status, shell.EXIT_SUCCESS)
+        self.assertEqual(out, '[not connected]> no game\n[not connected]> ')
+
+
+class TestStandaloneMode(unittest.TestCase):
+    def test_local_game(self):
+        status, out = run_shell('new\nmove 7776FU\nmove -3334FU\nhistory\n')
+        self.assertEqual(status, shell.EXIT_SUCCESS)
+        self.assertIn('000: +7776FU', out)
+        self.assertIn('001: -3334FU', out)
+
+    def test_history_range(self):
+        status, out = run_shell('new\nm 7776FU\nm -3334FU\nm 2726FU\nhistory 1 1\nhistory tail 2\nhistory 5\n')
+        self.assertEqual(status, shell.EXIT_SUCCESS)
+        self.assertTrue(out.endswith('001: -3334FU\n001: -3334FU\n002: +2726FU\nno moves in range\n'))
+
+    def test_replay(self):
+        status, out = run_shell('new\nm 7776FU\nm -3334FU\nreplay goto 1\nreplay next\nreplay play 1000\n')
+        self.assertEqual(status, shell.EXIT_SUCCESS)
+        self.assertIn('[001/002] +7776FU\n', out)
+        self.assertEqual(out.count('[002/002] -3334FU\n'), 2)
+
+    def test_replay_decimal_count(self):
+        for sub in ['next', 'prev', 'goto']:
+            status, out = run_shell('new\nm 7776FU\nreplay {} 1.5\n'.format(sub))
+            self.assertEqual(status, shell.EXIT_FAILURE)
+            self.assertIn('CommandArgumentsError', out)
+        self.assertEqual(run_shell('new\nm 7776FU\nreplay play 1000.5\n')[0], shell.EXIT_SUCCESS)
+
+    def test_illegal_move(self):
+        status, out = run_shell('new\nmove 7775FU\nhistory\n')
+        self.assertEqual(status, shell.EXIT_FAILURE)
+        self.assertNotIn('000:', out)
+
+
+class TestPositionCommand(unittest.TestCase):
+    def test_read_position(self):
+        # board rows end with ' * ', which must be kept for the CSA reader
+        state = State()
+        state.set_hirate()
+        sh = shell.Shell('localhost', 4081, None, None, input=io.StringIO('{}\n\n'.format(state)),
+                         output=io.StringIO(), batch=True)
+        lines = PositionCommand.read_position(sh)
+        self.assertEqual(len(lines), len(str(state).splitlines()))
+        self.assertEqual(Record.read(lines)[0][1], state)
+        self.assertEqual(len(Record.read(lines)[0][1].board), 40)
+
+
+class FakePool:
+    def __init__(self):
+        self.released = []
+
+    def release(self, c):
+        self.released.append(c)
+
+
+class TestMoveCommand(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp)
+        state = State()
+        state.set_hirate()
+        self.sh = shell.Shell('localhost', 4081, None, None, input=io.StringIO(), output=io.StringIO(), batch=True,
+                              autosave_dir=self.tmp)
+        self.sh.game = Game(local_condition(state, 'alice', 'bob', 'game-1', BLACK))
+        self.client = object()
+        self.sh.csa_client, self.sh.pool = self.client, FakePool()
+        self.sh.start_autosave(self.sh.game)
+
+    def history(self):
+        return [str(m) for m in self.sh.game.history]
+
+    def test_move(self):
+        self.assertTrue(MoveCommand.move_common(self.sh, lambda: ('+7776FU', 3, None, None)))
+        self.assertEqual(self.history(), ['+7776FU,T3'])
+
+    def test_game_end_after_move(self):
+        self.assertFalse(MoveCommand.move_common(self.sh, lambda: ('+7776FU', 3, '#SENNICHITE', '#DRAW')))
+        self.assertEqual(self.history(), ['+7776FU,T3', '#SENNICHITE'])
+        self.assertEqual(self.sh.pool.released, [self.client])
+
+        # the autosaved record has the last move
+        saved = recover(os.path.join(self.tmp, 'game-1.csa'))
+        self.assertEqual([str(m) for m in saved.history], ['+7776FU,T3', '%SENNICHITE'])
+
+    def test_store_game_end_after_move(self):
+        self.sh.store_path = ':memory:'
+        self.addCleanup(lambda: self.sh.store.close())
+        moves = [('+7776FU', 1, None, None), ('-3334FU', 2, None, None), ('+8822UM', 3, '#TIME_UP', '#WIN')]
+        for ret in moves:
+            MoveCommand.move_common(self.sh, lambda: ret)
+
+        # the game ended on the third move, after the opponent's time was up
+        store = self.sh.store
+        self.assertEqual([(row[6], row[7]) for row in store.query(min_plies=3, max_plies=3)], [('#TIME_UP', 3)])
+        self.assertEqual(store.query(result=BLACK_WIN)[0][1], 'game-1')
+        info, init_state, history = store.record(store.query()[0][0])
+        self.assertEqual(Game.from_record(info, init_state, history).state, self.sh.game.state)
+
+    def test_game_end_before_move(self):
+        # the move was not sent, the time is up
+        self.assertFalse(MoveCommand.move_common(self.sh, lambda: ('+7776FU', None, '#TIME_UP', '#LOSE')))
+        self.assertEqual(self.history(), ['#TIME_UP'])
+
+    def test_resign(self):
+        self.assertFalse(MoveCommand.move_common(self.sh, lambda: ('%TORYO', 5, '#RESIGN', '#LOSE')))
+        self.assertEqual(self.history(), ['#RESIGN,T5'])
+
+
+class TestLazyCommand(unittest.TestCase):
+    def test_aliases_match(self):
+        for name, (_, aliases) in command.COMMANDS.items():
+            self.assertEqual(getattr(command, name)().alias(), aliases)
+
+    def test_resolve_on_first_use(self):
+        cmd = command.LazyCommand('HistoryCommand')
+        self.assertIsNone(cmd.instance)
+        self.assertEqual(cmd.name(), 'HISTORY')
+        self.assertIsNone(cmd.instance)
+        self.assertEqual(cmd.__doc__, 'Print move history')
+        self.assertIsInstance(cmd.instance, command.HistoryCommand)
+
+
+if __name__ == '__main__':
+    unittest.main()
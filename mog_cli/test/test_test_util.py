@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""Tests for the concurrent test driver."""
+
+import socket
+import threading
+import unittest
+
+import test_util
+from test_util import ConcurrentDriver
+
+
+class Client:
+    """Stand-in of CsaClient which reads lines from one end of a socket pair."""
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.file = sock.makefile('rb')
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+
+class TestConcurrentDriver(unittest.TestCase):
+    def setUp(self):
+        self.driver = ConcurrentDriver()
+        s1, s2 = socket.socketpair()
+        self.c1, self.c2 = Client(s1), Client(s2)
+        self.log = []
+
+    def tearDown(self):
+        self.driver.close()
+        self.c1.close()
+        self.c2.close()
+
+    def read(self, c):
+        def f():
+            line = c.file.readline()
+            self.log.append(('read', line))
+            return line
+        return f
+
+    def write(self, c, data):
+        def f():
+            self.log.append(('write', data))
+            c.sock.sendall(data)
+            return len(data)
+        return f
+
+    def test_a_before_b(self):
+        self.assertEqual(self.driver.a_before_b(self.read(self.c1), self.write(self.c2, b'x\n'), self.c1), (b'x\n', 2))
+        self.assertEqual(self.log, [('write', b'x\n'), ('read', b'x\n')])
+
+    def test_a_after_b(self):
+        self.assertEqual(self.driver.a_after_b(self.write(self.c1, b'y\n'), self.read(self.c2), self.c2), (2, b'y\n'))
+
+    def test_finished_without_waiting(self):
+        # 'func_b' which does not read from the server is waited for until it returns
+        self.assertEqual(self.driver.a_after_b(self.read(self.c1), self.write(self.c2, b'z\n'), self.c2), (b'z\n', 2))
+        self.assertEqual(self.log, [('write', b'z\n'), ('read', b'z\n')])
+
+    def test_timeout(self):
+        # neither finishes nor waits for the server
+        orig, test_util.ORDER_TIMEOUT = test_util.ORDER_TIMEOUT, 0.05
+        self.addCleanup(setattr, test_util, 'ORDER_TIMEOUT', orig)
+        done = threading.Event()
+        try:
+            self.assertRaises(TimeoutError, self.driver.a_before_b, done.wait, lambda: None, self.c1)
+        finally:
+            done.set()  # before the driver is closed
+
+    def test_exec_concurrent(self):
+        self.assertEqual(self.driver.exec_concurrent(lambda: 1, lambda: 2), (1, 2))
+        self.assertRaises(ZeroDivisionError, self.driver.exec_concurrent, lambda: 1, lambda: 1 // 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,32 +1,26 @@
 """"helper functions for testing"""
 
-from multiprocessing import Process, Manager
-import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
+# seconds to wait for a function to start waiting for the server, or to finish
+ORDER_TIMEOUT = 5.0
+RESULT_TIMEOUT = 30.0
 
-def async_apply(ret, f, *args, **kwargs):
-    """
-    @param ret list created by multiprocessing.Manager.list()
-    @param f function
-    @param args arguments for function f
-    """
-    ret.append(f(*args, **kwargs))
 
+class _SignalingFile:
+    """File of a CsaClient which sets the event before the client waits for a line from the server."""
 
-def exec_concurrent(func1, func2):
-    """
-    Execute two functions concurrently.
-    'func2' is executed in the another process.
-    """
-    manager = Manager()
-    ret = manager.list()
+    def __init__(self, file):
+        self.file = file
+        self.waiting = threading.Event()
 
-    p = Process(target=async_apply, args=(ret, func2))
-    p.start()
-    ret1 = func1()
-    p.join()
+    def readline(self, *args):
+        self.waiting.set()
+        return self.file.readline(*args)
 
-    return ret1, ret[0]
+    def __getattr__(self, name):
+        return getattr(self.file, name)
 
 
 def exec_before(func, func_before, *args, **kwargs):
@@ -39,15 +33,59 @@ def exec_before(func, func_before, *args, **kwargs):
     return f
 
 
-def a_after_b(func_a, func_b):
-    """Execute 'func_b', await a moment, then execute 'func_a'."""
-    return exec_concurrent(exec_before(func_a, time.sleep, 0.1), func_b)
+class ConcurrentDriver:
+    """
+    Runs the steps of concurrent clients in worker threads, ordered by events instead of sleeps.
+    Create one per test case in setUp, and close it in tearDown.
+    """
+
+    def __init__(self, max_workers=2):
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+
+    @staticmethod
+    def watch(client):
+        """@return threading.Event, cleared, which is set when the client starts to wait for the server"""
+        if not isinstance(client.file, _SignalingFile):
+            client.file = _SignalingFile(client.file)
+        client.file.waiting.clear()
+        return client.file.waiting
+
+    def start(self, func, client):
+        """
+        Execute 'func' in a worker thread, and wait until the client starts to wait for the server or 'func' finishes.
+        @return Future of 'func'
+        """
+        ready = self.watch(client)
+        future = self.executor.submit(func)
+        future.add_done_callback(lambda _: ready.set())
+        if not ready.wait(ORDER_TIMEOUT):
+            raise TimeoutError('{} did not wait for the server in {}s'.format(func, ORDER_TIMEOUT))
+        return future
+
+    def exec_concurrent(self, func1, func2):
+        """
+        Execute two functions concurrently.
+        'func2' is executed in a worker thread.
+        """
+        future = self.executor.submit(func2)
+        ret1 = func1()
+        return ret1, future.result(RESULT_TIMEOUT)
 
+    def a_after_b(self, func_a, func_b, client_b):
+        """Execute 'func_b' with 'client_b' until it waits for the server, then execute 'func_a'."""
+        future = self.start(func_b, client_b)
+        ret_a = func_a()
+        return ret_a, future.result(RESULT_TIMEOUT)
 
-def a_before_b(func_a, func_b):
-    """Execute 'func_a', await a moment, then execute 'func_b'."""
-    return exec_concurrent(func_a, exec_before(func_b, time.sleep, 0.1))
+    def a_before_b(self, func_a, func_b, client_a):
+        """Execute 'func_a' with 'client_a' until it waits for the server, then execute 'func_b'."""
+        future = self.start(func_a, client_a)
+        ret_b = func_b()
+        return future.result(RESULT_TIMEOUT), ret_b
 
 
 if __name__ == '__main__':
-    pass
\ No newline at end of file
+    pass
@@ -6,12 +6,21 @@ import logging
 
 logger = logging.getLogger("mog-cli")
 logger.setLevel(logging.DEBUG)
-ch = logging.StreamHandler()
-ch.setLevel(logging.DEBUG)
-formatter = logging.Formatter("%(asctime)s [%(levelname)s] %(message)s")
-ch.setFormatter(formatter)
-logger.addHandler(ch)
+
+_handler = None
+
+
+def init_logger(level=logging.DEBUG):
+    """Install the console handler (once) and set the log level. Called by the entry point, not at import time."""
+    global _handler
+    if _handler is None:
+        _handler = logging.StreamHandler()
+        _handler.setLevel(logging.DEBUG)
+        _handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+        logger.addHandler(_handler)
+    logger.setLevel(level)
+    return logger
 
 
 if __name__ == '__main__':
-    pass
\ No newline at end of file
+    pass